@@ -7,5 +7,12 @@ class Command(BaseCommand):
 
     help = 'Sending Email/SMS notifications from the queue'
 
-    def handle(self, *args, **options):
-        notifications.process_notifications_queue()
+    def add_arguments(self, parser):
+        parser.add_argument('--delay', type=float, default=None, dest='delay',
+                            help='average number of seconds between two emails sent by this process')
+        parser.add_argument('--batch_size', type=int, default=None, dest='batch_size')
+        parser.add_argument('--workers', type=int, default=1, dest='workers',
+                            help='number of threads sending emails at the same time')
+
+    def handle(self, delay, batch_size, workers, *args, **options):
+        notifications.process_notifications_queue(delay=delay, batch_size=batch_size, workers=workers)
@@ -1,8 +1,22 @@
+"""
+Email notifications for account owners.
+
+Notifications are stored in the DB with "started" status and sent by the `process_notifications` management command.
+Notifications are claimed in small batches with `SELECT ... FOR UPDATE SKIP LOCKED` and the rows stay locked
+until the whole batch is sent, so few workers, threads or processes, are able to send emails at the same time
+and every notification is picked up only once. One SMTP connection is used for the whole batch
+and the speed of sending is limited by a token bucket instead of a pause after every email.
+"""
+
 import time
 import logging
+import threading
+import concurrent.futures
 
-from django.core.mail import EmailMultiAlternatives
+from django import db
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import transaction
 
 from django.template.loader import render_to_string
 
@@ -106,7 +120,7 @@ def start_email_notification_low_balance_back_end_renew(user, domains_list=[]):
     return new_notification
 
 
-def execute_email_notification(notification_object):
+def execute_email_notification(notification_object, connection=None):
     from_email = settings.DEFAULT_FROM_EMAIL
     email_template = None
     context = {
@@ -228,55 +242,135 @@ def execute_email_notification(notification_object):
         text_content,
         from_email,
         to=[notification_object.recipient, ],
-        bcc=[notification_object.recipient, ],
-        cc=[notification_object.recipient, ],
+        connection=connection,
     )
     msg.attach_alternative(html_content, 'text/html')
     try:
         msg.send()
     except:
+        logger.exception('failed to send email for %r', notification_object)
         return False
     return True
 
 
-def process_notifications_queue(iterations=None, delay=3, iteration_delay=5*60):
+class TokenBucket(object):
+    """
+    Allows on average `rate` operations per second and short bursts of `capacity` operations, thread-safe.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self):
+        """
+        Takes one token, waits until the token is available.
+        """
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _is_skipped(notification_object):
+    if notification_object.subject == 'account_approved':
+        return False
+    if not hasattr(notification_object.account, 'profile'):
+        logger.info('skipped (no profile) %r', notification_object)
+        return True
+    if not notification_object.account.profile.email_notifications_enabled:
+        logger.info('skipped %r', notification_object)
+        return True
+    return False
+
+
+def send_notifications_batch(bucket, batch_size=None):
+    """
+    Claims and sends one batch of email notifications, returns number of processed notifications.
+    """
+    batch_size = batch_size or settings.ZENAIDA_NOTIFICATIONS_BATCH_SIZE
+    with transaction.atomic():
+        # TODO: able to handle SMS notifications
+        batch = list(Notification.notifications.select_for_update(skip_locked=True, of=('self', )).filter(
+            status='started',
+            type='email',
+        ).select_related('account', 'account__profile').order_by('pk')[:batch_size])
+        if not batch:
+            return 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except:
+            logger.exception('failed to open email connection')
+        try:
+            for one_notification in batch:
+                if _is_skipped(one_notification):
+                    one_notification.status = 'skipped'
+                    continue
+                bucket.consume()
+                try:
+                    result = execute_email_notification(one_notification, connection=connection)
+                except:
+                    logger.exception('failed to execute %r', one_notification)
+                    result = False
+                if result:
+                    one_notification.status = 'sent'
+                    logger.info('successfully executed %r', one_notification)
+                else:
+                    one_notification.status = 'failed'
+                    # connection could be broken, open it again for the next email
+                    connection.close()
+                    try:
+                        connection.open()
+                    except:
+                        logger.exception('failed to open email connection')
+        finally:
+            connection.close()
+        Notification.notifications.bulk_update(batch, ['status', ])
+    return len(batch)
+
+
+def _send_all_notifications(bucket, batch_size=None, close_db_connection=False):
+    total = 0
+    try:
+        while True:
+            count = send_notifications_batch(bucket, batch_size=batch_size)
+            if not count:
+                break
+            total += count
+    finally:
+        if close_db_connection:
+            db.connection.close()
+    return total
+
+
+def process_notifications_queue(iterations=None, delay=None, iteration_delay=5*60, batch_size=None, workers=1):
     """
     Looping thru all email notifications and execute those which was was not sent yet.
+    On average one email is sent every `delay` seconds in every process, shared between all `workers` threads.
     """
+    delay = delay if delay is not None else settings.ZENAIDA_NOTIFICATIONS_SEND_DELAY
+    bucket = TokenBucket(rate=(1.0 / delay) if delay else 0, capacity=settings.ZENAIDA_NOTIFICATIONS_SEND_BURST)
     iteration = 0
     while True:
         if iterations is not None and iteration >= iterations:
             break
         iteration += 1
-        # TODO: able to handle SMS notifications
-        for one_notification in Notification.notifications.filter(
-            status='started',
-            type='email',
-        ):
-            if one_notification.subject != 'account_approved':
-                if not hasattr(one_notification.account, 'profile'):
-                    one_notification.status = 'skipped'
-                    one_notification.save()
-                    logger.info('skipped (no profile) %r', one_notification)
-                    time.sleep(delay)
-                    continue
-                if not one_notification.account.profile.email_notifications_enabled:
-                    one_notification.status = 'skipped'
-                    one_notification.save()
-                    logger.info('skipped %r', one_notification)
-                    time.sleep(delay)
-                    continue
-            try:
-                result = execute_email_notification(one_notification)
-            except:
-                result = False
-            if result:
-                one_notification.status = 'sent'
-                one_notification.save()
-                logger.info('successfully executed %r', one_notification)
-            else:
-                one_notification.status = 'failed'
-                one_notification.save()
-                logger.exception('failed to execute %r' % one_notification)
-            time.sleep(delay)
-        time.sleep(iteration_delay)
+        if workers > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda _: _send_all_notifications(bucket, batch_size=batch_size, close_db_connection=True), range(workers)))
+        else:
+            _send_all_notifications(bucket, batch_size=batch_size)
+        if iterations is None or iteration < iterations:
+            time.sleep(iteration_delay)
@@ -2,11 +2,13 @@ import datetime
 import logging
 
 from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
-from accounts.models.account import Account
 from accounts.models.activation import Activation
-from accounts import notifications
+from accounts.models.notification import Notification
+
+from back.models.domain import Domain
 
 logger = logging.getLogger(__name__)
 
@@ -38,56 +40,88 @@ def activations_cleanup():
         logger.info("activation code removed: %r", activation_code.code)
 
 
-def check_notify_domain_expiring(dry_run=True, min_days_before_expire=0, max_days_before_expire=30, subject='domain_expiring'):
+def check_notify_domains_expiring(windows, dry_run=True):
     """
-    Loop all user accounts and all domains and identify all "expiring" domains.
-
-    Skip sending any notifications if user disabled email notifications in Profile settings.
-    Also checks notifications history to make sure only one email is sent for given domain.
-
-    Values `min_days_before_expire` and `max_days_before_expire` will select domains based on `expiry_date` field.
+    Identify all "expiring" domains for all given time windows in a single pass.
 
+    Every item in `windows` is a tuple `(min_days_before_expire, max_days_before_expire, subject)`,
+    domain falls into the window when number of full days left before `expiry_date` is
+    greater than `min_days_before_expire` and less than `max_days_before_expire`.
     Parameter `subject` must be one of "domain_expiring", "domain_expire_soon"... listed in "Notification.subject" model field choices.
 
+    Only registered and active domains are taken into account and only if there is no notification
+    with same subject for that domain sent before - that is checked in the same DB query.
+    New notifications are created all together with `bulk_create()`.
+
+    Returns list of tuples `(user, domain_name, expiry_date, subject)`.
     If `dry_run` is True only returns identified users and domains without taking any actions.
     """
+    if not windows:
+        return []
     time_now = timezone.now()
+    domains = Domain.domains.filter(
+        owner__profile__isnull=False,
+        expiry_date__gte=time_now + datetime.timedelta(days=min(w[0] for w in windows) + 1),
+        expiry_date__lt=time_now + datetime.timedelta(days=max(w[1] for w in windows)),
+    ).exclude(
+        epp_id__isnull=True,
+    ).exclude(
+        epp_id='',
+    ).exclude(
+        status__in=['inactive', ],
+    ).select_related(
+        'owner', 'owner__profile',
+    ).annotate(**{
+        'notified_%d' % pos: Exists(Notification.notifications.filter(
+            account=OuterRef('owner'),
+            domain_name=OuterRef('name'),
+            subject=subject,
+        )) for pos, (_, _, subject) in enumerate(windows)
+    }).order_by('owner_id', 'name')
     outgoing_emails = []
-    for user in Account.users.all():
-        if not hasattr(user, 'profile'):
-            continue
-        # if not user.profile.email_notifications_enabled:
-        #     continue
-        expiring_domains = {}
-        for domain in user.domains.all():
-            if not domain.epp_id or domain.status in ['inactive', ]:
-                # only take in account domains which are registered and active
-                continue
-            time_domain = domain.expiry_date
-            time_delta = time_domain - time_now
-            if time_delta.days >= max_days_before_expire:
-                # domain is not expiring at the moment or must be handled in another task
+    new_notifications = []
+    for domain in domains:
+        days_left = (domain.expiry_date - time_now).days
+        for pos, (min_days_before_expire, max_days_before_expire, subject) in enumerate(windows):
+            if days_left >= max_days_before_expire or days_left <= min_days_before_expire:
+                # domain is not expiring at the moment or must be handled in another window
                 continue
-            if time_delta.days <= min_days_before_expire:
-                # domain already expired or must be handled in another task - no email needed
+            if getattr(domain, 'notified_%d' % pos):
                 continue
-            expiring_domains[domain.name] = domain.expiry_date.date()
-        # now look up all already sent notifications and find only domains
-        # which we did not send notification yet
-        domains_notified = user.notifications.filter(subject=subject).values_list('domain_name', flat=True)
-        domains_to_be_notified = list(set(expiring_domains.keys()).difference(set(domains_notified)))
-        # TODO: need to also clean up old notifications
-        if not domains_to_be_notified:
-            continue
-        for expiring_domain in domains_to_be_notified:
-            logger.info('for %r domain %r is expiring and has not been communicated yet', user, expiring_domain)
-            outgoing_emails.append((user, expiring_domain, expiring_domains[expiring_domain], ))
+            logger.info('for %r domain %r is expiring and has not been communicated yet', domain.owner, domain.name)
+            outgoing_emails.append((domain.owner, domain.name, domain.expiry_date.date(), subject, ))
             if dry_run:
                 continue
-            notifications.start_email_notification_domain_expiring(
-                user=user,
-                domain_name=expiring_domain,
-                expiry_date=expiring_domains[expiring_domain],
+            new_notifications.append(Notification(
+                account=domain.owner,
+                recipient=domain.owner.profile.contact_email,
+                type='email',
                 subject=subject,
-            )
+                domain_name=domain.name,
+                details={
+                    'expiry_date': domain.expiry_date.date(),
+                },
+            ))
+    # TODO: need to also clean up old notifications
+    if new_notifications:
+        Notification.notifications.bulk_create(new_notifications)
+        logger.info('created %d new notifications about expiring domains', len(new_notifications))
     return outgoing_emails
+
+
+def check_notify_domain_expiring(dry_run=True, min_days_before_expire=0, max_days_before_expire=30, subject='domain_expiring'):
+    """
+    Identify all "expiring" domains for one time window, see `check_notify_domains_expiring()`.
+
+    Skip sending any notifications if user disabled email notifications in Profile settings.
+    Also checks notifications history to make sure only one email is sent for given domain.
+
+    Values `min_days_before_expire` and `max_days_before_expire` will select domains based on `expiry_date` field.
+
+    If `dry_run` is True only returns identified users and domains without taking any actions.
+    """
+    outgoing_emails = check_notify_domains_expiring(
+        windows=[(min_days_before_expire, max_days_before_expire, subject, ), ],
+        dry_run=dry_run,
+    )
+    return [(user, domain_name, expiry_date, ) for user, domain_name, expiry_date, _ in outgoing_emails]
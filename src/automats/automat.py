@@ -45,9 +45,13 @@ of Information Technologies, Mechanics and Optics, Programming Technologies Depa
 
 #------------------------------------------------------------------------------
 
+import time
 import logging
+import threading
 import traceback
 
+from django.conf import settings
+
 #------------------------------------------------------------------------------ 
 
 logger = logging.getLogger(__name__)
@@ -63,6 +67,8 @@ _Counter = 0  #: Increment by one for every new object, the idea is to keep uniq
 _Index = {}   #: Index dictionary, unique id (string) to index (int)
 _Objects = {} #: Objects dictionary to store all state machines objects
 _GlobalStateChangedCallback = None  #: Called when some state were changed
+_LiveCounter = 0  #: Number of state machines objects currently existing in memory
+_Tracer = None  #: Receives timings of states and actions when set, see ``SetTracer()``
 
 #------------------------------------------------------------------------------ 
 
@@ -81,7 +87,7 @@ def create_index(name):
     """
     global _Index
     automatid = name
-    if id in _Index:
+    if automatid in _Index:
         i = 1
         while _Index.get(automatid + '(' + str(i) + ')'):
             i += 1
@@ -118,6 +124,23 @@ def objects():
     global _Objects
     return _Objects
 
+
+def logging_enabled():
+    """
+    Returns True if log messages produced by state machines are actually going to be printed,
+    used to not build log strings at all when logging is turned off.
+    """
+    return _Debug and logger.isEnabledFor(logging.INFO)
+
+
+def live_count():
+    """
+    Returns number of state machines objects existing in memory at the moment,
+    including those which are not registered in ``objects()`` dictionary.
+    """
+    global _LiveCounter
+    return _LiveCounter
+
 #------------------------------------------------------------------------------ 
 
 def SetStateChangedCallback(cb):
@@ -130,6 +153,26 @@ def SetStateChangedCallback(cb):
     global _GlobalStateChangedCallback
     _GlobalStateChangedCallback = cb
 
+
+def SetTracer(tracer):
+    """
+    Set an object to collect timings of all state machines, see ``automats.tracing`` module.
+    Tracer must implement those methods::
+
+        tracer.instrument(automat_class)
+        tracer.state_left(automat_object, state, duration)
+    """
+    global _Tracer
+    _Tracer = tracer
+
+
+def GetTracer():
+    """
+    Returns currently used tracer object or None.
+    """
+    global _Tracer
+    return _Tracer
+
 #------------------------------------------------------------------------------ 
 
 class Automat(object):
@@ -142,8 +185,17 @@ class Automat(object):
     Finally put the new object into the memory with given index - 
     it is placed into ``objects()`` dictionary.
     To remove the instance call ``destroy()`` method.  
+    If ``registered=False`` is passed the instance will not be placed into the index
+    and ``objects()`` dictionary and creation will not be logged, such objects are intended to
+    be re-used many times via ``AutomatPool``.
     """
 
+    __slots__ = (
+        'id', 'index', 'name', 'inputs', 'outputs', 'debug_level', 'log_events', 'log_transitions', 'raise_errors',
+        '_initial_state', '_registered', '_prev_state', '_executing', '_executions', '_current_execution',
+        '_heap', '_state_callbacks', '_state_started', '__weakref__',
+    )
+
     state = 'NOT_EXIST'
     """
     This is a string representing current Machine state, must be set in the constructor.
@@ -151,6 +203,27 @@ class Automat(object):
     A blank state is a fundamental mistake! 
     """
 
+    transitions = None
+    """
+    Optional transition table, can be defined in subclass instead of ``A()`` method::
+
+        transitions = {
+            ('AT_STARTUP', 'run'): [
+                (None, 'CHECK', ['doInit', 'doReportStarted(event)', ]),
+            ],
+            ('CHECK', 'response'): [
+                (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs), 'DONE', ['doReportDone', ]),
+                (None, 'FAILED', ['doReportFailed(event)', ]),
+            ],
+        }
+
+    For every ``(state, event)`` pair the rules are checked in given order: first rule with empty
+    condition or with condition returning True is applied. Actions are names of the methods,
+    they are called with ``(*args, **kwargs)``, or with ``(event, *args, **kwargs)`` if name ends with ``(event)``.
+    If the new state is None the state is not changed.
+    The table is compiled only once per class, see ``compile_transitions()``.
+    """
+
     post = False
     """
     Sometimes need to set the new state AFTER finish all actions.
@@ -169,9 +242,17 @@ class Automat(object):
             log_events=False,
             log_transitions=False,
             raise_errors=False,
+            registered=True,
             **kwargs
         ):
-        self.id, self.index = create_index(name)
+        global _LiveCounter
+        if registered:
+            self.id, self.index = create_index(name)
+        else:
+            self.id, self.index = name, get_new_index()
+        _LiveCounter += 1
+        self._registered = registered
+        self._initial_state = state
         self.name = name
         self.state = state
         self.inputs = inputs
@@ -182,19 +263,29 @@ class Automat(object):
         self._current_execution = -1
         self._heap = {}
         self.debug_level = debug_level
-        self.log_events = log_events
-        self.log_transitions = log_transitions
         self.raise_errors = raise_errors
+        self.set_logging(log_events, log_transitions)
         self._state_callbacks = {}
+        self._state_started = 0
+        if _Tracer is not None:
+            if not type(self).__dict__.get('_instrumented'):
+                _Tracer.instrument(type(self))
+            self._state_started = time.time()
         self.init(**kwargs)
-        self.register()
-        self.log(self.debug_level,  'CREATED AUTOMAT %s with index %d' % (str(self), self.index))
+        if registered:
+            self.register()
+            if logging_enabled():
+                self.log(self.debug_level,  'CREATED AUTOMAT %s with index %d' % (str(self), self.index))
 
     def __del__(self):
         global _Index
         global _GlobalStateChangedCallback
+        global _LiveCounter
         if self is None:
             return
+        _LiveCounter -= 1
+        if not self._registered:
+            return
         o = self
         last_state = self.state
         automatid = self.id
@@ -208,7 +299,8 @@ class Automat(object):
             self.log(debug_level, 'automat.__del__ WARNING %s not found' % automatid)
             return
         del _Index[automatid]
-        self.log(debug_level, 'DESTROYED AUTOMAT %s with index %d' % (str(o), index, ))
+        if logging_enabled():
+            self.log(debug_level, 'DESTROYED AUTOMAT %s with index %d' % (str(o), index, ))
         del o
         if _GlobalStateChangedCallback is not None:
             _GlobalStateChangedCallback(index, automatid, name, last_state, 'NOT_EXIST')
@@ -248,6 +340,37 @@ class Automat(object):
         Define this method in subclass to execute some code when creating an object.
         """
 
+    def set_logging(self, log_events, log_transitions):
+        """
+        Value ``None`` means events or transitions are logged only when ``settings.DEBUG`` is enabled.
+        """
+        self.log_events = settings.DEBUG if log_events is None else log_events
+        self.log_transitions = settings.DEBUG if log_transitions is None else log_transitions
+
+    def reset(self, **kwargs):
+        """
+        Brings the state machine back to the initial state, so the same instance can be re-used.
+        Method ``init()`` will be called again with given ``kwargs``.
+        Override in subclass if some of the constructor arguments must be also applied.
+        """
+        for key in ('debug_level', 'raise_errors', ):
+            if key in kwargs:
+                setattr(self, key, kwargs.pop(key))
+        if 'log_events' in kwargs or 'log_transitions' in kwargs:
+            self.set_logging(kwargs.pop('log_events', self.log_events), kwargs.pop('log_transitions', self.log_transitions))
+        self.state = self._initial_state
+        if self.outputs is not None:
+            self.outputs = []
+        self._prev_state = None
+        self._executing = False
+        self._current_execution = -1
+        self._heap = {}
+        self._state_callbacks = {}
+        self._state_started = time.time() if _Tracer is not None else 0
+        self.init(**kwargs)
+        if self._registered:
+            self.register()
+
     def shutdown(self, **kwargs):
         """
         Define this method in subclass to execute some code when destroying an object.
@@ -259,8 +382,9 @@ class Automat(object):
         and delete that instance. Be sure to not have any existing references on 
         that instance so destructor will be called immediately.
         """
-        self.log(self.debug_level + 2, 'destroying %s, index=%d, heap=%d' % (
-            self, self.index, len(self._heap), ))
+        if logging_enabled():
+            self.log(self.debug_level + 2, 'destroying %s, index=%d, heap=%d' % (
+                self, self.index, len(self._heap), ))
         self.shutdown(**kwargs)
         self.unregister()
 
@@ -361,11 +485,57 @@ class Automat(object):
 
     def A(self, event, *args, **kwargs):
         """
-        Must define this method in subclass. 
+        Must define this method in subclass, or ``transitions`` table.
         This is the core method of the SWITCH-technology.
         I am using ``visio2python`` (created by me) to generate Python code from MS Visio drawing.
         """
-        raise NotImplementedError
+        if self.transitions is None:
+            raise NotImplementedError
+        return self.dispatch(event, *args, **kwargs)
+
+    @classmethod
+    def compile_transitions(cls):
+        """
+        Converts ``transitions`` table into a dictionary with resolved methods and stores it in the class.
+        """
+        compiled = {}
+        for key, rules in cls.transitions.items():
+            compiled_rules = []
+            for condition, new_state, actions in rules:
+                compiled_actions = []
+                for action in actions:
+                    with_event = action.endswith('(event)')
+                    method_name = action[:-len('(event)')] if with_event else action
+                    compiled_actions.append((getattr(cls, method_name), with_event, ))
+                compiled_rules.append((condition, new_state, tuple(compiled_actions), ))
+            compiled[key] = tuple(compiled_rules)
+        cls._compiled_transitions = compiled
+        return compiled
+
+    def dispatch(self, event, *args, **kwargs):
+        """
+        Applies ``transitions`` table to the current state and given event.
+        """
+        compiled = type(self).__dict__.get('_compiled_transitions')
+        if compiled is None:
+            compiled = self.compile_transitions()
+        rules = compiled.get((self.state, event))
+        if not rules:
+            return self.state if self.post else None
+        for condition, new_state, actions in rules:
+            if condition is not None and not condition(self, *args, **kwargs):
+                continue
+            if new_state is not None and not self.post:
+                self.state = new_state
+            for method, with_event in actions:
+                if with_event:
+                    method(self, event, *args, **kwargs)
+                else:
+                    method(self, *args, **kwargs)
+            if self.post:
+                return self.state if new_state is None else new_state
+            return None
+        return self.state if self.post else None
 
     def automat(self, event, *args, **kwargs):
         """
@@ -402,10 +572,7 @@ class Automat(object):
         return new_state
 
     def _execute(self, event, *args, **kwargs):
-        if _LogEvents:
-            self.log(self.debug_level + 4, '%s fired with event "%s"' % (
-                self, event, ))
-        elif self.log_events:
+        if (_LogEvents or self.log_events) and logging_enabled():
             self.log(self.debug_level + 4, '%s fired with event "%s"' % (
                 self, event, ))
         self._prev_state = self.state
@@ -434,7 +601,12 @@ class Automat(object):
     def _post_processing(self, new_state, event, *args, **kwargs):
         global _GlobalStateChangedCallback
         if self._prev_state != new_state:
-            if self.log_transitions:
+            if _Tracer is not None:
+                moment_now = time.time()
+                if self._state_started:
+                    _Tracer.state_left(self, self._prev_state, moment_now - self._state_started)
+                self._state_started = moment_now
+            if self.log_transitions and logging_enabled():
                 self.log(self.debug_level + 2, '%s after "%s" : (%s)->(%s)' % (self, event, self._prev_state, new_state))
             self.state_changed(self._prev_state, new_state, event, *args, **kwargs)
             if _GlobalStateChangedCallback is not None:
@@ -443,3 +615,58 @@ class Automat(object):
             self.state_not_changed(self.state, event, *args, **kwargs)
         self.execute_state_changed_callbacks(self._prev_state, new_state, event, *args, **kwargs)
         return True
+
+#------------------------------------------------------------------------------
+
+class AutomatPool(object):
+    """
+    Keeps a limited number of idle state machines of the same class to be re-used.
+    Instances are created with ``registered=False`` and brought back to the initial state
+    with ``reset()`` every time they are taken from the pool:
+
+        dr = pool.acquire(raise_errors=True)
+        dr.event('run', domain_name='abc.ai')
+        outputs = list(dr.outputs)
+        pool.release(dr)
+    """
+
+    def __init__(self, factory, size=10):
+        self.factory = factory
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, **kwargs):
+        with self.lock:
+            obj = self.idle.pop() if self.idle else None
+            if obj is None:
+                self.created += 1
+            else:
+                self.reused += 1
+        if obj is None:
+            return self.factory(registered=False, **kwargs)
+        obj.reset(**kwargs)
+        return obj
+
+    def release(self, obj):
+        """
+        Returns the instance back to the pool, instance which is still executing is not re-used.
+        """
+        if obj._executing:
+            return False
+        obj.unregister()
+        with self.lock:
+            if len(self.idle) >= self.size:
+                return False
+            self.idle.append(obj)
+        return True
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'idle': len(self.idle),
+                'created': self.created,
+                'reused': self.reused,
+            }
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+#benchmark.py
+
+"""
+.. module:: benchmark
+
+Measures how many events per second state machines can process.
+Two machines with the same graph as ``domains_checker()`` are compared: one with generated ``A()`` method
+and another one with ``transitions`` table, all actions are doing nothing and no EPP requests are sent.
+
+    cd src/
+    python -m automats.benchmark --loops 20000 --domains 5
+"""
+
+import sys
+import time
+import logging
+import argparse
+
+from automats import automat
+
+#------------------------------------------------------------------------------
+
+class _Actions(object):
+
+    def isCode(self, code, response, *args, **kwargs):
+        return response['code'] == code
+
+    def isAnyExist(self, response, *args, **kwargs):
+        return response['exist']
+
+    def isMoreAvaialble(self, *args, **kwargs):
+        return self.counter < self.domains
+
+    def doInit(self, *args, **kwargs):
+        self.counter = 0
+
+    def doPrepareAvailableDomains(self, event, *args, **kwargs):
+        pass
+
+    def doIterateNextDomain(self, *args, **kwargs):
+        self.counter += 1
+
+    def doEppDomainCheckMany(self, *args, **kwargs):
+        pass
+
+    def doEppDomainInfo(self, *args, **kwargs):
+        pass
+
+    def doReportExisting(self, event, *args, **kwargs):
+        pass
+
+    def doReportOne(self, event, *args, **kwargs):
+        pass
+
+    def doReportDone(self, event, *args, **kwargs):
+        pass
+
+    def doReportFailed(self, event, *args, **kwargs):
+        pass
+
+    def doDestroyMe(self, *args, **kwargs):
+        pass
+
+
+class GeneratedMachine(_Actions, automat.Automat):
+
+    def __init__(self, domains, **kwargs):
+        self.domains = domains
+        self.counter = 0
+        super(GeneratedMachine, self).__init__(name='generated_machine', state='AT_STARTUP', registered=False, **kwargs)
+
+    def A(self, event, *args, **kwargs):
+        #---AT_STARTUP---
+        if self.state == 'AT_STARTUP':
+            if event == 'run':
+                self.state = 'CHECK_MANY'
+                self.doInit(*args, **kwargs)
+                self.doEppDomainCheckMany(*args, **kwargs)
+        #---CHECK_MANY---
+        elif self.state == 'CHECK_MANY':
+            if event == 'response' and self.isCode(1000, *args, **kwargs) and not self.isAnyExist(*args, **kwargs):
+                self.state = 'DONE'
+                self.doReportExisting(event, *args, **kwargs)
+                self.doReportDone(event, *args, **kwargs)
+                self.doDestroyMe(*args, **kwargs)
+            elif event == 'error' or ( event == 'response' and not self.isCode(1000, *args, **kwargs) ):
+                self.state = 'FAILED'
+                self.doReportFailed(event, *args, **kwargs)
+                self.doDestroyMe(*args, **kwargs)
+            elif event == 'skip-check' or ( event == 'response' and self.isCode(1000, *args, **kwargs) and self.isAnyExist(*args, **kwargs) ):
+                self.state = 'INFO_ONE'
+                self.doReportExisting(event, *args, **kwargs)
+                self.doPrepareAvailableDomains(event, *args, **kwargs)
+                self.doIterateNextDomain(*args, **kwargs)
+                self.doEppDomainInfo(*args, **kwargs)
+        #---INFO_ONE---
+        elif self.state == 'INFO_ONE':
+            if event == 'response' and self.isCode(1000, *args, **kwargs) and self.isMoreAvaialble(*args, **kwargs):
+                self.doReportOne(event, *args, **kwargs)
+                self.doIterateNextDomain(*args, **kwargs)
+                self.doEppDomainInfo(*args, **kwargs)
+            elif event == 'error' or ( event == 'response' and not self.isCode(1000, *args, **kwargs) ):
+                self.state = 'FAILED'
+                self.doReportFailed(event, *args, **kwargs)
+                self.doDestroyMe(*args, **kwargs)
+            elif event == 'skip-info' or ( event == 'response' and self.isCode(1000, *args, **kwargs) and not self.isMoreAvaialble(*args, **kwargs) ):
+                self.state = 'DONE'
+                self.doReportOne(event, *args, **kwargs)
+                self.doReportDone(event, *args, **kwargs)
+                self.doDestroyMe(*args, **kwargs)
+        return None
+
+
+class TableMachine(_Actions, automat.Automat):
+
+    transitions = {
+        ('AT_STARTUP', 'run'): [
+            (None, 'CHECK_MANY', ['doInit', 'doEppDomainCheckMany', ]),
+        ],
+        ('CHECK_MANY', 'response'): [
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and not self.isAnyExist(*args, **kwargs),
+             'DONE', ['doReportExisting(event)', 'doReportDone(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: not self.isCode(1000, *args, **kwargs),
+             'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and self.isAnyExist(*args, **kwargs),
+             'INFO_ONE', ['doReportExisting(event)', 'doPrepareAvailableDomains(event)', 'doIterateNextDomain', 'doEppDomainInfo', ]),
+        ],
+        ('CHECK_MANY', 'error'): [
+            (None, 'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+        ],
+        ('INFO_ONE', 'response'): [
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and self.isMoreAvaialble(*args, **kwargs),
+             None, ['doReportOne(event)', 'doIterateNextDomain', 'doEppDomainInfo', ]),
+            (lambda self, *args, **kwargs: not self.isCode(1000, *args, **kwargs),
+             'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and not self.isMoreAvaialble(*args, **kwargs),
+             'DONE', ['doReportOne(event)', 'doReportDone(event)', 'doDestroyMe', ]),
+        ],
+        ('INFO_ONE', 'error'): [
+            (None, 'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+        ],
+    }
+
+    def __init__(self, domains, **kwargs):
+        self.domains = domains
+        self.counter = 0
+        super(TableMachine, self).__init__(name='table_machine', state='AT_STARTUP', registered=False, **kwargs)
+
+#------------------------------------------------------------------------------
+
+def run(machine_class, loops, domains):
+    """
+    Feeds the machine with full sequence of events for `domains` domain names and returns events per second.
+    """
+    exist_response = {'code': 1000, 'exist': True, }
+    machine = machine_class(domains=domains)
+    events = 0
+    started = time.perf_counter()
+    for _ in range(loops):
+        machine.reset()
+        machine.event('run')
+        machine.event('response', exist_response)
+        events += 2
+        while machine.state == 'INFO_ONE':
+            machine.event('response', exist_response)
+            events += 1
+    elapsed = time.perf_counter() - started
+    assert machine.state == 'DONE'
+    return events / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures state machines events processing speed')
+    parser.add_argument('--loops', type=int, default=20000)
+    parser.add_argument('--domains', type=int, default=5)
+    parser.add_argument('--log', action='store_true', help='keep state machines logging turned on')
+    options = parser.parse_args()
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO if options.log else logging.WARNING)
+    for machine_class in (GeneratedMachine, TableMachine, ):
+        rate = run(machine_class, options.loops, options.domains)
+        print('%s: %d events/sec' % (machine_class.__name__, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,7 @@ from epp import rpc_error
 
 from zen import zcontacts
 from zen import zdomains
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -219,8 +220,10 @@ class ContactSynchronizer(automat.Automat):
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppContactUpdate: %s' % exc)
+            zcache.invalidate_contact(self.contact_info['id'])
             self.event('error', exc)
         else:
+            zcache.invalidate_contact(self.contact_info['id'])
             self.event('response', response)
 
     def doWriteDB(self, *args, **kwargs):
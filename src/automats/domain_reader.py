@@ -26,6 +26,8 @@ from email.utils import formatdate
 
 #------------------------------------------------------------------------------
 
+from lib import strng
+
 from automats import automat
 
 from epp import rpc_client
@@ -33,6 +35,7 @@ from epp import rpc_error
 
 from zen import zdomains
 from zen import zerrors
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -164,7 +167,7 @@ class DomainReader(automat.Automat):
         known_domain = zdomains.domain_find(domain_name=self.target_domain.name)
         if not known_domain:
             return
-        if known_domain.registrant.epp_id == self.registrant_epp_id:
+        if known_domain.registrant.epp_id == strng.normalize_epp_id(self.registrant_epp_id):
             return
         logger.error('domain known to belong to another registrant: %s', self.current_domain_name)
         self.event('error', zerrors.RegistrantAuthFailed(response=args[0]))
@@ -215,7 +218,7 @@ class DomainReader(automat.Automat):
         """
         for contact in self.domain_contacts:
             try:
-                response = rpc_client.cmd_contact_info(
+                response = zcache.contact_info(
                     contact_id=contact['id'],
                     raise_for_result=False,
                 )
@@ -251,7 +254,7 @@ class DomainReader(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_contact_info(
+            response = zcache.contact_info(
                 contact_id=self.registrant_epp_id,
                 raise_for_result=False,
             )
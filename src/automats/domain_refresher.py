@@ -43,6 +43,7 @@ from zen import zdomains
 from zen import zusers
 from zen import zcontacts
 from zen import zerrors
+from zen import zcache
 
 from billing import orders
 
@@ -57,6 +58,15 @@ class DomainRefresher(automat.Automat):
     This class implements all the functionality of ``domain_refresher()`` state machine.
     """
 
+    __slots__ = (
+        'state', 'domain_name', 'target_domain', 'skip_check', 'change_owner_allowed', 'create_new_owner_allowed',
+        'refresh_contacts', 'soft_delete', 'domain_transferred_away', 'request_time_limit', 'expected_owner',
+        'rewrite_contacts', 'contacts_changed', 'domain_info_response', 'received_registrant_epp_id', 'received_contacts',
+        'new_domain_contacts', 'received_nameservers', 'known_registrant', 'new_registrant_epp_id',
+        'current_registrant_info', 'latest_registrant_response', 'current_registrant_address_info',
+        'contacts_to_add', 'contacts_to_remove', 'prefetched_domain_info',
+    )
+
     def __init__(self, debug_level=4, log_events=False, log_transitions=False, raise_errors=False, **kwargs):
         """
         Builds `domain_refresher()` state machine.
@@ -83,6 +93,13 @@ class DomainRefresher(automat.Automat):
             return '%s(%s)' % (self.id, self.state)
         return '%s[%s](%s)' % (self.id, self.domain_name, self.state)
 
+    def reset(self, **kwargs):
+        """
+        Prepares the same instance to be executed again for another domain.
+        """
+        self.domain_name = None
+        super(DomainRefresher, self).reset(**kwargs)
+
     def init(self):
         """
         Method to initialize additional variables and flags
@@ -94,6 +111,7 @@ class DomainRefresher(automat.Automat):
         self.rewrite_contacts = False  # when True, Zenaida will write DB contacts to the back-end
         self.request_time_limit = 0
         self.domain_info_response = None
+        self.prefetched_domain_info = None
         self.received_registrant_epp_id = None
         self.received_contacts = []
         self.new_domain_contacts = {}
@@ -264,7 +282,7 @@ class DomainRefresher(automat.Automat):
         existing_registrant = existing_account.registrants.first()
         if not existing_registrant:
             return False
-        if existing_registrant.epp_id != self.received_registrant_epp_id:
+        if existing_registrant.epp_id != strng.normalize_epp_id(self.received_registrant_epp_id):
             return False
         return True
 
@@ -281,6 +299,7 @@ class DomainRefresher(automat.Automat):
         self.soft_delete = kwargs.get('soft_delete', True)
         self.domain_transferred_away = kwargs.get('domain_transferred_away', False)
         self.request_time_limit = kwargs.get('request_time_limit', 0)
+        self.prefetched_domain_info = kwargs.get('domain_info_response', None)
         self.expected_owner = kwargs.get('expected_owner', None)
         self.rewrite_contacts = kwargs.get('rewrite_contacts', None)
         pending_order_items = orders.find_pending_domain_transfer_order_items(domain_name=self.domain_name)
@@ -322,16 +341,21 @@ class DomainRefresher(automat.Automat):
         """
         Action method.
         """
-        try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.domain_name,
-                request_time_limit=self.request_time_limit,
-                raise_for_result=False,
-            )
-        except rpc_error.EPPError as exc:
-            self.log(self.debug_level, 'Exception in doEppDomainInfo: %s' % exc)
-            self.event('error', exc)
-            return
+        if self.prefetched_domain_info is not None:
+            # domain info was already received before the DB transaction was opened
+            response = self.prefetched_domain_info
+            self.prefetched_domain_info = None
+        else:
+            try:
+                response = rpc_client.cmd_domain_info(
+                    domain=self.domain_name,
+                    request_time_limit=self.request_time_limit,
+                    raise_for_result=False,
+                )
+            except rpc_error.EPPError as exc:
+                self.log(self.debug_level, 'Exception in doEppDomainInfo: %s' % exc)
+                self.event('error', exc)
+                return
 
         # catch "2201 Authorization error" result, that means domain exists, but have another owner
         try:
@@ -474,11 +498,7 @@ class DomainRefresher(automat.Automat):
         # request info about contacts
         for received_contact in self.received_contacts:
             try:
-                response = rpc_client.cmd_contact_info(
-                    contact_id=received_contact['id'],
-                    request_time_limit=self.request_time_limit,
-                    raise_for_result=True,
-                )
+                response = self._do_epp_contact_info(received_contact['id'])
             except rpc_error.EPPError as exc:
                 self.log(self.debug_level, 'Exception in doEPPContactsInfoMany: %s' % exc)
                 self.event('error', exc)
@@ -489,11 +509,7 @@ class DomainRefresher(automat.Automat):
             }
         # request registrant info
         try:
-            response = rpc_client.cmd_contact_info(
-                contact_id=self.received_registrant_epp_id,
-                request_time_limit=self.request_time_limit,
-                raise_for_result=True,
-            )
+            response = self._do_epp_contact_info(self.received_registrant_epp_id)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEPPContactsInfoMany: %s' % exc)
             self.event('error', exc)
@@ -510,11 +526,7 @@ class DomainRefresher(automat.Automat):
         """
         # request current registrant info
         try:
-            response = rpc_client.cmd_contact_info(
-                contact_id=self.received_registrant_epp_id,
-                request_time_limit=self.request_time_limit,
-                raise_for_result=True,
-            )
+            response = self._do_epp_contact_info(self.received_registrant_epp_id)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppCurrentRegistrantInfo: %s' % exc)
             self.event('error', exc)
@@ -890,7 +902,7 @@ class DomainRefresher(automat.Automat):
                 zdomains.domain_join_contact(self.target_domain, role, new_contact)
                 self.target_domain.refresh_from_db()
                 continue
-            if received_contact_id != known_contact_id:
+            if strng.normalize_epp_id(received_contact_id) != known_contact_id:
                 logger.info('domain %r going to switch contact %s : from %r to %r',
                             self.target_domain, role, known_contact, new_contact)
                 zdomains.domain_join_contact(self.target_domain, role, new_contact)
@@ -1032,6 +1044,7 @@ class DomainRefresher(automat.Automat):
         self.target_domain = None
         self.contacts_changed = False
         self.domain_info_response = None
+        self.prefetched_domain_info = None
         self.received_contacts = []
         self.new_domain_contacts = {}
         self.received_nameservers = []
@@ -1042,3 +1055,14 @@ class DomainRefresher(automat.Automat):
         self.contacts_to_remove = None
         self.latest_registrant_response = None
         self.destroy()
+
+    def _do_epp_contact_info(self, contact_id):
+        """
+        Requests contact info from back-end, response can be re-used from `zcache.contacts_scope()`
+        if it was opened by the caller.
+        """
+        return zcache.contact_info(
+            contact_id=contact_id,
+            request_time_limit=self.request_time_limit,
+            raise_for_result=True,
+        )
@@ -48,6 +48,11 @@ class DomainSynchronizer(automat.Automat):
     This class implements all the functionality of ``domain_synchronizer()`` state machine.
     """
 
+    __slots__ = (
+        'state', 'target_domain', 'accept_code_2304', 'renew_years', 'sync_contacts', 'sync_nameservers', 'verify_owner',
+        'save_to_db', 'latest_domain_info', 'known_domain_info_statuses', 'new_domain_statuses', 'DomainToBeCreated',
+    )
+
     def __init__(self, debug_level=4, log_events=False, log_transitions=False, raise_errors=False, **kwargs):
         """
         Builds `domain_synchronizer()` state machine.
@@ -75,6 +80,14 @@ class DomainSynchronizer(automat.Automat):
             return '%s(%s)' % (self.id, self.state)
         return '%s[%s](%s)' % (self.id, self.target_domain.name, self.state)
 
+    def reset(self, **kwargs):
+        """
+        Prepares the same instance to be executed again for another domain.
+        """
+        self.target_domain = None
+        self.accept_code_2304 = kwargs.pop('accept_code_2304', True)
+        super(DomainSynchronizer, self).reset(**kwargs)
+
     def init(self):
         """
         Method to initialize additional variables and flags
@@ -23,6 +23,8 @@ from django.conf import settings
 
 #------------------------------------------------------------------------------
 
+from lib import strng
+
 from automats import automat
 
 from epp import rpc_client
@@ -42,6 +44,11 @@ class DomainsChecker(automat.Automat):
     This class implements all the functionality of ``domains_checker()`` state machine.
     """
 
+    __slots__ = (
+        'state', 'target_domain_names', 'skip_check', 'skip_info', 'verify_registrant', 'stop_on_error',
+        'auth_info', 'check_results', 'current_domain_name', 'existing_domains', 'available_domain_names',
+    )
+
     def __init__(self, verify_registrant=True, skip_check=False, skip_info=False, stop_on_error=False,
                  debug_level=4, log_events=False, log_transitions=False, raise_errors=False, **kwargs):
         """
@@ -75,6 +82,17 @@ class DomainsChecker(automat.Automat):
             return '%s[%d](%s)' % (self.id, len(self.target_domain_names), self.state)
         return '%s[%s](%s)' % (self.id, self.target_domain_names[0], self.state)
 
+    def reset(self, verify_registrant=True, skip_check=False, skip_info=False, stop_on_error=False, **kwargs):
+        """
+        Prepares the same instance to be executed again for another list of domains.
+        """
+        self.target_domain_names = None
+        self.skip_check = skip_check
+        self.skip_info = skip_info
+        self.verify_registrant = verify_registrant
+        self.stop_on_error = stop_on_error
+        super(DomainsChecker, self).reset(**kwargs)
+
     def init(self):
         """
         Method to initialize additional variables and flags
@@ -92,55 +110,46 @@ class DomainsChecker(automat.Automat):
         but automat state was not changed.
         """
 
-    def A(self, event, *args, **kwargs):
-        """
-        The state machine code, generated using `visio2python <http://bitdust.io/visio2python/>`_ tool.
-        """
+    transitions = {
         #---AT_STARTUP---
-        if self.state == 'AT_STARTUP':
-            if event == 'run':
-                self.state = 'CHECK_MANY'
-                self.doInit(*args, **kwargs)
-                self.doEppDomainCheckMany(*args, **kwargs)
+        ('AT_STARTUP', 'run'): [
+            (None, 'CHECK_MANY', ['doInit', 'doEppDomainCheckMany', ]),
+        ],
         #---CHECK_MANY---
-        elif self.state == 'CHECK_MANY':
-            if event == 'response' and self.isCode(1000, *args, **kwargs) and not self.isAnyExist(*args, **kwargs):
-                self.state = 'DONE'
-                self.doReportExisting(event, *args, **kwargs)
-                self.doReportDone(event, *args, **kwargs)
-                self.doDestroyMe(*args, **kwargs)
-            elif event == 'error' or ( event == 'response' and not self.isCode(1000, *args, **kwargs) ):
-                self.state = 'FAILED'
-                self.doReportFailed(event, *args, **kwargs)
-                self.doDestroyMe(*args, **kwargs)
-            elif event == 'skip-check' or ( event == 'response' and self.isCode(1000, *args, **kwargs) and self.isAnyExist(*args, **kwargs) ):
-                self.state = 'INFO_ONE'
-                self.doReportExisting(event, *args, **kwargs)
-                self.doPrepareAvailableDomains(event, *args, **kwargs)
-                self.doIterateNextDomain(*args, **kwargs)
-                self.doEppDomainInfo(*args, **kwargs)
+        ('CHECK_MANY', 'response'): [
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and not self.isAnyExist(*args, **kwargs),
+             'DONE', ['doReportExisting(event)', 'doReportDone(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: not self.isCode(1000, *args, **kwargs),
+             'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and self.isAnyExist(*args, **kwargs),
+             'INFO_ONE', ['doReportExisting(event)', 'doPrepareAvailableDomains(event)', 'doIterateNextDomain', 'doEppDomainInfo', ]),
+        ],
+        ('CHECK_MANY', 'error'): [
+            (None, 'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+        ],
+        ('CHECK_MANY', 'skip-check'): [
+            (None, 'INFO_ONE', ['doReportExisting(event)', 'doPrepareAvailableDomains(event)', 'doIterateNextDomain', 'doEppDomainInfo', ]),
+        ],
         #---INFO_ONE---
-        elif self.state == 'INFO_ONE':
-            if event == 'response' and self.isCode(1000, *args, **kwargs) and self.isMoreAvaialble(*args, **kwargs):
-                self.doReportOne(event, *args, **kwargs)
-                self.doIterateNextDomain(*args, **kwargs)
-                self.doEppDomainInfo(*args, **kwargs)
-            elif event == 'error' or ( event == 'response' and not self.isCode(1000, *args, **kwargs) ):
-                self.state = 'FAILED'
-                self.doReportFailed(event, *args, **kwargs)
-                self.doDestroyMe(*args, **kwargs)
-            elif event == 'skip-info' or ( event == 'response' and self.isCode(1000, *args, **kwargs) and not self.isMoreAvaialble(*args, **kwargs) ):
-                self.state = 'DONE'
-                self.doReportOne(event, *args, **kwargs)
-                self.doReportDone(event, *args, **kwargs)
-                self.doDestroyMe(*args, **kwargs)
-        #---DONE---
-        elif self.state == 'DONE':
-            pass
-        #---FAILED---
-        elif self.state == 'FAILED':
-            pass
-        return None
+        ('INFO_ONE', 'response'): [
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and self.isMoreAvaialble(*args, **kwargs),
+             None, ['doReportOne(event)', 'doIterateNextDomain', 'doEppDomainInfo', ]),
+            (lambda self, *args, **kwargs: not self.isCode(1000, *args, **kwargs),
+             'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+            (lambda self, *args, **kwargs: self.isCode(1000, *args, **kwargs) and not self.isMoreAvaialble(*args, **kwargs),
+             'DONE', ['doReportOne(event)', 'doReportDone(event)', 'doDestroyMe', ]),
+        ],
+        ('INFO_ONE', 'error'): [
+            (None, 'FAILED', ['doReportFailed(event)', 'doDestroyMe', ]),
+        ],
+        ('INFO_ONE', 'skip-info'): [
+            (None, 'DONE', ['doReportOne(event)', 'doReportDone(event)', 'doDestroyMe', ]),
+        ],
+    }
+    """
+    The state machine transitions table, same graph as generated by `visio2python <http://bitdust.io/visio2python/>`_ tool.
+    States DONE and FAILED are final and do not react on any events.
+    """
 
     def isCode(self, *args, **kwargs):
         """
@@ -252,7 +261,7 @@ class DomainsChecker(automat.Automat):
                 known_domain = zdomains.domain_find(domain_name=self.current_domain_name)
                 known_registrant_epp_id = None if not known_domain else known_domain.registrant.epp_id
                 real_registrant_epp_id = response['epp']['response']['resData']['infData'].get('registrant', None)
-                if real_registrant_epp_id and known_registrant_epp_id and known_registrant_epp_id != real_registrant_epp_id:
+                if real_registrant_epp_id and known_registrant_epp_id and known_registrant_epp_id != strng.normalize_epp_id(real_registrant_epp_id):
                     logger.warn('domain %s suppose to belong to another registrant: %r, but received another id: %r', 
                                  self.current_domain_name, known_registrant_epp_id, real_registrant_epp_id)
                     self.event('error', zerrors.RegistrantAuthFailed(response=response))
@@ -0,0 +1,269 @@
+#!/usr/bin/python
+#tracing.py
+
+"""
+.. module:: tracing
+
+Collects timings of all state machines running in the current process:
+how long every machine stayed in each state and how long each action method took.
+Actions are often firing next events directly, so the time of nested actions is subtracted
+and only the "own" time of the action is recorded, for example `doEppDomainInfo()` will not include
+the time of all DB actions executed after the response was received.
+
+Numbers are aggregated into histograms per state machine class and periodically written
+into `ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH` folder, one JSON file per process.
+Use `python manage.py automats_trace` command or "State machines timings" page on the board to see them.
+"""
+
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import functools
+import threading
+
+from django.conf import settings
+
+from automats import automat
+
+#------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+#------------------------------------------------------------------------------
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, )
+
+_Stack = threading.local()
+
+#------------------------------------------------------------------------------
+
+class Histogram(object):
+    """
+    Counts values in the fixed `BUCKETS`, the last bucket is for everything bigger than 60 seconds.
+    """
+
+    def __init__(self):
+        self.buckets = [0, ] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, info):
+        for pos, count in enumerate(info['buckets']):
+            self.buckets[pos] += count
+        self.count += info['count']
+        self.total += info['total']
+        self.max = max(self.max, info['max'])
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        limit = self.count * p / 100.0
+        passed = 0
+        for pos, count in enumerate(self.buckets):
+            passed += count
+            if passed >= limit:
+                return BUCKETS[pos] if pos < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+            'buckets': list(self.buckets),
+        }
+
+
+class TransitionsTracer(object):
+    """
+    Receives timings from `automat.Automat` base class, see `automat.SetTracer()`.
+    """
+
+    def __init__(self, folder_path=None, flush_interval=None):
+        self.folder_path = folder_path or settings.ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH
+        self.flush_interval = flush_interval if flush_interval is not None else settings.ZENAIDA_AUTOMATS_TRACING_FLUSH_INTERVAL_SECONDS
+        self.states = {}
+        self.actions = {}
+        self.lock = threading.Lock()
+        self.latest_flush = time.time()
+
+    def instrument(self, automat_class):
+        """
+        Wraps all action methods of the class (names are starting with "do") to measure their duration.
+        """
+        for name in dir(automat_class):
+            if not name.startswith('do') or not name[2:3].isupper():
+                continue
+            method = getattr(automat_class, name)
+            if not callable(method) or getattr(method, '_traced', False):
+                continue
+            setattr(automat_class, name, self._wrap(name, method))
+        # compiled transitions table keeps references to not wrapped methods
+        if '_compiled_transitions' in automat_class.__dict__:
+            delattr(automat_class, '_compiled_transitions')
+        automat_class._instrumented = True
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def _traced_action(obj, *args, **kwargs):
+            tracer = automat.GetTracer()
+            if tracer is None:
+                return method(obj, *args, **kwargs)
+            stack = getattr(_Stack, 'nested', None)
+            if stack is None:
+                stack = _Stack.nested = []
+            stack.append(0.0)
+            started = time.time()
+            try:
+                return method(obj, *args, **kwargs)
+            finally:
+                duration = time.time() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += duration
+                tracer.action_finished(obj, name, duration - nested)
+        _traced_action._traced = True
+        return _traced_action
+
+    def state_left(self, automat_object, state, duration):
+        self._add(self.states, automat_object.__class__.__name__, state, duration)
+
+    def action_finished(self, automat_object, action_name, duration):
+        self._add(self.actions, automat_object.__class__.__name__, action_name, duration)
+
+    def _add(self, target, class_name, key, duration):
+        with self.lock:
+            histograms = target.setdefault(class_name, {})
+            if key not in histograms:
+                histograms[key] = Histogram()
+            histograms[key].add(duration)
+        if self.folder_path and time.time() - self.latest_flush > self.flush_interval:
+            self.flush()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'states': {c: {k: h.to_dict() for k, h in v.items()} for c, v in self.states.items()},
+                'actions': {c: {k: h.to_dict() for k, h in v.items()} for c, v in self.actions.items()},
+            }
+
+    def flush(self):
+        """
+        Writes collected histograms into the file, file name is the current process ID.
+        """
+        self.latest_flush = time.time()
+        if not self.folder_path:
+            return False
+        snapshot = self.to_dict()
+        try:
+            os.makedirs(self.folder_path, exist_ok=True)
+            file_path = os.path.join(self.folder_path, '%d.json' % os.getpid())
+            with open(file_path + '.tmp', 'wt') as f:
+                json.dump(snapshot, f)
+            os.replace(file_path + '.tmp', file_path)
+        except Exception as exc:
+            logger.exception('failed writing state machines timings: %r' % exc)
+            return False
+        return True
+
+#------------------------------------------------------------------------------
+
+def start(folder_path=None, flush_interval=None):
+    """
+    Starts collecting timings of all state machines in the current process.
+    """
+    if automat.GetTracer() is not None:
+        return automat.GetTracer()
+    tracer = TransitionsTracer(folder_path=folder_path, flush_interval=flush_interval)
+    automat.SetTracer(tracer)
+    atexit.register(tracer.flush)
+    logger.info('state machines tracing started, timings will be stored in %r', tracer.folder_path)
+    return tracer
+
+
+def stop():
+    """
+    Stops collecting timings and writes the latest results into the file.
+    """
+    tracer = automat.GetTracer()
+    if tracer is None:
+        return False
+    automat.SetTracer(None)
+    tracer.flush()
+    return True
+
+
+def read_all(folder_path=None):
+    """
+    Reads and merges timings stored by all processes, returns two dictionaries of `Histogram` objects:
+
+        {'states': {class_name: {state: Histogram}}, 'actions': {class_name: {action: Histogram}}}
+    """
+    folder_path = folder_path or settings.ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH
+    result = {'states': {}, 'actions': {}, }
+    if not os.path.isdir(folder_path):
+        return result
+    for file_name in sorted(os.listdir(folder_path)):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(folder_path, file_name), 'rt') as f:
+                snapshot = json.load(f)
+        except Exception as exc:
+            logger.warning('failed reading state machines timings from %r: %r', file_name, exc)
+            continue
+        for section in ('states', 'actions', ):
+            for class_name, items in snapshot.get(section, {}).items():
+                for key, info in items.items():
+                    histogram = result[section].setdefault(class_name, {}).setdefault(key, Histogram())
+                    histogram.merge(info)
+    return result
+
+
+def clear_all(folder_path=None):
+    """
+    Removes all stored timings.
+    """
+    folder_path = folder_path or settings.ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH
+    if not os.path.isdir(folder_path):
+        return 0
+    count = 0
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith('.json'):
+            os.remove(os.path.join(folder_path, file_name))
+            count += 1
+    return count
+
+
+def report_rows(data, section='actions', class_name=None):
+    """
+    Prepares list of rows sorted by the total time spent, used to print the report or render HTML page.
+    """
+    rows = []
+    for cls_name, items in data[section].items():
+        if class_name and cls_name != class_name:
+            continue
+        for key, histogram in items.items():
+            rows.append({
+                'automat': cls_name,
+                'name': key,
+                'count': histogram.count,
+                'total': histogram.total,
+                'avg': (histogram.total / histogram.count) if histogram.count else 0.0,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'max': histogram.max,
+            })
+    rows.sort(key=lambda r: r['total'], reverse=True)
+    return rows
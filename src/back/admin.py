@@ -17,6 +17,8 @@ from back.models.profile import Profile
 from back.models.domain import Domain, BlockedTransfer
 from back.models.contact import Contact, Registrant
 from back.models.back_end_renew import BackEndRenew
+from back.models.background_task import BackgroundTask
+from back.models.domain_refresh import DomainRefresh
 
 from billing import orders as billing_orders
 
@@ -509,6 +511,20 @@ class BlockedTransferAdmin(NestedModelAdmin):
     pass
 
 
+class BackgroundTaskAdmin(NestedModelAdmin):
+
+    list_display = ('name', 'last_status', 'last_started_at', 'last_finished_at', 'last_duration', 'runs_count', 'failures_count', 'locked_until', 'locked_by', )
+    list_filter = ('last_status', )
+    search_fields = ('name', )
+    readonly_fields = ('last_started_at', 'last_finished_at', 'last_duration', 'last_error', 'runs_count', 'failures_count', )
+
+
+class DomainRefreshAdmin(NestedModelAdmin):
+
+    list_display = ('domain_name', 'requested_at', 'started_at', )
+    search_fields = ('domain_name', )
+
+
 admin.site.register(Zone, ZoneAdmin)
 admin.site.register(Registrar, RegistrarAdmin)
 admin.site.register(Profile, ProfileAdmin)
@@ -517,3 +533,5 @@ admin.site.register(Contact, ContactAdmin)
 admin.site.register(Registrant, RegistrantAdmin)
 admin.site.register(BackEndRenew, BackEndRenewAdmin)
 admin.site.register(BlockedTransfer, BlockedTransferAdmin)
+admin.site.register(BackgroundTask, BackgroundTaskAdmin)
+admin.site.register(DomainRefresh, DomainRefreshAdmin)
@@ -3,11 +3,21 @@ import logging
 import re
 import datetime
 import csv
-
+import threading
+import collections
+import multiprocessing
+import concurrent.futures
+
+from django import db
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.utils.timezone import make_aware
 
 from epp import rpc_error
 
+from lib import strng
+
 from zen import zcontacts
 from zen import zusers
 from zen import zdomains
@@ -16,86 +26,125 @@ from zen import zmaster
 logger = logging.getLogger(__name__)
 
 
-def split_csv_row(csv_row, headers):
-    csv_record = {}
-    for field_index in range(len(csv_row)):
-        field = csv_row[field_index]
-        header = headers[field_index]
-        item_id = header.lower().replace(' ', '_') + '_' + str(field_index)
-        if item_id not in csv_record:
-            csv_record[item_id] = field.strip()
-        else:
-            logging.warn('field already exist: %r', item_id)
-    return csv_record
+_PhoneNumberCleanRe = re.compile(r'[^\d^\+^\.]')
+_DateRe = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+
+# domain columns of the csv export: (attribute, header, position)
+CSV_DOMAIN_COLUMNS = (
+    ('client_id', 'client_id', 0, ),
+    ('roid', 'roid', 0, ),
+    ('auth_info_password', 'auth_info_password', 3, ),
+    ('name', 'name', 4, ),                                      # 2.
+    ('create_date', 'create_date', 5, ),                        # -
+    ('expiry_date', 'expiry_date', 6, ),                        # 1b.
+    ('eppstatus', 'eppstatus', 7, ),
+    ('registrant_contact_id', 'registrant_contact_id', 21, ),
+    ('billing_contact_id', 'billing_contact_id', 38, ),
+    ('admin_contact_id', 'admin_contact_id', 55, ),
+    ('tech_contact_id', 'tech_contact_id', 72, ),
+)
+
+CSV_NAMESERVER_COLUMNS = (
+    ('nameserver_1', 9, ),                                      # 7a.
+    ('nameserver_2', 10, ),                                     # 8a.
+    ('nameserver_3', 11, ),                                     # 9a.
+    ('nameserver_4', 12, ),                                     # 10a.
+)
+
+# contact columns: (contact role, header prefix, positions of CSV_CONTACT_FIELDS in the same order)
+CSV_CONTACT_FIELDS = (
+    ('person_name', 'name', ),
+    ('organization_name', 'organisation', ),
+    ('address_street', 'address_1', ),
+    ('address_city', 'city', ),
+    ('address_province', 'state_province', ),
+    ('address_postal_code', 'postalcode', ),
+    ('address_country', 'countrycode', ),
+    ('contact_voice', 'phone', ),
+    ('contact_fax', 'fax', ),
+    ('contact_email', 'email', ),
+)
+
+CSV_CONTACT_COLUMNS = (
+    ('registrant', 'registrant', (None, 26, 31, 34, 35, 36, 37, 27, 29, 25, ), ),    # 3a. - 3f.
+    ('admin', 'admin', (58, 60, 65, 68, 69, 70, 71, 61, 63, 59, ), ),                # 4d. - 4l.
+    ('tech', 'technical', (75, 77, 82, 85, 86, 87, 88, 78, 80, 76, ), ),             # 5d. - 5l.
+    ('billing', 'billing', (41, 43, 48, 51, 52, 53, 54, 44, 46, 42, ), ),            # 6d. - 6l.
+)
+
+
+class CSVDomainRecord(object):
+    """
+    Values of a single csv row, created by the function returned from `make_row_parser()`.
+    """
+
+    __slots__ = tuple(c[0] for c in CSV_DOMAIN_COLUMNS) + ('registrant', 'admin', 'tech', 'billing', 'nameservers', )
+
+    def as_info(self):
+        return dict(
+            create_date=self.create_date,
+            expiry_date=self.expiry_date,
+            name=self.name,
+            registrant=self.registrant,
+            admin=self.admin,
+            tech=self.tech,
+            billing=self.billing,
+            nameservers=self.nameservers,
+        )
+
+
+def _parse_date(value, tz):
+    found = _DateRe.match(value or '')
+    if not found:
+        raise ValueError('time data %r does not match format "%%Y-%%m-%%d"' % value)
+    return make_aware(datetime.datetime(int(found.group(1)), int(found.group(2)), int(found.group(3))), tz)
+
+
+def make_row_parser(headers):
+    """
+    Finds positions of all known columns in the `headers` once and returns a function
+    which converts single csv row into `CSVDomainRecord` object.
+    Column is only recognized when the header at expected position has expected name, otherwise the value is missing.
+    """
+    normalized = [h.lower().replace(' ', '_') for h in headers]
+
+    def _position(header, index):
+        if index is None or index >= len(normalized) or normalized[index] != header:
+            return None
+        return index
+
+    domain_columns = tuple((attr, _position(header, index), ) for attr, header, index in CSV_DOMAIN_COLUMNS)
+    nameserver_columns = tuple(_position(header, index) for header, index in CSV_NAMESERVER_COLUMNS)
+    contact_columns = tuple((role, tuple(
+        (field, _position(prefix + '_' + header, index), ) for (field, header), index in zip(CSV_CONTACT_FIELDS, positions)
+    ), ) for role, prefix, positions in CSV_CONTACT_COLUMNS)
+    tz = timezone.get_current_timezone()
+    clean_phone = _PhoneNumberCleanRe.sub
+
+    def parse(csv_row):
+        size = len(csv_row)
+        record = CSVDomainRecord()
+        for attr, pos in domain_columns:
+            setattr(record, attr, csv_row[pos].strip() if pos is not None and pos < size else None)
+        record.name = record.name or ''
+        record.create_date = _parse_date(record.create_date, tz)
+        record.expiry_date = _parse_date(record.expiry_date, tz)
+        for role, fields in contact_columns:
+            contact = {}
+            for field, pos in fields:
+                contact[field] = csv_row[pos].strip() if pos is not None and pos < size else ''
+            contact['contact_voice'] = clean_phone('', contact['contact_voice'])[:17]
+            contact['contact_fax'] = clean_phone('', contact['contact_fax'])[:17]
+            contact['contact_email'] = contact['contact_email'].lower()
+            setattr(record, role, contact)
+        record.nameservers = [csv_row[pos].strip() if pos is not None and pos < size else '' for pos in nameserver_columns]
+        return record
+
+    return parse
 
 
 def get_csv_domain_info(csv_row, headers):
-    csv_record = split_csv_row(csv_row, headers)
-    info = dict(
-        create_date=make_aware(datetime.datetime.strptime(csv_record.get('create_date_5'), '%Y-%m-%d', )),  # -
-        expiry_date=make_aware(datetime.datetime.strptime(csv_record.get('expiry_date_6'), '%Y-%m-%d', )),  # 1b.
-        name=csv_record.get('name_4', ''),                                                                  # 2.
-    #--- registrant contact
-        registrant=dict(
-            person_name='',                                                         # -
-            organization_name=csv_record.get('registrant_organisation_26', ''),     # 3a.
-            address_street=csv_record.get('registrant_address_1_31', ''),           # 3b.
-            address_city=csv_record.get('registrant_city_34', ''),                  # 3c.
-            address_province=csv_record.get('registrant_state_province_35', ''),    # 3d.
-            address_postal_code=csv_record.get('registrant_postalcode_36', ''),     # 3e.
-            address_country=csv_record.get('registrant_countrycode_37', ''),        # 3f.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('registrant_phone_27', ''))[:17],        # -
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('registrant_fax_29', ''))[:17],            # -
-            contact_email=csv_record.get('registrant_email_25', '').lower(),        # -
-        ),
-    #--- admin contact
-        admin=dict(
-            person_name=csv_record.get('admin_name_58', ''),                        # -
-            organization_name=csv_record.get('admin_organisation_60', ''),          # 4d.
-            address_street=csv_record.get('admin_address_1_65', ''),                # 4e.
-            address_city=csv_record.get('admin_city_68', ''),                       # 4f.
-            address_province=csv_record.get('admin_state_province_69', ''),         # 4g.
-            address_postal_code=csv_record.get('admin_postalcode_70', ''),          # 4h.
-            address_country=csv_record.get('admin_countrycode_71', ''),             # 4i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('admin_phone_61', ''))[:17],             # 4j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('admin_fax_63', ''))[:17],                 # 4k.
-            contact_email=csv_record.get('admin_email_59', '').lower(),             # 4l.
-        ),
-    #--- tech contact
-        tech=dict(
-            person_name=csv_record.get('technical_name_75', ''),                    # -
-            organization_name=csv_record.get('technical_organisation_77', ''),      # 5d.
-            address_street=csv_record.get('technical_address_1_82', ''),            # 5e.
-            address_city=csv_record.get('technical_city_85', ''),                   # 5f.
-            address_province=csv_record.get('technical_state_province_86', ''),     # 5g.
-            address_postal_code=csv_record.get('technical_postalcode_87', ''),      # 5h.
-            address_country=csv_record.get('technical_countrycode_88', ''),         # 5i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('technical_phone_78', ''))[:17],         # 5j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('technical_fax_80', ''))[:17],             # 5k.
-            contact_email=csv_record.get('technical_email_76', '').lower(),         # 5l.
-        ),
-    #--- billing contact
-        billing=dict(
-            person_name=csv_record.get('billing_name_41', ''),                      # -
-            organization_name=csv_record.get('billing_organisation_43', ''),        # 6d.
-            address_street=csv_record.get('billing_address_1_48', ''),              # 6e.
-            address_city=csv_record.get('billing_city_51', ''),                     # 6f.
-            address_province=csv_record.get('billing_state_province_52', ''),       # 6g.
-            address_postal_code=csv_record.get('billing_postalcode_53', ''),        # 6h.
-            address_country=csv_record.get('billing_countrycode_54', ''),           # 6i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('billing_phone_44', ''))[:17],           # 6j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('billing_fax_46', ''))[:17],               # 6k.
-            contact_email=csv_record.get('billing_email_42', '').lower(),           # 6l.
-        ),
-    #--- nameservers
-        nameservers=[
-            csv_record.get('nameserver_1_9', ''),                                  # 7a.
-            csv_record.get('nameserver_2_10', ''),                                  # 8a.
-            csv_record.get('nameserver_3_11', ''),                                  # 9a.
-            csv_record.get('nameserver_4_12', ''),                                  # 10a.
-        ]
-    )
-    return info
+    return make_row_parser(headers)(csv_row).as_info()
 
 
 def prepare_domain_status(csv_domain_status, default_status='active'):
@@ -137,7 +186,7 @@ def prepare_domain_epp_statuses(csv_domain_status, default_epp_statuses={'ok': '
     }.get(csv_domain_status, default_epp_statuses)
 
 
-def check_contact_to_be_created(known_epp_contact_id, real_epp_contact_id, real_owner):
+def check_contact_to_be_created(known_epp_contact_id, real_epp_contact_id, real_owner, known_contact=None):
     errors = []
     to_be_created = False
     if known_epp_contact_id:
@@ -147,7 +196,7 @@ def check_contact_to_be_created(known_epp_contact_id, real_epp_contact_id, real_
                 real_owner, known_epp_contact_id, real_epp_contact_id, ))
             to_be_created = True
         else:
-            if not zcontacts.verify(
+            if (known_contact.owner_id != real_owner.pk) if known_contact else not zcontacts.verify(
                 epp_id=real_epp_contact_id,
                 owner=real_owner,
             ):
@@ -160,7 +209,7 @@ def check_contact_to_be_created(known_epp_contact_id, real_epp_contact_id, real_
     return errors, to_be_created
 
 
-def check_registrant_to_be_created(known_epp_registrant_id, real_epp_registrant_id, real_owner):
+def check_registrant_to_be_created(known_epp_registrant_id, real_epp_registrant_id, real_owner, known_registrant=None):
     errors = []
     to_be_created = False
     if known_epp_registrant_id:
@@ -170,7 +219,7 @@ def check_registrant_to_be_created(known_epp_registrant_id, real_epp_registrant_
                 real_owner, known_epp_registrant_id, real_epp_registrant_id, ))
             to_be_created = True
         else:
-            if not zcontacts.verify_registrant(
+            if (known_registrant.owner_id != real_owner.pk) if known_registrant else not zcontacts.verify_registrant(
                 epp_id=real_epp_registrant_id,
                 owner=real_owner,
             ):
@@ -183,14 +232,21 @@ def check_registrant_to_be_created(known_epp_registrant_id, real_epp_registrant_
     return errors, to_be_created
 
 
-def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_ai', skip_failing_contacts=False, dry_run=True, log=None):
+def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_ai', skip_failing_contacts=False, dry_run=True, log=None,
+                                   record=None, known_domains=None, known_accounts=None, pending_updates=None):
+    """
+    Creates or updates domain, its contacts and owner account from a single csv row, returns list of errors.
+    When importing many rows, already parsed `record` can be passed, as well as
+    `known_domains` and `known_accounts` dictionaries pre-loaded for many rows at once.
+    If `pending_updates` list is passed, modified existing domains are not saved but added to the list instead.
+    """
     if log is None:
         log = logger
     errors = []
     try:
-        csv_record = split_csv_row(csv_row, headers)
-        csv_info = get_csv_domain_info(csv_row, headers)
-        domain = csv_info['name']
+        if record is None:
+            record = make_row_parser(headers)(csv_row)
+        domain = record.name
     except Exception as exc:
         errors.append('failed processing csv record: ' + str(exc))
         return errors
@@ -201,29 +257,32 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
         return errors
 
     #--- lookup existing domain
-    known_domain = zdomains.domain_find(domain)
-    real_registrar_id = csv_record.get('client_id_0')
+    if known_domains is not None:
+        known_domain = known_domains.get(domain)
+    else:
+        known_domain = zdomains.domain_find(domain)
+    real_registrar_id = record.client_id
 
     if wanted_registrar and real_registrar_id != wanted_registrar:
     #--- belong to another registrar
         errors.append('csv record belongs to another registrar %r, but expected is %r' % (real_registrar_id, wanted_registrar))
         return errors
 
-    real_expiry_date = csv_info['expiry_date']
-    real_create_date = csv_info['create_date']
-    real_epp_id = (csv_record.get('roid_0') or '').lower()
-    real_status = csv_record.get('eppstatus_7')
+    real_expiry_date = record.expiry_date
+    real_create_date = record.create_date
+    real_epp_id = (record.roid or '').lower()
+    real_status = record.eppstatus
     real_status_short = prepare_domain_status(real_status, default_status='inactive')
-    real_auth_key = csv_record.get('auth_info_password_3') or ''
-    real_registrant_contact_id = (csv_record.get('registrant_contact_id_21') or '').lower()
-    real_admin_contact_id = (csv_record.get('admin_contact_id_55') or '').lower()
-    real_tech_contact_id = (csv_record.get('tech_contact_id_72') or '').lower()
-    real_billing_contact_id = (csv_record.get('billing_contact_id_38') or '').lower()
-    real_registrant_email = csv_info['registrant']['contact_email']
-    real_admin_email = csv_info['admin']['contact_email']
-    real_tech_email = csv_info['tech']['contact_email']
-    real_billing_email = csv_info['billing']['contact_email']
-    real_nameservers = csv_info['nameservers']
+    real_auth_key = record.auth_info_password or ''
+    real_registrant_contact_id = (record.registrant_contact_id or '').lower()
+    real_admin_contact_id = (record.admin_contact_id or '').lower()
+    real_tech_contact_id = (record.tech_contact_id or '').lower()
+    real_billing_contact_id = (record.billing_contact_id or '').lower()
+    real_registrant_email = record.registrant['contact_email']
+    real_admin_email = record.admin['contact_email']
+    real_tech_email = record.tech['contact_email']
+    real_billing_email = record.billing['contact_email']
+    real_nameservers = record.nameservers
 
     known_expiry_date = None
     known_create_date = None
@@ -247,7 +306,10 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
     need_tech_contact = False
     need_billing_contact = False
 
-    owner_account = zusers.find_account(real_registrant_email)
+    if known_accounts is not None:
+        owner_account = known_accounts.get(real_registrant_email)
+    else:
+        owner_account = zusers.find_account(real_registrant_email)
     if not owner_account:
         if dry_run:
             errors.append('account %r is not exist in local DB' % real_registrant_email)
@@ -259,9 +321,11 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             account_password=new_password,
             is_active=True,
             is_approved=True,
-            **csv_info['registrant'],
+            **record.registrant,
         )
         log.info('generated new account and password for %r : %r', real_registrant_email, new_password)
+        if known_accounts is not None:
+            known_accounts[real_registrant_email] = owner_account
 
     if known_domain:
         known_expiry_date = known_domain.expiry_date
@@ -281,6 +345,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             known_epp_registrant_id=known_registrant_contact_id,
             real_epp_registrant_id=real_registrant_contact_id,
             real_owner=owner_account,
+            known_registrant=known_domain.registrant if known_domain else None,
         )
         if dry_run:
             errors.extend(_errs)
@@ -291,6 +356,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             known_epp_contact_id=known_admin_contact_id,
             real_epp_contact_id=real_admin_contact_id,
             real_owner=owner_account,
+            known_contact=known_domain.contact_admin if known_domain else None,
         )
         if dry_run:
             errors.extend(_errs)
@@ -301,6 +367,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             known_epp_contact_id=known_tech_contact_id,
             real_epp_contact_id=real_tech_contact_id,
             real_owner=owner_account,
+            known_contact=known_domain.contact_tech if known_domain else None,
         )
         if dry_run:
             errors.extend(_errs)
@@ -311,6 +378,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             known_epp_contact_id=known_billing_contact_id,
             real_epp_contact_id=real_billing_contact_id,
             real_owner=owner_account,
+            known_contact=known_domain.contact_billing if known_domain else None,
         )
         if dry_run:
             errors.extend(_errs)
@@ -321,13 +389,13 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             new_registrant_contact = zcontacts.registrant_create(
                 epp_id=real_registrant_contact_id,
                 owner=owner_account,
-                **csv_info['registrant'],
+                **record.registrant,
             )
             # TODO: make sure contact was assigned to the domain
         else:
             zcontacts.registrant_update(
                 epp_id=real_registrant_contact_id,
-                **csv_info['registrant'],
+                **record.registrant,
             )
 
         if need_admin_contact:
@@ -336,14 +404,14 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                 epp_id=real_admin_contact_id,
                 owner=owner_account,
                 raise_owner_exist=not skip_failing_contacts,
-                **csv_info['admin'],
+                **record.admin,
             )
             # TODO: make sure contact was assigned to the domain
         else:
             if real_admin_contact_id and real_admin_email:
                 zcontacts.contact_update(
                     epp_id=real_admin_contact_id,
-                    **csv_info['admin'],
+                    **record.admin,
                 )
 
         if need_tech_contact:
@@ -352,14 +420,14 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                 epp_id=real_tech_contact_id,
                 owner=owner_account,
                 raise_owner_exist=not skip_failing_contacts,
-                **csv_info['tech'],
+                **record.tech,
             )
             # TODO: make sure contact was assigned to the domain
         else:
             if real_tech_contact_id and real_tech_email:
                 zcontacts.contact_update(
                     epp_id=real_tech_contact_id,
-                    **csv_info['tech'],
+                    **record.tech,
                 )
 
         if need_billing_contact:
@@ -368,14 +436,14 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                 epp_id=real_billing_contact_id,
                 owner=owner_account,
                 raise_owner_exist=not skip_failing_contacts,
-                **csv_info['billing'],
+                **record.billing,
             )
             # TODO: make sure contact was assigned to the domain
         else:
             if real_billing_contact_id and real_billing_email:
                 zcontacts.contact_update(
                     epp_id=real_billing_contact_id,
-                    **csv_info['billing'],
+                    **record.billing,
                 )
 
         if not known_domain and (
@@ -386,7 +454,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             new_admin_contact = zcontacts.contact_create(
                 epp_id=None,  # TODO: run sync for those domains after all.
                 owner=owner_account,
-                **csv_info['registrant'],  # will be created new "inactive" contact from registrant's info
+                **record.registrant,  # will be created new "inactive" contact from registrant's info
             )
 
     if not known_domain:
@@ -411,11 +479,15 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
             contact_billing=new_billing_contact,
             nameservers=real_nameservers,
         )
+        if known_domains is not None:
+            known_domains[domain] = new_domain
 
     if new_domain:
     #--- DONE, new domain created
         return []
 
+    updated_fields = []
+
     if known_expiry_date:
         dt = real_expiry_date - known_expiry_date
         dt_hours = float(dt.total_seconds()) / (60.0 * 60.0)
@@ -426,7 +498,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_expiry_date, real_expiry_date, ))
                 return errors
             known_domain.expiry_date = real_expiry_date
-            known_domain.save()
+            updated_fields.append('expiry_date')
             log.debug('known expiry date updated to %r', real_expiry_date)
     else:
         if known_domain:
@@ -436,7 +508,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('expiry date was not set, master record is %r' % real_expiry_date)
                     return errors
                 known_domain.expiry_date = real_expiry_date
-                known_domain.save()
+                updated_fields.append('expiry_date')
                 log.debug('expiry date was not set, updated with new date %r', real_expiry_date)
 
     if known_create_date:
@@ -449,7 +521,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_create_date, real_create_date, ))
                 return errors
             known_domain.create_date = real_create_date
-            known_domain.save()
+            updated_fields.append('create_date')
             log.debug('known create date updated to %r', real_create_date)
     else:
         if known_domain:
@@ -459,7 +531,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('create date was not set, master record is %r' % real_create_date)
                     return errors
                 known_domain.create_date = real_create_date
-                known_domain.save()
+                updated_fields.append('create_date')
                 log.debug('create date was not set, update with new date %r', real_create_date)
 
     #--- check known epp_id
@@ -470,7 +542,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_epp_id, real_epp_id, ))
                 return errors
             known_domain.epp_id = real_epp_id
-            known_domain.save()
+            updated_fields.append('epp_id')
             log.debug('known epp ID updated with new value %r', real_epp_id)
     else:
         if real_epp_id:
@@ -479,7 +551,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('epp ID was not set, master record is %s' % real_epp_id)
                     return errors
                 known_domain.epp_id = real_epp_id
-                known_domain.save()
+                updated_fields.append('epp_id')
                 log.debug('epp ID was not set, now updated with a new value %r', real_epp_id)
 
     #--- check known domain status
@@ -490,7 +562,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_status, real_status_short, ))
                 return errors
             known_domain.status = real_status_short
-            known_domain.save()
+            updated_fields.append('status')
             log.debug('known domain status updated with new value %r', real_status_short)
     else:
         if real_status_short:
@@ -499,7 +571,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('domain status was not set, master record is %s' % real_status_short)
                     return errors
                 known_domain.status = real_status_short
-                known_domain.save()
+                updated_fields.append('status')
                 log.debug('domain status was not set, now updated with a new value %r', real_status_short)
 
     #--- check auth_key
@@ -510,7 +582,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_auth_key, real_auth_key, ))
                 return errors
             known_domain.auth_key = real_auth_key
-            known_domain.save()
+            updated_fields.append('auth_key')
             log.debug('known auth_key updated with new value %r', real_auth_key)
     else:
         if real_auth_key:
@@ -520,7 +592,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                         real_auth_key, ))
                     return errors
                 known_domain.auth_key = real_auth_key
-                known_domain.save()
+                updated_fields.append('auth_key')
                 log.debug('auth_key was not set, now updated with new value %r', real_auth_key)
 
     #--- check nameservers
@@ -533,7 +605,18 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
 
     #--- update nameservers
     if not dry_run:
-        zdomains.update_nameservers(known_domain, real_nameservers)
+        for i in range(4):
+            if real_nameservers[i] != known_nameservers[i]:
+                known_domain.set_nameserver(i, real_nameservers[i])
+                updated_fields.append('nameserver%d' % (i + 1))
+
+    #--- save all changes at once
+    if updated_fields:
+        updated_fields.append('modified_date')
+        if pending_updates is not None:
+            pending_updates.append((known_domain, updated_fields, ))
+        else:
+            known_domain.save(update_fields=updated_fields)
 
     if errors and dry_run:
         return errors
@@ -542,57 +625,215 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
     return errors
 
 
-def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=False, log=None):
+def parse_csv_chunk(chunk, headers):
+    """
+    Parses and validates rows of one chunk without touching the DB, can be executed in a child process.
+    Returns list of tuples `(row_number, csv_row, record, error, )`.
+    """
+    parse = make_row_parser(headers)
+    results = []
+    for row_number, csv_row in chunk:
+        try:
+            record = parse(csv_row)
+        except Exception as exc:
+            results.append((row_number, csv_row, None, 'failed processing csv record: ' + str(exc), ))
+            continue
+        if not zdomains.is_valid(record.name):
+            results.append((row_number, csv_row, record, 'invalid domain name', ))
+            continue
+        results.append((row_number, csv_row, record, None, ))
+    return results
+
+
+def _read_chunks(epp_domains, chunk_size, start_row=1):
+    chunk = []
+    for row_number, csv_row in enumerate(epp_domains, start=1):
+        if row_number < start_row:
+            continue
+        chunk.append((row_number, csv_row, ))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parsed_chunks(chunks, headers, workers):
+    """
+    Yields parsed chunks in the original order, when `workers` is greater than 1 rows are parsed in a pool
+    of child processes and only a few chunks are read ahead.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_csv_chunk(chunk, headers)
+        return
+    # child processes must not share DB connection with the parent process
+    db.connections.close_all()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(parse_csv_chunk, chunk, headers))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _preload_chunk(parsed_chunk):
+    """
+    Loads all existing domains and accounts mentioned in the chunk with two queries.
+    """
+    from back.models.domain import Domain
+    from accounts.models.account import Account
+    domain_names = set()
+    emails = set()
+    for _, _, record, error in parsed_chunk:
+        if not error:
+            domain_names.add(record.name)
+            emails.add(record.registrant['contact_email'])
+    known_domains = {d.name: d for d in Domain.domains.filter(name__in=domain_names).select_related(
+        'registrant', 'contact_admin', 'contact_tech', 'contact_billing', )}
+    known_accounts = {a.email: a for a in Account.users.filter(email__in=emails)}
+    return known_domains, known_accounts
+
+
+def _save_pending_updates(pending_updates):
+    from back.models.domain import Domain
+    if not pending_updates:
+        return
+    now = timezone.now()
+    fields = set()
+    for domain_object, updated_fields in pending_updates:
+        domain_object.epp_id = strng.normalize_epp_id(domain_object.epp_id)
+        domain_object.modified_date = now
+        fields.update(updated_fields)
+    Domain.domains.bulk_update([d for d, _ in pending_updates], fields=sorted(fields))
+
+
+def _synchronize_domain(domain, log, close_db_connection=False):
+    try:
+        outputs = zmaster.domain_synchronize_from_backend(
+            domain_name=domain,
+            refresh_contacts=False,
+            rewrite_contacts=True,
+            change_owner_allowed=True,
+            create_new_owner_allowed=True,
+        )
+    except rpc_error.EPPError:
+        log.exception('failed to synchronize domain %s from back-end\n' % domain)
+        return False
+    except Exception:
+        log.exception('unexpected error while synchronizing domain %s from back-end\n' % domain)
+        return False
+    finally:
+        if close_db_connection:
+            db.connection.close()
+    if not outputs:
+        log.critical('synchronize domain %s failed with empty result\n' % domain)
+        return False
+    if not outputs[-1] or isinstance(outputs[-1], Exception):
+        log.critical('synchronize domain %s failed with result: %r\n', domain, outputs[-1])
+        return False
+    log.info('outputs: %r\n', outputs)
+    log.info('%s processed and synchronized\n\n', domain)
+    return True
+
+
+def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=False, log=None,
+                  start_row=1, chunk_size=None, workers=None, sync_workers=None, progress=None):
+    """
+    Imports domains from csv file in chunks of `chunk_size` rows.
+    Rows are parsed in `workers` child processes, existing domains and accounts of every chunk are pre-loaded at once
+    and every chunk is written in a single transaction.
+    With `sync_after=True` imported domains are synchronized from back-end in `sync_workers` threads,
+    while next chunks are being imported.
+    Rows before `start_row` are skipped, so interrupted import can be resumed.
+    After every chunk `progress(row_number, stats)` is called.
+    Returns number of the last processed row or -1 if import was interrupted by unexpected error.
+    """
     if log is None:
         log = logger
     from back.models.registrar import Registrar
-    epp_domains = csv.reader(open(filename))
-    count = 0
-    headers = next(epp_domains)
+    chunk_size = chunk_size or settings.ZENAIDA_CSV_IMPORT_CHUNK_SIZE
+    workers = workers or settings.ZENAIDA_CSV_IMPORT_WORKERS
+    sync_workers = sync_workers or settings.ZENAIDA_CSV_IMPORT_SYNC_WORKERS
     if not registrar_epp_id:
         wanted_registrar = Registrar.registrars.first()
         if wanted_registrar:
             registrar_epp_id = wanted_registrar.epp_id
     if not registrar_epp_id:
         registrar_epp_id = 'zenaida_ai'
-    for row in epp_domains:
-        count += 1
-        domain = row[4]
-        try:
-            errors = domain_regenerate_from_csv_row(
-                row,
-                headers,
-                wanted_registrar=registrar_epp_id,
-                skip_failing_contacts=True,
-                dry_run=dry_run,
-                log=log,
-            )
-        except Exception:
-            log.exception('%s failed processing\n' % domain)
-            return -1
-        if errors:
-            log.error('%s errors:\n    %s\n', domain, ';'.join(errors))
-            continue
-        if not sync_after:
-            log.info('%s processed\n\n', domain)
-            continue
-        try:
-            outputs = zmaster.domain_synchronize_from_backend(
-                domain_name=domain,
-                refresh_contacts=False,
-                rewrite_contacts=True,
-                change_owner_allowed=True,
-                create_new_owner_allowed=True,
-            )
-        except rpc_error.EPPError:
-            log.exception('failed to synchronize domain %s from back-end\n' % domain)
-            continue
-        if not outputs:
-            log.critical('synchronize domain %s failed with empty result\n' % domain)
-            continue
-        if not outputs[-1] or isinstance(outputs[-1], Exception):
-            log.critical('synchronize domain %s failed with result: %r\n', domain, outputs[-1])
-            continue
-        log.info('outputs: %r\n', outputs)
-        log.info('%s processed and synchronized\n\n', domain)
+    stats = collections.Counter()
+    stats_lock = threading.Lock()
+
+    def _sync_one(domain, threaded):
+        result = _synchronize_domain(domain, log, close_db_connection=threaded)
+        with stats_lock:
+            stats['synchronized' if result else 'sync_failed'] += 1
+
+    sync_executor = None
+    sync_futures = []
+    if sync_after and sync_workers > 1:
+        sync_executor = concurrent.futures.ThreadPoolExecutor(max_workers=sync_workers)
+    count = start_row - 1
+    failed = False
+    with open(filename) as csv_file:
+        epp_domains = csv.reader(csv_file)
+        headers = next(epp_domains)
+        for parsed_chunk in _parsed_chunks(_read_chunks(epp_domains, chunk_size, start_row=start_row), headers, workers):
+            known_domains, known_accounts = _preload_chunk(parsed_chunk)
+            pending_updates = []
+            to_be_synchronized = []
+            with transaction.atomic():
+                for row_number, csv_row, record, error in parsed_chunk:
+                    domain = csv_row[4] if len(csv_row) > 4 else ''
+                    errors = [error, ] if error else None
+                    if not errors:
+                        try:
+                            with transaction.atomic():
+                                errors = domain_regenerate_from_csv_row(
+                                    csv_row,
+                                    headers,
+                                    wanted_registrar=registrar_epp_id,
+                                    skip_failing_contacts=True,
+                                    dry_run=dry_run,
+                                    log=log,
+                                    record=record,
+                                    known_domains=known_domains,
+                                    known_accounts=known_accounts,
+                                    pending_updates=pending_updates,
+                                )
+                        except Exception:
+                            log.exception('%s failed processing at row %d\n' % (domain, row_number, ))
+                            failed = True
+                            break
+                    count = row_number
+                    if errors:
+                        stats['errors'] += 1
+                        log.error('%s errors:\n    %s\n', domain, ';'.join(errors))
+                        continue
+                    stats['processed'] += 1
+                    if not sync_after:
+                        log.info('%s processed\n\n', domain)
+                        continue
+                    to_be_synchronized.append(domain)
+                _save_pending_updates(pending_updates)
+            for domain in to_be_synchronized:
+                if sync_executor:
+                    sync_futures.append(sync_executor.submit(_sync_one, domain, True))
+                else:
+                    _sync_one(domain, False)
+            log.info('imported %d rows: %r', count, dict(stats))
+            if progress:
+                progress(count, dict(stats))
+            if failed:
+                break
+    if sync_executor:
+        concurrent.futures.wait(sync_futures)
+        sync_executor.shutdown()
+        if progress:
+            progress(count, dict(stats))
+    if failed:
+        log.critical('import interrupted, to continue start again from row %d', count + 1)
+        return -1
     return count
@@ -6,6 +6,8 @@ import csv
 
 from django.utils.timezone import make_aware
 
+from lib import strng
+
 from zen import zcontacts
 from zen import zusers
 from zen import zdomains
@@ -437,7 +439,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='whois_ai'
 
     #--- check known epp_id
     if known_epp_id:
-        if known_epp_id != real_epp_id:
+        if known_epp_id != strng.normalize_epp_id(real_epp_id):
             if dry_run:
                 errors.append('epp ID not in sync - known is %r, master record is %r' % (
                     known_epp_id, real_epp_id, ))
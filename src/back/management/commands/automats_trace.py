@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from automats import tracing
+
+
+class Command(BaseCommand):
+
+    help = 'Print timings of state machines states and actions collected from all running processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', choices=['actions', 'states', ], default='actions', dest='section')
+        parser.add_argument('--automat', default=None, dest='automat', help='class name, for example DomainRefresher')
+        parser.add_argument('--json', action='store_true', default=False, dest='as_json')
+        parser.add_argument('--clear', action='store_true', default=False, dest='clear')
+
+    def handle(self, section, automat, as_json, clear, *args, **options):
+        if clear:
+            self.stdout.write('removed %d files' % tracing.clear_all())
+            return
+        rows = tracing.report_rows(tracing.read_all(), section=section, class_name=automat)
+        if as_json:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write('%-28s %-36s %8s %10s %8s %8s %8s %8s' % (
+            'automat', section[:-1], 'count', 'total', 'avg', 'p50', 'p95', 'max', ))
+        for row in rows:
+            self.stdout.write('%-28s %-36s %8d %10.3f %8.3f %8.3f %8.3f %8.3f' % (
+                row['automat'], row['name'], row['count'], row['total'], row['avg'], row['p50'], row['p95'], row['max'], ))
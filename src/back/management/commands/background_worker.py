@@ -1,15 +1,54 @@
-import time
 import logging
 
 from django.core.management.base import BaseCommand
 
 from accounts import tasks as account_tasks
 from back import tasks as back_tasks
+from back import scheduler
 from zen import zdomains
 from billing import tasks as billing_tasks
 
 logger = logging.getLogger(__name__)
 
+EXPIRY_NOTIFICATION_WINDOWS = [
+    (0, 2, 'domain_expire_in_1_day', ),
+    (2, 5, 'domain_expire_in_3_days', ),
+    (4, 7, 'domain_expire_in_5_days', ),
+    (7, 30, 'domain_expire_soon', ),
+    (31, 60, 'domain_expiring', ),
+]
+
+
+def _cleanup_unfinished_orders():
+    billing_tasks.remove_unfinished_orders(status='started', older_than_days=1)
+    billing_tasks.remove_unfinished_orders(status='incomplete', older_than_days=2)
+    billing_tasks.remove_unfinished_orders(status='cancelled', older_than_days=30)
+
+
+def prepare_tasks(dry_run, delay):
+    """
+    List of all regular tasks, lower `priority` value means task is started first.
+    """
+    return [
+        scheduler.Task('sync_expired_domains', back_tasks.sync_expired_domains, interval=delay, priority=0, timeout=2*60*60,
+                       kwargs=dict(dry_run=dry_run)),
+        scheduler.Task('check_notify_domains_expiring', account_tasks.check_notify_domains_expiring, interval=delay, priority=10,
+                       kwargs=dict(dry_run=dry_run, windows=EXPIRY_NOTIFICATION_WINDOWS)),
+        scheduler.Task('auto_renew_expiring_domains', back_tasks.auto_renew_expiring_domains, interval=delay, priority=5, timeout=2*60*60,
+                       kwargs=dict(dry_run=dry_run, min_days_before_expire=61, max_days_before_expire=90)),
+        # billing_tasks.retry_failed_orders()
+        # back_tasks.complete_back_end_auto_renewals(critical_days_before_delete=15)
+        scheduler.Task('activations_cleanup', account_tasks.activations_cleanup, interval=delay, priority=20),
+        # Remove all inactive domains.
+        scheduler.Task('remove_inactive_domains', zdomains.remove_inactive_domains, interval=delay, priority=20,
+                       kwargs=dict(days=180)),
+        # Remove not completed orders.
+        scheduler.Task('remove_unfinished_orders', _cleanup_unfinished_orders, interval=delay, priority=20),
+        # Remove started but not completed payments after 60 days
+        scheduler.Task('remove_unfinished_payments', billing_tasks.remove_unfinished_payments, interval=delay, priority=20),
+        # TODO: other background periodical jobs to be placed here
+    ]
+
 
 class Command(BaseCommand):
 
@@ -18,75 +57,9 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--dry_run', action='store_true', dest='dry_run')
         parser.add_argument('--delay', type=int, default=10*60, dest='delay')
+        parser.add_argument('--workers', type=int, default=1, dest='workers',
+                            help='when greater than 1 every task is executed in a separate process')
 
-    def handle(self, dry_run, delay, *args, **options):
-        iteration = 0
-        while True:
-            iteration += 1
-            logger.info('# %d', iteration)
-
-            # billing_tasks.retry_failed_orders()
-
-            back_tasks.sync_expired_domains(dry_run=dry_run)
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=0,
-                max_days_before_expire=2,
-                subject='domain_expire_in_1_day',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=2,
-                max_days_before_expire=5,
-                subject='domain_expire_in_3_days',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=4,
-                max_days_before_expire=7,
-                subject='domain_expire_in_5_days',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=7,
-                max_days_before_expire=30,
-                subject='domain_expire_soon',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=31,
-                max_days_before_expire=60,
-                subject='domain_expiring',
-            )
-
-            back_tasks.auto_renew_expiring_domains(
-                dry_run=dry_run,
-                min_days_before_expire=61,
-                max_days_before_expire=90,
-            )
-
-            # back_tasks.complete_back_end_auto_renewals(
-            #     critical_days_before_delete=15,
-            # )
-
-            account_tasks.activations_cleanup()
-
-            # Remove all inactive domains.
-            zdomains.remove_inactive_domains(days=180)
-
-            # Remove not completed orders.
-            billing_tasks.remove_unfinished_orders(status='started', older_than_days=1)
-            billing_tasks.remove_unfinished_orders(status='incomplete', older_than_days=2)
-            billing_tasks.remove_unfinished_orders(status='cancelled', older_than_days=30)
-
-            # Remove started but not completed payments after 60 days
-            billing_tasks.remove_unfinished_payments()
-
-            # TODO: other background periodical jobs to be placed here
-
-            time.sleep(delay)
+    def handle(self, dry_run, delay, workers, *args, **options):
+        logger.info('starting background tasks scheduler with %d worker(s)', workers)
+        scheduler.Scheduler(prepare_tasks(dry_run=dry_run, delay=delay), workers=workers).run_forever()
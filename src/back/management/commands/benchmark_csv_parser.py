@@ -0,0 +1,84 @@
+import time
+import random
+import logging
+
+from django.core.management.base import BaseCommand
+
+from back import csv_import
+
+
+def split_csv_row(csv_row, headers):
+    """
+    Previous implementation of the csv row parser, only used here as a baseline.
+    """
+    csv_record = {}
+    for field_index in range(len(csv_row)):
+        field = csv_row[field_index]
+        header = headers[field_index]
+        item_id = header.lower().replace(' ', '_') + '_' + str(field_index)
+        if item_id not in csv_record:
+            csv_record[item_id] = field.strip()
+        else:
+            logging.warn('field already exist: %r', item_id)
+    return csv_record
+
+
+def synthetic_headers():
+    positions = {}
+    for _, header, index in csv_import.CSV_DOMAIN_COLUMNS:
+        positions.setdefault(index, header)
+    for header, index in csv_import.CSV_NAMESERVER_COLUMNS:
+        positions[index] = header
+    for _, prefix, indexes in csv_import.CSV_CONTACT_COLUMNS:
+        for (_, header), index in zip(csv_import.CSV_CONTACT_FIELDS, indexes):
+            if index is not None:
+                positions[index] = prefix + '_' + header
+    return [positions.get(i, 'column_%d' % i) for i in range(max(positions) + 1)]
+
+
+def synthetic_row(headers, row_number):
+    row = []
+    for header in headers:
+        if header == 'name':
+            row.append('benchmark-%d.ai' % row_number)
+        elif header.endswith('_date'):
+            row.append('20%02d-%02d-%02d' % (random.randint(10, 30), random.randint(1, 12), random.randint(1, 28)))
+        elif header.endswith('phone') or header.endswith('fax'):
+            row.append('+1 (264) %07d ext.' % random.randint(0, 9999999))
+        elif header.endswith('email'):
+            row.append(' Owner%d@Example.com ' % random.randint(0, 1000))
+        else:
+            row.append(' value %d ' % random.randint(0, 1000))
+    return row
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py benchmark_csv_parser --rows 100000
+
+    Rows are generated in memory, DB is not used.
+    """
+
+    help = 'Measures parsing speed of csv rows exported from the registry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, dest='rows')
+
+    def handle(self, rows, *args, **options):
+        headers = synthetic_headers()
+        csv_rows = [synthetic_row(headers, i) for i in range(rows)]
+        self.stdout.write('generated %d rows with %d columns\n' % (rows, len(headers)))
+        started = time.perf_counter()
+        for csv_row in csv_rows:
+            split_csv_row(csv_row, headers)
+        elapsed = time.perf_counter() - started
+        self.stdout.write('split_csv_row: %.3f seconds, %.1f us per row\n' % (elapsed, elapsed * 1000000.0 / rows))
+        started = time.perf_counter()
+        parse = csv_import.make_row_parser(headers)
+        for csv_row in csv_rows:
+            parse(csv_row)
+        elapsed = time.perf_counter() - started
+        self.stdout.write('make_row_parser: %.3f seconds, %.1f us per row\n' % (elapsed, elapsed * 1000000.0 / rows))
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,56 @@
+import time
+import random
+import string
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from back.models.contact import Contact
+from zen import zusers
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py benchmark_epp_id_lookups --contacts 200000 --lookups 1000
+
+    All test records are created inside a transaction which is rolled back at the end.
+    """
+
+    help = 'Compares case-insensitive and exact lookups of Contact objects by epp_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contacts', type=int, default=200000, dest='contacts')
+        parser.add_argument('--lookups', type=int, default=1000, dest='lookups')
+
+    def handle(self, contacts, lookups, *args, **options):
+        with transaction.atomic():
+            owner = zusers.create_account('benchmark_epp_id_lookups@zenaida.ai', also_profile=False)
+            prefix = ''.join(random.choice(string.ascii_lowercase) for _ in range(6))
+            epp_ids = ['%s%08d' % (prefix, i) for i in range(contacts)]
+            Contact.contacts.bulk_create([Contact(
+                owner=owner,
+                epp_id=epp_id,
+                person_name='Benchmark',
+                address_street='Street',
+                address_city='City',
+                address_country='AI',
+                contact_voice='1234567890',
+                contact_email='benchmark@zenaida.ai',
+            ) for epp_id in epp_ids], batch_size=5000)
+            self.stdout.write('created %d contacts\n' % contacts)
+            samples = random.sample(epp_ids, min(lookups, contacts))
+            for label, lookup in (
+                ('iexact', lambda epp_id: Contact.contacts.filter(epp_id__iexact=epp_id.upper()).first()),
+                ('exact', lambda epp_id: Contact.contacts.filter(epp_id=epp_id).first()),
+            ):
+                self.stdout.write(Contact.contacts.filter(**{'epp_id__%s' % label: samples[0]}).explain() + '\n')
+                started = time.perf_counter()
+                for epp_id in samples:
+                    assert lookup(epp_id) is not None
+                elapsed = time.perf_counter() - started
+                self.stdout.write('%s: %d lookups in %.3f seconds, %.3f ms per lookup\n' % (
+                    label, len(samples), elapsed, elapsed * 1000.0 / len(samples)))
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,21 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from board import bulk_transfer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Background process to execute bulk domain transfers created from the board, one by one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delay', type=int, default=5, dest='delay',
+                            help='seconds to wait when there are no pending bulk transfers')
+        parser.add_argument('--workers', type=int, default=None, help='number of domains verified on the back-end at the same time')
+
+    def handle(self, delay, workers, *args, **options):
+        logger.info('starting bulk transfer worker')
+        bulk_transfer.run_worker(delay=delay, workers=workers)
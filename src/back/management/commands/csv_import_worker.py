@@ -0,0 +1,22 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from board import csv_sync
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Background process to import .csv files uploaded from the board, one by one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delay', type=int, default=5, dest='delay',
+                            help='seconds to wait when there are no pending files')
+        parser.add_argument('--workers', type=int, default=None, help='number of processes to parse csv rows')
+        parser.add_argument('--sync_workers', type=int, default=None, help='number of threads to synchronize imported domains')
+
+    def handle(self, delay, workers, sync_workers, *args, **options):
+        logger.info('starting csv import worker')
+        csv_sync.run_worker(delay=delay, workers=workers, sync_workers=sync_workers)
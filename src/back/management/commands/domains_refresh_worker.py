@@ -0,0 +1,22 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from back import refresh_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Background process to synchronize domains from the refresh queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch_size', type=int, default=None, dest='batch_size',
+                            help='maximum number of domains synchronized at once')
+        parser.add_argument('--delay', type=int, default=2, dest='delay',
+                            help='seconds to wait when the queue is empty')
+
+    def handle(self, batch_size, delay, *args, **options):
+        logger.info('starting domains refresh worker')
+        refresh_queue.process_queue(batch_size=batch_size, delay=delay)
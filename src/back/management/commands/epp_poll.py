@@ -7,5 +7,11 @@ class Command(BaseCommand):
 
     help = 'Starts background process to "listen" EPP notifications from the back-end'
 
-    def handle(self, *args, **options):
-        zpoll.main()
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, dest='workers',
+                            help='number of threads processing EPP messages in parallel')
+        parser.add_argument('--max-inflight', type=int, default=None, dest='max_inflight',
+                            help='maximum number of messages waiting in the queue or being processed')
+
+    def handle(self, workers, max_inflight, *args, **options):
+        zpoll.main(workers=workers, max_inflight=max_inflight)
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0043_blockedtransfer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('last_status', models.CharField(choices=[('started', 'Started'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('timeout', 'Timeout')], default='succeeded', max_length=16)),
+                ('last_started_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('last_duration', models.FloatField(blank=True, default=None, null=True)),
+                ('last_error', models.TextField(blank=True, default=None, null=True)),
+                ('runs_count', models.IntegerField(default=0)),
+                ('failures_count', models.IntegerField(default=0)),
+                ('locked_until', models.DateTimeField(blank=True, default=None, null=True)),
+                ('locked_by', models.CharField(blank=True, default=None, max_length=255, null=True)),
+            ],
+            options={
+                'base_manager_name': 'tasks',
+                'default_manager_name': 'tasks',
+            },
+            managers=[
+                ('tasks', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lower_case_epp_ids(apps, schema_editor):
+    """
+    EPP IDs are now stored in lower case, so lookups can use unique index on `epp_id` directly.
+    """
+    for model_name in ('Domain', 'Contact', 'Registrant', ):
+        model = apps.get_model('back', model_name)
+        model._base_manager.filter(epp_id='').update(epp_id=None)
+        model._base_manager.exclude(epp_id=None).update(epp_id=Lower('epp_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0044_backgroundtask'),
+    ]
+
+    operations = [
+        migrations.RunPython(lower_case_epp_ids, migrations.RunPython.noop),
+    ]
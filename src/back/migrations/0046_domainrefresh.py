@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0045_lower_case_epp_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DomainRefresh',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain_name', models.CharField(max_length=255, unique=True)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+            options={
+                'base_manager_name': 'refreshes',
+                'default_manager_name': 'refreshes',
+            },
+            managers=[
+                ('refreshes', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
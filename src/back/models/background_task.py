@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class BackgroundTask(models.Model):
+
+    tasks = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'tasks'
+        default_manager_name = 'tasks'
+
+    name = models.CharField(max_length=255, unique=True)
+
+    last_status = models.CharField(
+        choices=(
+            ('started', 'Started', ),
+            ('succeeded', 'Succeeded', ),
+            ('failed', 'Failed', ),
+            ('timeout', 'Timeout', ),
+        ),
+        default='succeeded',
+        max_length=16,
+        null=False,
+        blank=False,
+    )
+
+    last_started_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    last_finished_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    last_duration = models.FloatField(null=True, blank=True, default=None)
+
+    last_error = models.TextField(null=True, blank=True, default=None)
+
+    runs_count = models.IntegerField(default=0)
+
+    failures_count = models.IntegerField(default=0)
+
+    locked_until = models.DateTimeField(null=True, blank=True, default=None)
+
+    locked_by = models.CharField(max_length=255, null=True, blank=True, default=None)
+
+    def __str__(self):
+        return 'BackgroundTask({} {} {})'.format(self.name, self.last_status, self.last_started_at)
+
+    def __repr__(self):
+        return 'BackgroundTask({} {} {})'.format(self.name, self.last_status, self.last_started_at)
@@ -2,6 +2,7 @@ from django.core.validators import validate_email
 from django.db import models
 
 from accounts.models.account import Account
+from lib import strng
 from back.validators import CountryField, phone_regex
 
 
@@ -43,8 +44,7 @@ class Contact(models.Model):
         return 'Contact({} {})'.format(self.owner.email, str(self.epp_id or '?')[:6])
 
     def save(self, *args, **kwargs):
-        if not self.epp_id:
-            self.epp_id = None
+        self.epp_id = strng.normalize_epp_id(self.epp_id)
         super(Contact, self).save(*args, **kwargs)
 
     @property
@@ -102,8 +102,7 @@ class Registrant(models.Model):
         return 'Registrant({} {})'.format(self.owner.email, self.epp_id or '?')
 
     def save(self, *args, **kwargs):
-        if not self.epp_id:
-            self.epp_id = None
+        self.epp_id = strng.normalize_epp_id(self.epp_id)
         super(Registrant, self).save(*args, **kwargs)
 
     @property
@@ -6,6 +6,8 @@ from django.utils import timezone
 
 from accounts.models.account import Account
 
+from lib import strng
+
 from back.models.zone import Zone
 from back.models.contact import Contact, Registrant
 from back.models.registrar import Registrar
@@ -105,8 +107,7 @@ class Domain(models.Model):
         return 'Domain({} {} {})'.format(self.name, self.owner.email, str(self.epp_id or '?')[:6])
 
     def save(self, *args, **kwargs):
-        if not self.epp_id:
-            self.epp_id = None
+        self.epp_id = strng.normalize_epp_id(self.epp_id)
         return super(Domain, self).save(*args, **kwargs)
 
     def list_contacts(self, include_registrant=False):
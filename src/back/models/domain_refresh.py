@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class DomainRefresh(models.Model):
+
+    refreshes = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'refreshes'
+        default_manager_name = 'refreshes'
+
+    domain_name = models.CharField(max_length=255, unique=True)
+
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    started_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    def __str__(self):
+        return 'DomainRefresh({} {})'.format(self.domain_name, self.started_at or 'pending')
+
+    def __repr__(self):
+        return 'DomainRefresh({} {})'.format(self.domain_name, self.started_at or 'pending')
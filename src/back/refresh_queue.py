@@ -0,0 +1,121 @@
+"""
+Background refresh of domains listed on the "My domains" page.
+
+The page never talks to the back-end: domains which were not synchronized during last `hours_passed` hours
+are only placed into the `DomainRefresh` queue and the page is rendered right away.
+Every domain name is present in the queue only once, no matter how many times the page was opened.
+The `domains_refresh_worker` management command takes domains from the queue in batches and synchronizes
+every batch with one `zmaster.domains_bulk_synchronize()` call, so contacts common for multiple domains
+are only requested once.
+"""
+
+import time
+import logging
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from back.models.domain_refresh import DomainRefresh
+
+from zen import zmaster
+
+logger = logging.getLogger(__name__)
+
+
+def is_stale(domain_object, hours_passed=None, now=None):
+    hours_passed = hours_passed if hours_passed is not None else settings.ZENAIDA_DOMAINS_REFRESH_HOURS_PASSED
+    if not domain_object.latest_sync_date:
+        return True
+    return (now or timezone.now()) - domain_object.latest_sync_date > datetime.timedelta(hours=hours_passed)
+
+
+def enqueue(domain_objects_list, hours_passed=None):
+    """
+    Adds stale domains from the list to the queue and returns set of domain names from the list
+    which are waiting in the queue or being refreshed right now.
+    """
+    domain_objects_list = list(domain_objects_list)
+    if not domain_objects_list:
+        return set()
+    now = timezone.now()
+    stale_names = [d.name for d in domain_objects_list if is_stale(d, hours_passed=hours_passed, now=now)]
+    if stale_names:
+        DomainRefresh.refreshes.bulk_create([DomainRefresh(domain_name=n) for n in stale_names], ignore_conflicts=True)
+        logger.info('%d domains added to the refresh queue: %r', len(stale_names), stale_names)
+    return set(DomainRefresh.refreshes.filter(
+        domain_name__in=[d.name for d in domain_objects_list],
+    ).values_list('domain_name', flat=True))
+
+
+def claim(limit, timeout=None):
+    """
+    Marks up to `limit` oldest queued domains as started and returns them.
+    Domains started more than `timeout` seconds ago are considered lost by a crashed worker and taken again.
+    """
+    timeout = timeout or settings.ZENAIDA_DOMAINS_REFRESH_TIMEOUT_SECONDS
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(DomainRefresh.refreshes.select_for_update(skip_locked=True).filter(
+            Q(started_at__isnull=True) | Q(started_at__lt=now - datetime.timedelta(seconds=timeout)),
+        ).order_by('requested_at')[:limit])
+        if claimed:
+            DomainRefresh.refreshes.filter(pk__in=[r.pk for r in claimed]).update(started_at=now)
+    for refresh in claimed:
+        refresh.started_at = now
+    return claimed
+
+
+def refresh(refreshes, request_time_limit=None):
+    """
+    Synchronizes claimed domains from the back-end and removes them from the queue.
+    Returns set of domain names which were refreshed successfully.
+    """
+    domain_names = [r.domain_name for r in refreshes]
+    refreshed = set()
+    try:
+        results = zmaster.domains_bulk_synchronize(
+            domain_names=domain_names,
+            skip_check=True,
+            refresh_contacts=False,
+            rewrite_contacts=None,
+            change_owner_allowed=False,
+            create_new_owner_allowed=False,
+            soft_delete=True,
+            domain_transferred_away=False,
+            request_time_limit=request_time_limit or settings.ZENAIDA_DOMAINS_REFRESH_REQUEST_TIME_LIMIT,
+        )
+    except Exception as exc:
+        # domains will be added to the queue again next time the page is opened
+        logger.exception('failed to refresh %r: %r', domain_names, exc)
+        results = {}
+    finally:
+        for one_refresh in refreshes:
+            DomainRefresh.refreshes.filter(pk=one_refresh.pk, started_at=one_refresh.started_at).delete()
+    for domain_name in domain_names:
+        outputs = results.get(domain_name.lower())
+        if not outputs or any(isinstance(o, Exception) for o in outputs):
+            logger.warning('failed to refresh %r: %r', domain_name, outputs)
+            continue
+        refreshed.add(domain_name)
+    return refreshed
+
+
+def process_queue(batch_size=None, iterations=None, delay=2):
+    """
+    Takes domains from the queue and refreshes them, at most `batch_size` domains at once.
+    Returns number of successfully refreshed domains after `iterations` loops, runs forever by default.
+    """
+    batch_size = batch_size or settings.ZENAIDA_DOMAINS_REFRESH_BATCH_SIZE
+    processed = 0
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        iteration += 1
+        claimed = claim(limit=batch_size)
+        if not claimed:
+            time.sleep(delay)
+            continue
+        processed += len(refresh(claimed))
+    return processed
@@ -0,0 +1,201 @@
+"""
+Runs periodic background tasks, used by `background_worker` management command.
+
+Every task has its own interval, priority and timeout. When few tasks are due at the same time the task
+with lower `priority` value is started first. Task is "claimed" in the DB before starting, so the same task
+never runs twice at the same moment, even when few `background_worker` processes are running.
+With `workers` greater than 1 every task is executed in a separate child process,
+so a slow task does not block other tasks and is terminated when timeout is reached.
+"""
+
+import os
+import time
+import socket
+import logging
+import datetime
+import traceback
+import multiprocessing
+
+from django import db
+from django.db.models import Q, F
+from django.utils import timezone
+
+from back.models.background_task import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+
+class Task(object):
+
+    def __init__(self, name, func, interval, priority=10, timeout=60*60, kwargs=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.priority = priority
+        self.timeout = timeout
+        self.kwargs = kwargs or {}
+
+    def __repr__(self):
+        return 'Task(%s)' % self.name
+
+#------------------------------------------------------------------------------
+
+def _worker_id():
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+def claim_task(task, now=None):
+    """
+    Marks task as started in the DB, returns False if the task is already running in another process.
+    """
+    now = now or timezone.now()
+    BackgroundTask.tasks.get_or_create(name=task.name)
+    updated = BackgroundTask.tasks.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        name=task.name,
+    ).update(
+        locked_until=now + datetime.timedelta(seconds=task.timeout),
+        locked_by=_worker_id(),
+        last_started_at=now,
+        last_status='started',
+    )
+    return updated == 1
+
+
+def release_task(task, status, duration, error=None):
+    """
+    Stores results of the task execution and removes the lock.
+    """
+    BackgroundTask.tasks.filter(name=task.name).update(
+        locked_until=None,
+        locked_by=None,
+        last_status=status,
+        last_finished_at=timezone.now(),
+        last_duration=duration,
+        last_error=error,
+        runs_count=F('runs_count') + 1,
+        failures_count=F('failures_count') + (0 if status == 'succeeded' else 1),
+    )
+
+
+def execute_task(task):
+    """
+    Calls the task function and stores results in the DB, the task must be claimed already.
+    """
+    started = time.time()
+    logger.info('task %r started', task.name)
+    try:
+        task.func(**task.kwargs)
+    except Exception as exc:
+        logger.exception('task %r failed: %r', task.name, exc)
+        release_task(task, status='failed', duration=time.time() - started, error=traceback.format_exc())
+        return False
+    duration = time.time() - started
+    logger.info('task %r finished in %.3f seconds', task.name, duration)
+    release_task(task, status='succeeded', duration=duration)
+    return True
+
+
+def _process_main(task):
+    try:
+        result = execute_task(task)
+    finally:
+        db.connections.close_all()
+    os._exit(0 if result else 1)
+
+#------------------------------------------------------------------------------
+
+class Scheduler(object):
+
+    def __init__(self, tasks, workers=1, tick=5):
+        self.tasks = sorted(tasks, key=lambda t: t.priority)
+        self.workers = workers
+        self.tick = tick
+        self.next_run = {}
+        self.running = {}
+
+    def load_schedule(self):
+        """
+        Takes the latest start time of every task from the DB, so restart of the process does not
+        execute all tasks again immediately.
+        """
+        now = time.time()
+        known = {bt.name: bt for bt in BackgroundTask.tasks.filter(name__in=[t.name for t in self.tasks])}
+        for task in self.tasks:
+            bt = known.get(task.name)
+            if bt and bt.last_started_at:
+                self.next_run[task.name] = bt.last_started_at.timestamp() + task.interval
+            else:
+                self.next_run[task.name] = now
+
+    def due_tasks(self, now=None):
+        now = now or time.time()
+        return [t for t in self.tasks if t.name not in self.running and self.next_run.get(t.name, 0) <= now]
+
+    def run_pending(self):
+        """
+        Starts all tasks which are due now, returns number of started tasks.
+        In the single worker mode tasks are executed one by one in the current process and
+        the list is re-checked after every task, so task with higher priority goes first.
+        """
+        self.check_running()
+        started = 0
+        done = set()
+        while True:
+            due = [t for t in self.due_tasks() if t.name not in done]
+            if not due:
+                break
+            if self.workers > 1 and len(self.running) >= self.workers:
+                break
+            task = due[0]
+            done.add(task.name)
+            self.next_run[task.name] = time.time() + task.interval
+            if not claim_task(task):
+                logger.warning('task %r is already running in another process', task.name)
+                continue
+            started += 1
+            if self.workers > 1:
+                self.start_process(task)
+            else:
+                execute_task(task)
+        return started
+
+    def start_process(self, task):
+        # child process must open its own DB connection
+        db.connections.close_all()
+        process = multiprocessing.get_context('fork').Process(target=_process_main, args=(task, ), name=task.name)
+        process.start()
+        self.running[task.name] = (process, task, time.time(), )
+
+    def check_running(self):
+        """
+        Removes finished child processes and terminates those running longer than the task timeout.
+        """
+        for name, (process, task, started) in list(self.running.items()):
+            if process.is_alive():
+                if time.time() - started < task.timeout:
+                    continue
+                logger.error('task %r reached timeout of %d seconds and will be terminated', name, task.timeout)
+                process.terminate()
+                process.join(5)
+                release_task(task, status='timeout', duration=time.time() - started)
+            else:
+                process.join()
+                if process.exitcode not in (0, 1, ):
+                    # process crashed before it was able to store results
+                    release_task(task, status='failed', duration=time.time() - started, error='exit code %r' % process.exitcode)
+            self.running.pop(name)
+
+    def next_delay(self):
+        if not self.next_run:
+            return self.tick
+        delay = min(self.next_run.values()) - time.time()
+        if self.running:
+            delay = min(delay, self.tick)
+        return max(1, delay)
+
+    def run_forever(self):
+        self.load_schedule()
+        while True:
+            self.run_pending()
+            time.sleep(self.next_delay())
@@ -1,6 +1,8 @@
 import logging
 import datetime
+import concurrent.futures
 
+from django import db
 from django.conf import settings
 from django.utils import timezone
 
@@ -15,7 +17,6 @@ from epp import rpc_client
 from epp import rpc_error
 
 from zen import zmaster
-from zen import zusers
 
 logger = logging.getLogger(__name__)
 
@@ -37,22 +38,122 @@ def sync_expired_domains(dry_run=True):
         epp_id=None,
     )
     report = []
+    if dry_run:
+        for expired_domain in expired_active_domains:
+            logger.info('domain %r is expired, going to synchronize from back-end', expired_domain)
+            report.append((expired_domain, [], ))
+        return report
+    expired_active_domains = list(expired_active_domains)
+    if not expired_active_domains:
+        return report
+    logger.info('%d domains are expired, going to synchronize from back-end', len(expired_active_domains))
+    results = zmaster.domains_bulk_synchronize(
+        domain_names=[expired_domain.name for expired_domain in expired_active_domains],
+        create_new_owner_allowed=False,
+        domain_transferred_away=True,
+        soft_delete=True,
+    )
     for expired_domain in expired_active_domains:
-        logger.info('domain %r is expired, going to synchronize from back-end', expired_domain)
-        if dry_run:
-            result = []
-        else:
-            result = zmaster.domain_synchronize_from_backend(
-                domain_name=expired_domain.name,
-                create_new_owner_allowed=False,
-                domain_transferred_away=True,
-                soft_delete=True,
-            )
-        report.append((expired_domain, result, ))
+        report.append((expired_domain, results.get(expired_domain.name.lower(), []), ))
     return report
 
 
-def auto_renew_expiring_domains(dry_run=True, min_days_before_expire=60, max_days_before_expire=90):
+def plan_auto_renewals(candidate_domains, domain_price=None):
+    """
+    Decides which of the given domains can be automatically renewed right now.
+    Candidates must be already sorted in the order of importance: balance of each account is
+    allocated across account's domains one by one, so two domains never share the same funds.
+    Returns tuple of two lists: `(planned_domains, low_balance_domains)`.
+    """
+    domain_price = settings.ZENAIDA_DOMAIN_PRICE if domain_price is None else domain_price
+    candidate_domains = [d for d in candidate_domains if d.owner.profile.automatic_renewal_enabled or d.auto_renew_enabled]
+    pending_names = billing_orders.find_pending_domain_renew_names([d.name for d in candidate_domains])
+    remaining_balance = {}
+    planned = []
+    low_balance = []
+    for domain in candidate_domains:
+        if domain.name in pending_names:
+            logger.warn('domain renew order already started for %r', domain.name)
+            continue
+        if domain.owner_id not in remaining_balance:
+            remaining_balance[domain.owner_id] = domain.owner.balance
+        if remaining_balance[domain.owner_id] < domain_price:
+            low_balance.append(domain)
+            continue
+        remaining_balance[domain.owner_id] -= domain_price
+        planned.append(domain)
+    return planned, low_balance
+
+
+def _auto_renew_one_domain(domain, moment_now):
+    current_expiry_date = domain.expiry_date
+    logger.info('domain %r is going to be automatically renewed now, expiry date is %r', domain.name, current_expiry_date)
+    # step 1: create domain renew order
+    renewal_order = billing_orders.order_single_item(
+        owner=domain.owner,
+        item_type='domain_renew',
+        item_price=settings.ZENAIDA_DOMAIN_PRICE,
+        item_name=domain.name,
+        item_details={
+            'created_automatically': moment_now.isoformat(),
+        },
+        item_duration=settings.ZENAIDA_DOMAIN_RENEW_YEARS,
+    )
+    # step 2: execute the order
+    new_status = billing_orders.execute_order(renewal_order)
+    domain.refresh_from_db()
+    if new_status != 'processed':
+        logger.info('for account %r renew order status is %r', domain.owner, new_status)
+        return (domain.name, domain.owner.email, Exception('renew order status is %s' % new_status, ), )
+    # step 3: send a notification to the customer
+    notifications.start_email_notification_domain_renewed(
+        user=domain.owner,
+        domain_name=domain.name,
+        expiry_date=domain.expiry_date,
+        old_expiry_date=current_expiry_date,
+    )
+    return (domain.name, domain.owner.email, domain.expiry_date, )
+
+
+def _auto_renew_owner_domains(owner_domains, moment_now, close_db_connection=False):
+    results = {}
+    try:
+        for domain in owner_domains:
+            try:
+                results[domain.name] = _auto_renew_one_domain(domain, moment_now)
+            except Exception as exc:
+                logger.exception('auto-renew of domain %r failed', domain.name)
+                results[domain.name] = (domain.name, domain.owner.email, exc, )
+    finally:
+        if close_db_connection:
+            db.connection.close()
+    return results
+
+
+def execute_auto_renewals(planned_domains, moment_now=None, workers=None):
+    """
+    Creates and executes renew orders for planned domains, returns dictionary with one report item per domain.
+    Domains of the same account are always processed one by one, because every order is charging account balance.
+    With `workers` greater than 1 different accounts are processed in parallel threads.
+    """
+    moment_now = moment_now or timezone.now()
+    workers = workers or settings.ZENAIDA_AUTO_RENEW_WORKERS
+    by_owner = {}
+    for domain in planned_domains:
+        by_owner.setdefault(domain.owner_id, []).append(domain)
+    results = {}
+    if workers <= 1 or len(by_owner) <= 1:
+        for owner_domains in by_owner.values():
+            results.update(_auto_renew_owner_domains(owner_domains, moment_now))
+        return results
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_auto_renew_owner_domains, owner_domains, moment_now, True) for owner_domains in by_owner.values()]
+        for future in futures:
+            results.update(future.result())
+    return results
+
+
+def auto_renew_expiring_domains(dry_run=True, min_days_before_expire=60, max_days_before_expire=90, workers=None):
     """
     When customer enables "domain auto-renew" feature on "My Profile" page and possess enough account balance
     Zenaida must take care of the expiring domains and automatically renew a domain 3 months before the expiration date.
@@ -64,124 +165,57 @@ def auto_renew_expiring_domains(dry_run=True, min_days_before_expire=60, max_day
         4. if user do not have enough account balance, will send a "low_balance" notification
         5. checks notifications history to keep only one "low_balance" email per 30 days
         6. also task will make an attempt to auto-renew already suspended and expired domains
+    Account balance is allocated across all domains of the account before any order is created,
+    domains which are expiring sooner are renewed first, see `plan_auto_renewals()`.
+    Returns list of tuples `(domain_name, email, result)`, where result is new expiry date or an Exception.
     if `dry_run` is True will only return a list of domains to be automatically renewed.
     """
     report = []
     users_on_low_balance = {}
     moment_now = timezone.now()
 
-    moment_min_days_before_expire = timezone.now() + datetime.timedelta(days=min_days_before_expire)
-    moment_max_days_before_expire = timezone.now() + datetime.timedelta(days=max_days_before_expire)
+    moment_min_days_before_expire = moment_now + datetime.timedelta(days=min_days_before_expire)
+    moment_max_days_before_expire = moment_now + datetime.timedelta(days=max_days_before_expire)
     expiring_active_domains = Domain.domains.filter(
         expiry_date__gte=moment_min_days_before_expire,
         expiry_date__lte=moment_max_days_before_expire,
         status__in=['active', ],
     ).exclude(
         epp_id=None,
-    )
-    for expiring_domain in expiring_active_domains:
-        if not expiring_domain.owner.profile.automatic_renewal_enabled:
-            if not expiring_domain.auto_renew_enabled:
-                continue
-        if billing_orders.find_pending_domain_renew_order_items(expiring_domain.name):
-            logger.warn('domain renew order already started for %r', expiring_domain.name)
-            continue
-        current_expiry_date = expiring_domain.expiry_date
-        if expiring_domain.owner.balance < settings.ZENAIDA_DOMAIN_PRICE:
-            # step 4: user is on low balance
-            report.append((expiring_domain.name, expiring_domain.owner.email, Exception('not enough funds'), ))
-            if expiring_domain.owner.email not in users_on_low_balance:
-                users_on_low_balance[expiring_domain.owner.email] = []
-            users_on_low_balance[expiring_domain.owner.email].append(expiring_domain.name)
-            logger.warn('not enough funds to auto-renew domain %r', expiring_domain.name)
-            continue
-        if dry_run:
-            report.append((expiring_domain.name, expiring_domain.owner.email, current_expiry_date, ))
-            continue
-        logger.info('domain %r is expiring, going to start auto-renew now', expiring_domain.name)
-        # step 1: create domain renew order
-        renewal_order = billing_orders.order_single_item(
-            owner=expiring_domain.owner,
-            item_type='domain_renew',
-            item_price=settings.ZENAIDA_DOMAIN_PRICE,
-            item_name=expiring_domain.name,
-            item_details={
-                'created_automatically': moment_now.isoformat(),
-            },
-            item_duration=settings.ZENAIDA_DOMAIN_RENEW_YEARS,
-        )
-        # step 2: execute the order
-        new_status = billing_orders.execute_order(renewal_order)
-        expiring_domain.refresh_from_db()
-        if new_status != 'processed':
-            report.append((expiring_domain.name, expiring_domain.owner.email, Exception('renew order status is %s' % new_status, ), ))
-            logger.info('for account %r renew order status is %r', expiring_domain.owner, new_status)
-            continue
-        # step 3: send a notification to the customer
-        notifications.start_email_notification_domain_renewed(
-            user=expiring_domain.owner,
-            domain_name=expiring_domain.name,
-            expiry_date=expiring_domain.expiry_date,
-            old_expiry_date=current_expiry_date,
-        )
-        report.append((expiring_domain.name, expiring_domain.owner.email, expiring_domain.expiry_date, ))
-
+    ).select_related('owner', 'owner__profile').order_by('expiry_date', 'name')
+    # step 6: make an attempt to auto-renew already suspended and expired domains
     expired_suspended_domains = Domain.domains.filter(
         expiry_date__lte=moment_now,
         status__in=['suspended', ],
     ).exclude(
         epp_id=None,
+    ).select_related('owner', 'owner__profile').order_by('expiry_date', 'name')
+    # already expired domains are closer to deletion, so they get account balance first
+    candidate_domains = sorted(
+        list(expiring_active_domains) + list(expired_suspended_domains),
+        key=lambda d: (d.expiry_date, d.name, ),
     )
-    # step 6: make an attempt to auto-renew already suspended and expired domains
-    for expired_domain in expired_suspended_domains:
-        if not expired_domain.owner.profile.automatic_renewal_enabled:
-            if not expired_domain.auto_renew_enabled:
-                continue
-        if billing_orders.find_pending_domain_renew_order_items(expired_domain.name):
-            logger.warn('domain renew order already started for %r', expired_domain.name)
-            continue
-        current_expiry_date = expired_domain.expiry_date
-        if expired_domain.owner.balance < settings.ZENAIDA_DOMAIN_PRICE:
+
+    planned_domains, low_balance_domains = plan_auto_renewals(candidate_domains)
+    planned_names = set(d.name for d in planned_domains)
+    low_balance_names = set(d.name for d in low_balance_domains)
+    results = {}
+    if not dry_run:
+        results = execute_auto_renewals(planned_domains, moment_now=moment_now, workers=workers)
+
+    for domain in candidate_domains:
+        if domain.name in low_balance_names:
             # step 4: user is on low balance
-            report.append((expired_domain.name, expired_domain.owner.email, Exception('not enough funds'), ))
-            if expired_domain.owner.email not in users_on_low_balance:
-                users_on_low_balance[expired_domain.owner.email] = []
-            users_on_low_balance[expired_domain.owner.email].append(expired_domain.name)
-            logger.warn('not enough funds to auto-renew domain %r', expired_domain.name)
-            continue
-        if dry_run:
-            report.append((expired_domain.name, expired_domain.owner.email, current_expiry_date, ))
-            continue
-        logger.info('domain %r is expired, going to start auto-renew now', expired_domain.name)
-        # step 1: create domain renew order
-        renewal_order = billing_orders.order_single_item(
-            owner=expired_domain.owner,
-            item_type='domain_renew',
-            item_price=settings.ZENAIDA_DOMAIN_PRICE,
-            item_name=expired_domain.name,
-            item_details={
-                'created_automatically': moment_now.isoformat(),
-            },
-            item_duration=settings.ZENAIDA_DOMAIN_RENEW_YEARS,
-        )
-        # step 2: execute the order
-        new_status = billing_orders.execute_order(renewal_order)
-        expired_domain.refresh_from_db()
-        if new_status != 'processed':
-            report.append((expired_domain.name, expired_domain.owner.email, Exception('renew order status is %s' % new_status, ), ))
-            logger.info('for account %r renew order status is %r', expired_domain.owner, new_status)
-            continue
-        # step 3: send a notification to the customer
-        notifications.start_email_notification_domain_renewed(
-            user=expired_domain.owner,
-            domain_name=expired_domain.name,
-            expiry_date=expired_domain.expiry_date,
-            old_expiry_date=current_expiry_date,
-        )
-        report.append((expired_domain.name, expired_domain.owner.email, expired_domain.expiry_date, ))
+            report.append((domain.name, domain.owner.email, Exception('not enough funds'), ))
+            users_on_low_balance.setdefault(domain.owner.email, (domain.owner, [], ))[1].append(domain.name)
+            logger.warn('not enough funds to auto-renew domain %r', domain.name)
+        elif domain.name in planned_names:
+            if dry_run:
+                report.append((domain.name, domain.owner.email, domain.expiry_date, ))
+            else:
+                report.append(results[domain.name])
 
-    for one_user_email, user_domain_names in users_on_low_balance.items():
-        one_user = zusers.find_account(one_user_email)
+    for one_user, user_domain_names in users_on_low_balance.values():
         recent_low_balance_notification = one_user.notifications.filter(
             subject='low_balance',
             created_at__gte=(moment_now - datetime.timedelta(days=30)),
@@ -196,6 +230,8 @@ def auto_renew_expiring_domains(dry_run=True, min_days_before_expire=60, max_day
             continue
         notifications.start_email_notification_low_balance(one_user, expiring_domains_list=user_domain_names)
 
+    logger.info('auto-renew finished: %d planned, %d on low balance, %d candidates in total',
+                len(planned_domains), len(low_balance_domains), len(candidate_domains))
     return report
 
 
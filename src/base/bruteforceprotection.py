@@ -1,5 +1,8 @@
+import time
 import logging
+import threading
 
+from django.conf import settings
 from django.core.cache import cache
 
 from base.exceptions import ExceededMaxAttemptsException
@@ -7,6 +10,10 @@ from base.exceptions import ExceededMaxAttemptsException
 
 logger = logging.getLogger(__name__)
 
+# keys which are already blocked, known to the current process: cache_key -> moment when block ends
+_BlockedKeys = {}
+_BlockedKeysLock = threading.Lock()
+
 
 class BruteForceProtection(object):
 
@@ -22,16 +29,58 @@ class BruteForceProtection(object):
         return self._local_value if self._local_value else 0
 
     def increase_total_attempts(self):
-        self.read_total_attempts()
-        if not self._local_value:
-            self._local_value = 0
-        self._local_value += 1
-        cache.set(self.cache_key, self._local_value, timeout=self.timeout)
+        """
+        Atomically increments the counter, only one cache request is made when the counter already exists.
+        """
+        try:
+            self._local_value = cache.incr(self.cache_key)
+        except ValueError:
+            # counter not exist yet or already expired
+            if cache.add(self.cache_key, 1, timeout=self.timeout):
+                self._local_value = 1
+            else:
+                # another request just created the counter
+                try:
+                    self._local_value = cache.incr(self.cache_key)
+                except ValueError:
+                    # cache is not available
+                    self._local_value = 1
         logger.debug('bruteforceprotection.increase_total_attempts key=%r %r', self.cache_key, self._local_value)
         return self._local_value
 
     def register_attempt(self):
-        total_attempts = self.read_total_attempts()
-        if total_attempts >= self.max_attempts:
+        if self.is_blocked_locally():
+            raise ExceededMaxAttemptsException
+        total_attempts = self.increase_total_attempts()
+        if total_attempts > self.max_attempts:
+            self.block_locally()
             raise ExceededMaxAttemptsException
-        self.increase_total_attempts()
+
+    def is_blocked_locally(self):
+        if not settings.BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED:
+            return False
+        blocked_until = _BlockedKeys.get(self.cache_key)
+        if blocked_until is None:
+            return False
+        if blocked_until > time.monotonic():
+            return True
+        with _BlockedKeysLock:
+            _BlockedKeys.pop(self.cache_key, None)
+        return False
+
+    def block_locally(self):
+        """
+        Remembers blocked key in the current process, so next attempts are not going to the cache at all.
+        Key is blocked locally not longer than `BRUTE_FORCE_PROTECTION_LOCAL_CACHE_SECONDS`, because
+        the counter in the cache could expire earlier than `timeout` seconds from now.
+        """
+        if not settings.BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED:
+            return
+        now = time.monotonic()
+        with _BlockedKeysLock:
+            if len(_BlockedKeys) >= settings.BRUTE_FORCE_PROTECTION_LOCAL_CACHE_MAX_KEYS:
+                for cache_key in [k for k, v in _BlockedKeys.items() if v <= now]:
+                    _BlockedKeys.pop(cache_key)
+                if len(_BlockedKeys) >= settings.BRUTE_FORCE_PROTECTION_LOCAL_CACHE_MAX_KEYS:
+                    return
+            _BlockedKeys[self.cache_key] = now + min(self.timeout, settings.BRUTE_FORCE_PROTECTION_LOCAL_CACHE_SECONDS)
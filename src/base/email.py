@@ -5,8 +5,10 @@ from django.core.mail import EmailMultiAlternatives
 logger = logging.getLogger(__name__)
 
 
-def send_email(subject, text_content, from_email, to_email, html_content=None, ):
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to=[to_email, ], bcc=[to_email, ], cc=[to_email, ])
+def send_email(subject, text_content, from_email, to_email, html_content=None, connection=None, ):
+    msg = EmailMultiAlternatives(subject, text_content, from_email, to=[to_email, ], connection=connection)
+    if html_content:
+        msg.attach_alternative(html_content, 'text/html')
     try:
         msg.send()
     except:
@@ -0,0 +1,30 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing import orders
+
+from zen import zusers
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Exports receipt for all orders of given user finished during few years into PDF file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', type=str, required=True)
+        parser.add_argument('--year', type=int, required=True, help='first year of the period')
+        parser.add_argument('--year_till', type=int, required=True, help='last year of the period')
+        parser.add_argument('--output', type=str, required=True, help='path to the PDF file to be created')
+
+    def handle(self, email, year, year_till, output, *args, **options):
+        owner = zusers.find_account(email)
+        if not owner:
+            raise CommandError('account %r not found' % email)
+        exported = orders.export_receipts(owner=owner, year=year, year_till=year_till, output_path=output)
+        if not exported:
+            self.stdout.write('no finished orders found for %s during %d-%d' % (email, year, year_till, ))
+            return
+        self.stdout.write('%d orders exported into %s' % (exported, output, ))
@@ -1,23 +1,20 @@
 import logging
-import os
-import calendar
 from datetime import timedelta
 
-import pdfkit  # @UnresolvedImport
-
 from django import shortcuts
 from django.conf import settings
 from django.db.models import Q
 from django.utils import timezone
 from django.core.exceptions import SuspiciousOperation
-from django.template.loader import get_template
 
 from billing import exceptions
+from billing import receipts
 from billing.models.order import Order
 from billing.models.order_item import OrderItem
 
 from zen import zdomains, zcontacts
 from zen import zmaster
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -116,11 +113,19 @@ def list_orders_by_date(owner, year, month=None, exclude_cancelled=False):
     return list(orders.all())
 
 
-def list_processed_orders_by_date_for_specific_user(owner, year, month=None):
+def list_processed_orders_by_date_for_specific_user(owner, year, month=None, year_till=None):
     """
-    List only processed orders by date for given user.
+    List only processed orders by date for given user together with their items.
+    When `year_till` is given all orders finished from `year` till `year_till` are selected.
     """
-    if year and month:
+    if year and year_till:
+        orders = Order.orders.filter(
+            owner=owner,
+            finished_at__year__gte=year,
+            finished_at__year__lte=year_till,
+            status='processed',
+        ).order_by('-finished_at')
+    elif year and month:
         orders = Order.orders.filter(
             owner=owner,
             finished_at__year=year,
@@ -138,7 +143,7 @@ def list_processed_orders_by_date_for_specific_user(owner, year, month=None):
             owner=owner,
             status='processed',
         ).order_by('-finished_at')
-    return list(orders.all())
+    return list(orders.prefetch_related('items').all())
 
 
 def list_all_processed_orders_by_date(year, month=None):
@@ -175,6 +180,23 @@ def find_pending_domain_renew_order_items(domain_name):
     ).all())
 
 
+def find_pending_domain_renew_names(domain_names, chunk_size=500):
+    """
+    Same as `find_pending_domain_renew_order_items()`, but checks many domains at once.
+    Returns set of domain names which already have not processed renew order items.
+    """
+    domain_names = list(domain_names)
+    result = set()
+    for pos in range(0, len(domain_names), chunk_size):
+        result.update(OrderItem.order_items.filter(
+            type='domain_renew',
+            name__in=domain_names[pos:pos + chunk_size],
+        ).exclude(
+            status__in=['processed', ],
+        ).values_list('name', flat=True))
+    return result
+
+
 def find_latest_processed_domain_restore_order(domain_name):
     """
     Find most recent Order object for given domain name with completed domain_restore OrderItems.
@@ -195,6 +217,17 @@ def find_pending_domain_transfer_order_items(domain_name):
     ).all())
 
 
+def find_active_domain_transfer_order_items(domain_name):
+    """
+    Find OrderItem objects for domain transfer order for given domain which are being executed or waiting for approval.
+    """
+    return list(OrderItem.order_items.filter(
+        type='domain_transfer',
+        name=domain_name,
+        status__in=['executing', 'pending', ],
+    ).all())
+
+
 def prepare_register_renew_restore_item(domain_object):
     """
     Prepare required info to be able to construct OrderItem object from given Domain object.
@@ -543,6 +576,11 @@ def execute_one_item(order_item):
         update_order_item(order_item, new_status='failed', charge_user=False, save=True, details={'error': str(e), })
         return False
 
+    finally:
+        if order_item.type in ('domain_register', 'domain_transfer', 'domain_restore', ):
+            # domain status on the back-end was probably changed, result of domain check must be refreshed
+            zcache.invalidate_domain_availability(order_item.name)
+
     logger.critical('order item %r has a wrong type' % order_item)
     return False
 
@@ -659,46 +697,36 @@ def build_receipt(owner, year=None, month=None, order_id=None):
             return None
         order_objects.append(order_object)
         receipt_period = order_object.finished_at.strftime('%B %Y')
+        period_key = 'order_{}'.format(order_object.id)
+        # finished order is never changed
+        cacheable = True
     else:
         order_objects = list_processed_orders_by_date_for_specific_user(owner=owner, year=year, month=month)
         if not order_objects:
             return None
-        if year and month:
-            month_label = calendar.month_name[int(month)]
-            receipt_period = f'{year} {month_label}'
-        elif year:
-            receipt_period = f'{year}'
+        if year:
+            receipt_period = receipts.period_label(year=year, month=month)
         else:
             receipt_period = order_objects[-1].finished_at.strftime('%B %Y')
+        period_key = '{}_{}'.format(year or 'all', month or 'all')
+        cacheable = receipts.is_period_closed(year=year, month=month)
 
-    domain_orders = []
-    total_price = 0
-    for order in order_objects:
-        for order_item in order.items.all():
-            domain_orders.append({
-                'domain_name': order_item.name,
-                'transaction_date': order.finished_at.strftime('%d %B %Y'),
-                'transaction_type': order_item.get_type_display().replace('Domain ', ''),
-                'duration': int(order_item.duration or settings.ZENAIDA_DOMAIN_RENEW_YEARS),
-                'price': int(order_item.price)
-            })
-            total_price += int(order_item.price)
-
-    # Fill html template with the domain orders and user profile info
-    html_template = get_template('billing/billing_receipt.html')
-    rendered_html = html_template.render({
-        'domain_orders': domain_orders,
-        'user_profile': owner.profile,
-        'total_price': total_price,
-        'receipt_period': receipt_period
-    })
-
-    # Create pdf file from a html file
-    pdfkit.from_string(rendered_html, '/tmp/out.pdf')
-    with open("/tmp/out.pdf", "rb") as pdf_file:
-        pdf_raw = pdf_file.read()
-    os.remove("/tmp/out.pdf")
+    rendered_html = receipts.render_receipt_html(owner, order_objects, receipt_period)
     return {
-        'body': pdf_raw,
+        'body': receipts.render_receipt_pdf(owner, period_key, rendered_html, cacheable=cacheable),
         'filename': '{}_receipt.pdf'.format(receipt_period.replace(' ', '_')),
     }
+
+
+def export_receipts(owner, year, year_till, output_path):
+    """
+    Writes single receipt for all orders finished during given years directly into `output_path` file.
+    Returns number of exported orders, nothing is written if there are no orders in that period.
+    """
+    order_objects = list_processed_orders_by_date_for_specific_user(owner=owner, year=year, year_till=year_till)
+    if not order_objects:
+        return 0
+    rendered_html = receipts.render_receipt_html(owner, order_objects, receipts.period_label(year=year, year_till=year_till))
+    receipts.render_pdf(rendered_html, output_path=output_path)
+    logger.info('exported %d orders of %r for %s-%s into %r', len(order_objects), owner, year, year_till, output_path)
+    return len(order_objects)
@@ -1,13 +1,11 @@
-import os
 import string
 import random
 
-import pdfkit  # @UnresolvedImport
-
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
 from django.template.loader import get_template
 
+from billing import receipts
 from billing.models.payment import Payment
 
 
@@ -122,12 +120,7 @@ def build_invoice(payment_object):
         'payment': payment_object,
         'user_profile': payment_object.owner.profile,
     })
-    # Create pdf file from a html file
-    pdfkit.from_string(rendered_html, '/tmp/out.pdf')
-    with open("/tmp/out.pdf", "rb") as pdf_file:
-        pdf_raw = pdf_file.read()
-    os.remove("/tmp/out.pdf")
     return {
-        'body': pdf_raw,
+        'body': receipts.render_pdf(rendered_html),
         'filename': 'invoice_{}.pdf'.format(payment_object.transaction_id),
     }
@@ -0,0 +1,94 @@
+"""
+Rendering of receipts and invoices in PDF format.
+
+PDF documents are produced by `wkhtmltopdf` directly into memory, or into the given file,
+so concurrent downloads never share any temporary files.
+
+Receipts for periods which are already closed can not change anymore, such documents are cached.
+Cache key includes owner, period and hash of the rendered HTML, so any change in the template or in the
+user profile produces a new document.
+"""
+
+import hashlib
+import logging
+import calendar
+
+import pdfkit  # @UnresolvedImport
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def render_pdf(rendered_html, output_path=None):
+    """
+    Converts HTML into PDF document and returns its content,
+    when `output_path` is given the document is written into that file instead and True is returned.
+    """
+    if output_path:
+        return pdfkit.from_string(rendered_html, output_path)
+    return pdfkit.from_string(rendered_html, False)
+
+
+def period_label(year=None, month=None, year_till=None):
+    if year and year_till:
+        return f'{year} - {year_till}'
+    if year and month:
+        return f'{year} {calendar.month_name[int(month)]}'
+    return f'{year}'
+
+
+def is_period_closed(year=None, month=None, year_till=None, now=None):
+    """
+    Returns True if no more orders can be finished inside of given period.
+    """
+    now = now or timezone.now()
+    if not year:
+        return False
+    if month:
+        return (int(year), int(month), ) < (now.year, now.month, )
+    return int(year_till or year) < now.year
+
+
+def render_receipt_html(owner, order_objects, receipt_period):
+    domain_orders = []
+    total_price = 0
+    for order in order_objects:
+        for order_item in order.items.all():
+            domain_orders.append({
+                'domain_name': order_item.name,
+                'transaction_date': order.finished_at.strftime('%d %B %Y'),
+                'transaction_type': order_item.get_type_display().replace('Domain ', ''),
+                'duration': int(order_item.duration or settings.ZENAIDA_DOMAIN_RENEW_YEARS),
+                'price': int(order_item.price)
+            })
+            total_price += int(order_item.price)
+    return get_template('billing/billing_receipt.html').render({
+        'domain_orders': domain_orders,
+        'user_profile': owner.profile,
+        'total_price': total_price,
+        'receipt_period': receipt_period
+    })
+
+
+def render_receipt_pdf(owner, period_key, rendered_html, cacheable):
+    """
+    Returns PDF document for the rendered receipt, takes it from the cache when possible.
+    """
+    if not cacheable or not settings.ZENAIDA_BILLING_RECEIPT_CACHE_TTL_SECONDS:
+        return render_pdf(rendered_html)
+    cache_key = 'zenaida_receipt_{}_{}_{}'.format(
+        owner.pk, period_key, hashlib.sha256(rendered_html.encode('utf-8')).hexdigest(), )
+    pdf_raw = cache.get(cache_key)
+    if pdf_raw is not None:
+        return pdf_raw
+    pdf_raw = render_pdf(rendered_html)
+    if len(pdf_raw) <= settings.ZENAIDA_BILLING_RECEIPT_CACHE_MAX_SIZE:
+        try:
+            cache.set(cache_key, pdf_raw, settings.ZENAIDA_BILLING_RECEIPT_CACHE_TTL_SECONDS)
+        except Exception as exc:
+            logger.warning('failed to cache receipt %r: %r', cache_key, exc)
+    return pdf_raw
@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from nested_admin import NestedModelAdmin  # @UnresolvedImport
 
+from board.models.bulk_transfer import BulkTransfer
 from board.models.csv_file_sync import CSVFileSync
 
 
@@ -9,4 +10,9 @@ class CSVFileSyncAdmin(NestedModelAdmin):
     pass
 
 
+class BulkTransferAdmin(NestedModelAdmin):
+    list_display = ('id', 'created_at', 'new_owner', 'status', 'total_count', 'processed_count', 'succeeded_count', )
+
+
 admin.site.register(CSVFileSync, CSVFileSyncAdmin)
+admin.site.register(BulkTransfer, BulkTransferAdmin)
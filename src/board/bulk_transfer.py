@@ -0,0 +1,277 @@
+"""
+Transfers many domains to one account in background, used by the bulk transfer page of the board.
+
+Every pasted line is stored as a `BulkTransferItem` and the job is executed by the `bulk_transfer_worker`
+management command. Domains are verified on the back-end by few threads at the same time,
+orders are created and executed one by one, because they are all charged from the balance of the same account.
+Every item is claimed by the worker with a conditional status update and the created order is stored on the item
+before it is executed, so a job interrupted in the middle can be safely started again without ordering a domain twice.
+"""
+
+import time
+import logging
+import datetime
+import threading
+import concurrent.futures
+
+from django import db
+from django.db import transaction
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounts.models.account import Account
+
+from billing import orders
+
+from board.models.bulk_transfer import BulkTransfer, BulkTransferItem
+
+from epp import rpc_error
+
+from zen import zdomains
+from zen import zmaster
+
+logger = logging.getLogger(__name__)
+
+
+def parse_line(line):
+    """
+    Returns tuple `(domain_name, auth_code)` from the input line, or None if the line is not valid.
+    """
+    line = line.strip()
+    for separator in (',', ';', '|', ' ', ):
+        if line.count(separator):
+            domain_name, _, auth_code = line.partition(separator)
+            return domain_name.strip().lower(), auth_code.strip()
+    return None
+
+
+def create(new_owner, body):
+    """
+    Creates new job from the list of domains and auth codes, repeated domains are only added once.
+    """
+    bulk_transfer = BulkTransfer.transfers.create(new_owner=new_owner)
+    items = []
+    for line in body.split('\n'):
+        if not line.strip():
+            continue
+        parsed = parse_line(line)
+        if not parsed:
+            items.append(BulkTransferItem(bulk_transfer=bulk_transfer, domain_name=line.strip()[:255], status='failed', result='invalid input line'))
+            continue
+        items.append(BulkTransferItem(bulk_transfer=bulk_transfer, domain_name=parsed[0], auth_code=parsed[1]))
+    BulkTransferItem.bulk_transfer_items.bulk_create(items, ignore_conflicts=True)
+    total = bulk_transfer.items.count()
+    invalid = bulk_transfer.items.filter(status='failed').count()
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(total_count=total, processed_count=invalid)
+    bulk_transfer.refresh_from_db()
+    return bulk_transfer
+
+
+def validate(domain_name, auth_code, new_owner):
+    """
+    Verifies the domain on the back-end, returns tuple `(error, price, internal)`.
+    """
+    domain_obj = zdomains.domain_find(domain_name=domain_name)
+    if not domain_obj:
+        return 'domain does not exist', None, None
+    if domain_obj.owner_id == new_owner.pk:
+        return 'domain is already owned by %r' % new_owner, None, None
+    outputs = zmaster.domain_read_info(
+        domain=domain_name,
+        auth_info=auth_code,
+        return_outputs=True,
+    )
+    if not outputs:
+        return 'domain name is not registered or transfer is not possible at the moment', None, None
+    if isinstance(outputs[-1], rpc_error.EPPAuthorizationError):
+        if outputs[-1].message.lower().count('incorrect authcode provided'):
+            return 'incorrect authorization code provided', None, None
+        return 'you are not authorized to transfer this domain', None, None
+    if isinstance(outputs[-1], rpc_error.EPPAuthorizationInvalidError):
+        if outputs[-1].message.lower().count('invalid authorization information'):
+            return 'invalid authorization information provided', None, None
+        return 'you are not authorized to transfer this domain', None, None
+    if isinstance(outputs[-1], rpc_error.EPPObjectNotExist):
+        return 'domain name is not registered', None, None
+    if isinstance(outputs[-1], rpc_error.EPPError):
+        return 'domain transfer failed due to unexpected error, please try again later', None, None
+    if not outputs[-1].get(domain_name):
+        return 'domain name is not registered', None, None
+    if len(outputs) < 2:
+        return 'domain name transfer is not possible at the moment, please try again later', None, None
+    info = outputs[-2]
+    current_registrar = info['epp']['response']['resData']['infData']['clID']
+    internal = current_registrar.lower() == settings.ZENAIDA_REGISTRAR_ID.lower()
+    current_statuses = info['epp']['response']['resData']['infData']['status']
+    current_statuses = [current_statuses, ] if not isinstance(current_statuses, list) else current_statuses
+    current_statuses = [s['@s'] for s in current_statuses]
+    pw = info['epp']['response']['resData']['infData']['authInfo']['pw']
+    if pw != 'Authinfo Correct' and pw != auth_code:
+        return 'given transfer code is not correct', None, None
+    if 'clientTransferProhibited' in current_statuses or 'serverTransferProhibited' in current_statuses:
+        return 'transfer failed because domain was locked or auth code was wrong', None, None
+    if current_registrar.lower() in [settings.ZENAIDA_AUCTION_REGISTRAR_ID.lower(), settings.ZENAIDA_REGISTRAR_ID.lower()]:
+        price = 0.0
+    else:
+        price = settings.ZENAIDA_DOMAIN_PRICE
+    return None, price, internal
+
+
+def claim_item(item):
+    """
+    Marks pending item as "executing", returns False if the item was already taken by another worker.
+    """
+    claimed = BulkTransferItem.bulk_transfer_items.filter(pk=item.pk, status='pending', order__isnull=True).update(status='executing')
+    if not claimed:
+        return False
+    BulkTransfer.transfers.filter(pk=item.bulk_transfer_id).update(updated_at=timezone.now())
+    return True
+
+
+def execute_item(item, new_owner_id, orders_lock):
+    """
+    Verifies and transfers one domain, returns tuple `(succeeded, result)`.
+    When another worker already created an order for that item `succeeded` is None.
+    """
+    new_owner = Account.users.get(pk=new_owner_id)
+    error, price, internal = validate(item.domain_name, item.auth_code, new_owner)
+    if error:
+        return False, error
+    with orders_lock:
+        # balance and pending orders must be checked right before the order is created
+        new_owner.refresh_from_db()
+        if len(orders.find_active_domain_transfer_order_items(item.domain_name)):
+            return False, 'domain transfer is already in progress'
+        if price > new_owner.balance:
+            return False, 'account %r does not have enough funds to complete domain transfer' % new_owner
+        with transaction.atomic():
+            # the row lock makes sure only one worker creates an order for the item
+            locked_item = BulkTransferItem.bulk_transfer_items.select_for_update().get(pk=item.pk)
+            if locked_item.order_id:
+                return None, 'order %r was already created for that domain' % locked_item.order_id
+            transfer_order = orders.order_single_item(
+                owner=new_owner,
+                item_type='domain_transfer',
+                item_price=price,
+                item_name=item.domain_name,
+                item_details={
+                    'transfer_code': item.auth_code,
+                    'rewrite_contacts': True,
+                    'internal': internal,
+                },
+                item_duration=None,
+            )
+            BulkTransferItem.bulk_transfer_items.filter(pk=item.pk).update(order=transfer_order)
+    new_status = orders.execute_order(transfer_order)
+    return new_status == 'processed', 'created and executed %r, order status is %r' % (transfer_order, new_status, )
+
+
+def _process_item(bulk_transfer, item, orders_lock, close_db_connection=False):
+    try:
+        if not claim_item(item):
+            logger.info('bulk transfer of %r skipped, item was already taken', item.domain_name)
+            return None
+        try:
+            succeeded, result = execute_item(item, bulk_transfer.new_owner_id, orders_lock)
+        except Exception as exc:
+            logger.exception('bulk transfer of %r failed', item.domain_name)
+            succeeded, result = False, 'domain transfer failed due to unexpected error: %r' % exc
+        if succeeded is None:
+            logger.info('bulk transfer of %r skipped: %s', item.domain_name, result)
+            return None
+        BulkTransferItem.bulk_transfer_items.filter(pk=item.pk).update(
+            status='succeeded' if succeeded else 'failed',
+            result=result,
+        )
+        BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(
+            processed_count=F('processed_count') + 1,
+            succeeded_count=F('succeeded_count') + (1 if succeeded else 0),
+            updated_at=timezone.now(),
+        )
+        logger.info('bulk transfer of %r: %s', item.domain_name, result)
+        return succeeded
+    finally:
+        if close_db_connection:
+            db.connection.close()
+
+
+def execute(bulk_transfer, workers=None):
+    """
+    Processes all pending items of the job, at most `workers` domains are verified on the back-end at the same time.
+    """
+    workers = workers or settings.ZENAIDA_BULK_TRANSFER_WORKERS
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(status='started', updated_at=timezone.now())
+    items = list(bulk_transfer.items.filter(status='pending').order_by('pk'))
+    orders_lock = threading.Lock()
+    started = time.time()
+    try:
+        if workers > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda item: _process_item(bulk_transfer, item, orders_lock, close_db_connection=True), items))
+        else:
+            for item in items:
+                _process_item(bulk_transfer, item, orders_lock)
+    except Exception:
+        logger.exception('bulk transfer %r failed', bulk_transfer)
+        BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(status='failed', updated_at=timezone.now())
+        bulk_transfer.refresh_from_db()
+        return False
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(status='finished', updated_at=timezone.now())
+    bulk_transfer.refresh_from_db()
+    logger.info('bulk transfer %r finished in %.3f seconds', bulk_transfer, time.time() - started)
+    return True
+
+
+def build_report(bulk_transfer):
+    return ''.join(('[%s] %s' % (item.domain_name, item.result, )).strip() + '\n' for item in bulk_transfer.items.order_by('pk'))
+
+
+def claim_next():
+    """
+    Marks the oldest pending job as started and returns it, returns None if there are no pending jobs.
+    """
+    for bulk_transfer in BulkTransfer.transfers.filter(status='pending').order_by('pk')[:10]:
+        if BulkTransfer.transfers.filter(pk=bulk_transfer.pk, status='pending').update(status='started', updated_at=timezone.now()):
+            bulk_transfer.refresh_from_db()
+            return bulk_transfer
+    return None
+
+
+def restart_stale_jobs(stale_seconds=None):
+    """
+    Jobs which are "started" but were not updated for a long time were interrupted,
+    they are started again and only not yet processed domains will be transferred.
+    Items which were "executing" are also taken again, unless an order was already created for them.
+    """
+    stale_seconds = stale_seconds or settings.ZENAIDA_BULK_TRANSFER_STALE_SECONDS
+    moment = timezone.now() - datetime.timedelta(seconds=stale_seconds)
+    stale_jobs = BulkTransfer.transfers.filter(Q(updated_at__lt=moment) | Q(updated_at__isnull=True), status='started')
+    stale_job_ids = list(stale_jobs.values_list('pk', flat=True))
+    if not stale_job_ids:
+        return 0
+    BulkTransferItem.bulk_transfer_items.filter(
+        bulk_transfer_id__in=stale_job_ids,
+        status='executing',
+        order__isnull=True,
+    ).update(status='pending')
+    count = BulkTransfer.transfers.filter(pk__in=stale_job_ids, status='started').update(status='pending')
+    if count:
+        logger.warning('%d interrupted bulk transfer jobs will be started again', count)
+    return count
+
+
+def run_worker(delay=5, iterations=None, workers=None):
+    """
+    Executes pending jobs one by one, runs forever by default.
+    """
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        iteration += 1
+        restart_stale_jobs()
+        bulk_transfer = claim_next()
+        if not bulk_transfer:
+            time.sleep(delay)
+            continue
+        logger.info('starting bulk transfer %r', bulk_transfer)
+        execute(bulk_transfer, workers=workers)
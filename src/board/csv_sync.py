@@ -0,0 +1,174 @@
+"""
+Runs `CSVFileSync` jobs uploaded from the board.
+
+Uploaded files are queued with "pending" status and executed one by one by the `csv_import_worker`
+management command. Log lines of the running job are written in batches into a rotating log file placed next to
+the input file, `processed_count` is updated after every imported chunk, so the board page can show the progress.
+"""
+
+import os
+import time
+import logging
+import datetime
+import logging.handlers
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from back.csv_import import load_from_csv
+
+from board.models.csv_file_sync import CSVFileSync
+
+logger = logging.getLogger(__name__)
+
+
+def _log_loggers():
+    """
+    Root logger receives all messages, except loggers which are not propagating messages.
+    """
+    loggers = [logging.getLogger(), ]
+    for one_logger in list(logging.root.manager.loggerDict.values()):  # @UndefinedVariable
+        if isinstance(one_logger, logging.Logger) and not one_logger.propagate:
+            loggers.append(one_logger)
+    return loggers
+
+
+class JobLog(object):
+    """
+    Captures log messages of all loggers into a rotating file while the job is running.
+    """
+
+    def __init__(self, log_filename):
+        self.log_filename = log_filename
+        self.file_handler = logging.handlers.RotatingFileHandler(
+            log_filename,
+            maxBytes=settings.ZENAIDA_CSV_IMPORT_LOG_MAX_BYTES,
+            backupCount=settings.ZENAIDA_CSV_IMPORT_LOG_BACKUP_COUNT,
+        )
+        self.file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        self.handler = logging.handlers.MemoryHandler(
+            capacity=settings.ZENAIDA_CSV_IMPORT_LOG_BATCH_SIZE,
+            flushLevel=logging.ERROR,
+            target=self.file_handler,
+        )
+        self.loggers = []
+
+    def __enter__(self):
+        self.loggers = _log_loggers()
+        for one_logger in self.loggers:
+            one_logger.addHandler(self.handler)
+        return self
+
+    def __exit__(self, *args):
+        for one_logger in self.loggers:
+            one_logger.removeHandler(self.handler)
+        self.handler.close()
+        self.file_handler.close()
+
+    def flush(self):
+        self.handler.flush()
+
+
+def read_log_tail(csv_sync_record, max_bytes=None):
+    """
+    Returns last lines of the job log, for old records the whole `output_log` is returned.
+    """
+    max_bytes = max_bytes or settings.ZENAIDA_CSV_IMPORT_LOG_TAIL_BYTES
+    if not csv_sync_record.log_filename or not os.path.isfile(csv_sync_record.log_filename):
+        return csv_sync_record.output_log
+    with open(csv_sync_record.log_filename, 'rb') as log_file:
+        log_file.seek(0, os.SEEK_END)
+        size = log_file.tell()
+        log_file.seek(max(0, size - max_bytes))
+        tail = log_file.read().decode('utf-8', errors='replace')
+    if size > max_bytes:
+        # first line is most likely incomplete
+        tail = tail.partition('\n')[2]
+    return tail
+
+
+def enqueue(input_filename, dry_run):
+    return CSVFileSync.executions.create(input_filename=input_filename, dry_run=dry_run, status='pending')
+
+
+def claim_next():
+    """
+    Marks the oldest pending job as started and returns it, returns None if there are no pending jobs.
+    """
+    for csv_sync_record in CSVFileSync.executions.filter(status='pending').order_by('pk')[:10]:
+        if CSVFileSync.executions.filter(pk=csv_sync_record.pk, status='pending').update(status='started', updated_at=timezone.now()):
+            csv_sync_record.refresh_from_db()
+            return csv_sync_record
+    return None
+
+
+def fail_stale_jobs(stale_seconds=None):
+    """
+    Jobs which are "started" but were not updated for a long time were interrupted, marks them as failed.
+    """
+    stale_seconds = stale_seconds or settings.ZENAIDA_CSV_IMPORT_STALE_SECONDS
+    moment = timezone.now() - datetime.timedelta(seconds=stale_seconds)
+    stale = CSVFileSync.executions.filter(Q(updated_at__lt=moment) | Q(updated_at__isnull=True), status='started')
+    count = stale.update(status='failed')
+    if count:
+        logger.warning('%d interrupted csv import jobs marked as failed', count)
+    return count
+
+
+def execute(csv_sync_record, start_row=1, chunk_size=None, workers=None, sync_workers=None):
+    """
+    Imports the input file of the job, returns True if the import was finished successfully.
+    """
+    filename = os.path.expanduser(csv_sync_record.input_filename)
+    if not os.path.isfile(filename):
+        CSVFileSync.executions.filter(pk=csv_sync_record.pk).update(
+            status='failed', output_log='File not found "%s"' % filename, updated_at=timezone.now())
+        return False
+    log_filename = filename + '.log'
+    CSVFileSync.executions.filter(pk=csv_sync_record.pk).update(
+        status='started', log_filename=log_filename, updated_at=timezone.now())
+    started = time.time()
+    with JobLog(log_filename) as job_log:
+
+        def _progress(row_number, stats):
+            job_log.flush()
+            CSVFileSync.executions.filter(pk=csv_sync_record.pk).update(processed_count=row_number, updated_at=timezone.now())
+
+        try:
+            import_results = load_from_csv(
+                filename,
+                dry_run=csv_sync_record.dry_run,
+                sync_after=True,
+                start_row=start_row,
+                chunk_size=chunk_size,
+                workers=workers,
+                sync_workers=sync_workers,
+                progress=_progress,
+            )
+        except Exception:
+            logger.exception('csv import job %r failed', csv_sync_record)
+            import_results = -1
+        logger.info('csv import job %r finished with result %r in %.3f seconds', csv_sync_record, import_results, time.time() - started)
+    updates = dict(status='finished' if import_results >= 0 else 'failed', updated_at=timezone.now())
+    if import_results >= 0:
+        updates['processed_count'] = import_results
+    CSVFileSync.executions.filter(pk=csv_sync_record.pk).update(**updates)
+    csv_sync_record.refresh_from_db()
+    return import_results >= 0
+
+
+def run_worker(delay=5, iterations=None, **kwargs):
+    """
+    Executes pending jobs one by one, runs forever by default.
+    """
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        iteration += 1
+        fail_stale_jobs()
+        csv_sync_record = claim_next()
+        if not csv_sync_record:
+            time.sleep(delay)
+            continue
+        logger.info('starting csv import job %r', csv_sync_record)
+        execute(csv_sync_record, **kwargs)
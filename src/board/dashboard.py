@@ -43,6 +43,11 @@ class CustomIndexDashboard(Dashboard):
                     'url': reverse('csv_file_sync'),
                     'external': False,
                 },
+                {
+                    'title': _('State machines timings'),
+                    'url': reverse('automats_timings'),
+                    'external': False,
+                },
                 {
                     'title': _('Send a testing e-mail'),
                     'url': reverse('sending_single_email'),
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='csvfilesync',
+            name='status',
+            field=models.CharField(choices=[('pending', 'PENDING'), ('started', 'STARTED'), ('finished', 'FINISHED'), ('failed', 'FAILED')], default='started', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='log_filename',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
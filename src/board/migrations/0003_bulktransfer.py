@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('billing', '0022_auto_20260308_1127'),
+        ('board', '0002_csvfilesync_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkTransfer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('started', 'STARTED'), ('finished', 'FINISHED'), ('failed', 'FAILED')], default='pending', max_length=10)),
+                ('total_count', models.IntegerField(default=0)),
+                ('processed_count', models.IntegerField(default=0)),
+                ('succeeded_count', models.IntegerField(default=0)),
+                ('new_owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'base_manager_name': 'transfers',
+                'default_manager_name': 'transfers',
+            },
+            managers=[
+                ('transfers', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BulkTransferItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain_name', models.CharField(max_length=255)),
+                ('auth_code', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('executing', 'EXECUTING'), ('succeeded', 'SUCCEEDED'), ('failed', 'FAILED')], default='pending', max_length=10)),
+                ('result', models.TextField(blank=True, default='')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_transfer_items', to='billing.order')),
+                ('bulk_transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='board.bulktransfer')),
+            ],
+            options={
+                'base_manager_name': 'bulk_transfer_items',
+                'default_manager_name': 'bulk_transfer_items',
+                'unique_together': {('bulk_transfer', 'domain_name')},
+            },
+            managers=[
+                ('bulk_transfer_items', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db import models
+
+from accounts.models.account import Account
+
+from billing.models.order import Order
+
+
+class BulkTransfer(models.Model):
+
+    transfers = models.Manager()
+
+    class Meta:
+        app_label = 'board'
+        base_manager_name = 'transfers'
+        default_manager_name = 'transfers'
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    updated_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    new_owner = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='bulk_transfers')
+
+    status = models.CharField(
+        max_length=10,
+        choices=(
+            ('pending', 'PENDING', ),
+            ('started', 'STARTED', ),
+            ('finished', 'FINISHED', ),
+            ('failed', 'FAILED', ),
+        ),
+        default='pending',
+    )
+
+    total_count = models.IntegerField(default=0)
+
+    processed_count = models.IntegerField(default=0)
+
+    succeeded_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return 'BulkTransfer({}:{} {}/{})'.format(self.pk, self.status, self.processed_count, self.total_count)
+
+    def __repr__(self):
+        return 'BulkTransfer({}:{} {}/{})'.format(self.pk, self.status, self.processed_count, self.total_count)
+
+
+class BulkTransferItem(models.Model):
+
+    bulk_transfer_items = models.Manager()
+
+    class Meta:
+        app_label = 'board'
+        base_manager_name = 'bulk_transfer_items'
+        default_manager_name = 'bulk_transfer_items'
+        unique_together = (('bulk_transfer', 'domain_name', ), )
+
+    bulk_transfer = models.ForeignKey(BulkTransfer, on_delete=models.CASCADE, related_name='items')
+
+    domain_name = models.CharField(max_length=255)
+
+    auth_code = models.CharField(max_length=255, blank=True, default='')
+
+    status = models.CharField(
+        max_length=10,
+        choices=(
+            ('pending', 'PENDING', ),
+            ('executing', 'EXECUTING', ),
+            ('succeeded', 'SUCCEEDED', ),
+            ('failed', 'FAILED', ),
+        ),
+        default='pending',
+    )
+
+    result = models.TextField(blank=True, default='')
+
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, related_name='bulk_transfer_items', null=True, blank=True)
+
+    def __str__(self):
+        return 'BulkTransferItem({}:{})'.format(self.domain_name, self.status)
+
+    def __repr__(self):
+        return 'BulkTransferItem({}:{})'.format(self.domain_name, self.status)
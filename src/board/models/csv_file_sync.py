@@ -21,6 +21,7 @@ class CSVFileSync(models.Model):
     status = models.CharField(
         max_length=10,
         choices=(
+            ('pending', 'PENDING', ),
             ('started', 'STARTED', ),
             ('finished', 'FINISHED', ),
             ('failed', 'FAILED', ),
@@ -32,6 +33,10 @@ class CSVFileSync(models.Model):
 
     processed_count = models.IntegerField(default=0)
 
+    log_filename = models.CharField(max_length=255, blank=True, default='')
+
+    updated_at = models.DateTimeField(null=True, blank=True, default=None)
+
     @property
     def filename(self):
         return os.path.basename(self.input_filename)
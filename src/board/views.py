@@ -1,21 +1,17 @@
 import os
-import sys
-import time
 import logging
 import tempfile
-import subprocess
 
 from django import shortcuts
 from django.conf import settings
 from django.contrib import messages
 from django.core.mail import EmailMultiAlternatives
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.db import transaction
-from django.urls import reverse, reverse_lazy
-from django.utils.safestring import mark_safe
+from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic.edit import FormView, FormMixin
-from django.views.generic import DetailView
+from django.views.generic import DetailView, TemplateView
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
@@ -24,15 +20,17 @@ from django_otp import devices_for_user
 from accounts.models import Account
 from accounts.users import list_all_users_by_date
 
+from automats import tracing
+
 from base.mixins import StaffRequiredMixin
 
 from billing import forms as billing_forms, payments
 from billing import orders
 
+from board import bulk_transfer
+from board import csv_sync
 from board import forms as board_forms
-from board.models import CSVFileSync
-
-from epp import rpc_error
+from board.models import BulkTransfer, CSVFileSync
 
 from zen import zmaster, zdomains
 
@@ -155,6 +153,22 @@ class CSVFileSyncRecordView(StaffRequiredMixin, DetailView):
     def get_object(self, queryset=None):
         return shortcuts.get_object_or_404(CSVFileSync, pk=self.kwargs.get('record_id'))
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['output_log'] = csv_sync.read_log_tail(self.object)
+        return context
+
+
+class CSVFileSyncProgressView(StaffRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        csv_sync_record = shortcuts.get_object_or_404(CSVFileSync, pk=kwargs.get('record_id'))
+        return JsonResponse({
+            'status': csv_sync_record.status,
+            'processed_count': csv_sync_record.processed_count,
+            'output_log': csv_sync.read_log_tail(csv_sync_record) if request.GET.get('log') else None,
+        })
+
 
 class CSVFileSyncView(StaffRequiredMixin, FormView):
     template_name = 'board/csv_file_sync.html'
@@ -174,25 +188,14 @@ class CSVFileSyncView(StaffRequiredMixin, FormView):
         if not form.is_valid():
             return self.form_invalid(form)
 
-        if CSVFileSync.executions.filter(status='started').exists():
-            messages.warning(self.request, 'Another background process is currently running, please wait before starting a new one.')
-            return self.form_invalid(form)
-
         started_records = []
 
         for f in files:
-            csv_sync_record = CSVFileSync.executions.create(
-                input_filename='',
-                dry_run=bool(form.data.get('dry_run', False)),
-            )
-
             fout, csv_file_path = tempfile.mkstemp(
                 suffix='.csv',
-                prefix='domains-%d-' % csv_sync_record.id,
+                prefix='domains-',
                 dir=settings.ZENAIDA_CSV_FILES_SYNC_FOLDER_PATH,
             )
-            csv_sync_record.input_filename = csv_file_path
-            csv_sync_record.save()
 
             logger.info('reading {}\n'.format(csv_file_path))
 
@@ -203,25 +206,33 @@ class CSVFileSyncView(StaffRequiredMixin, FormView):
                 os.write(fout, chunk)
             os.close(fout)
 
-            logger.info('file uploaded, new DB record created: %r', csv_sync_record)
-
-            subprocess.Popen(
-                '{} {} csv_import --record_id={} {}'.format(
-                    os.path.join(os.path.dirname(sys.executable), 'python'),
-                    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'manage.py')),
-                    csv_sync_record.id,
-                    '--dry_run' if form.data.get('dry_run', False) else '',
-                ),
-                close_fds=True,
-                shell=True,
+            # file must be completely written before the record is visible to the csv import worker
+            csv_sync_record = csv_sync.enqueue(
+                input_filename=csv_file_path,
+                dry_run=form.cleaned_data['dry_run'],
             )
+            logger.info('file uploaded, new DB record created: %r', csv_sync_record)
 
             started_records.append(csv_sync_record)
 
-        messages.success(self.request, f'New background process started: {started_records}')
+        messages.success(self.request, f'Files added to the import queue: {started_records}')
         return self.form_valid(form)
 
 
+class AutomatsTimingsView(StaffRequiredMixin, TemplateView):
+    template_name = 'board/automats_timings.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        data = tracing.read_all()
+        context['tracing_enabled'] = settings.ZENAIDA_AUTOMATS_TRACING_ENABLED
+        context['sections'] = [
+            ('Actions', tracing.report_rows(data, section='actions'), ),
+            ('States', tracing.report_rows(data, section='states'), ),
+        ]
+        return context
+
+
 class SendingSingleEmailView(StaffRequiredMixin, FormView, FormMixin):
     template_name = 'board/sending_single_email.html'
     form_class = board_forms.SendingSingleEmailForm
@@ -273,137 +284,57 @@ class AuthCodesDownloadView(StaffRequiredMixin, View):
 class BulkTransferResultDownloadView(StaffRequiredMixin, View):
 
     def dispatch(self, request, *args, **kwargs):
-        file_name = '%s.txt' % kwargs.get('file_id')
-        file_path = f'/tmp/{file_name}'
-        if not os.path.isfile(file_path):
-            messages.warning(request, "Invalid request, file not exist")
-            return shortcuts.redirect('index')
-        response = HttpResponse(open(file_path, 'rt').read(), content_type='text/plain')
+        bulk_transfer_obj = shortcuts.get_object_or_404(BulkTransfer, pk=kwargs.get('transfer_id'))
+        file_name = 'bulk_transfer_%d_%d_domains.txt' % (bulk_transfer_obj.pk, bulk_transfer_obj.total_count, )
+        response = HttpResponse(bulk_transfer.build_report(bulk_transfer_obj), content_type='text/plain')
         response['Content-Disposition'] = f'attachment; filename={file_name}'
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.exception(f'was not able to delete file {file_path}: {e}')
         return response
 
 
+class BulkTransferRecordView(StaffRequiredMixin, DetailView):
+    template_name = 'board/bulk_transfer_record.html'
+    context_object_name = 'bulk_transfer'
+
+    def get_object(self, queryset=None):
+        return shortcuts.get_object_or_404(BulkTransfer, pk=self.kwargs.get('transfer_id'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['report'] = bulk_transfer.build_report(self.object)
+        return context
+
+
+class BulkTransferProgressView(StaffRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        bulk_transfer_obj = shortcuts.get_object_or_404(BulkTransfer, pk=kwargs.get('transfer_id'))
+        return JsonResponse({
+            'status': bulk_transfer_obj.status,
+            'total_count': bulk_transfer_obj.total_count,
+            'processed_count': bulk_transfer_obj.processed_count,
+            'succeeded_count': bulk_transfer_obj.succeeded_count,
+            'report': bulk_transfer.build_report(bulk_transfer_obj) if request.GET.get('report') else None,
+        })
+
+
 class BulkTransferView(StaffRequiredMixin, FormView, FormMixin):
     template_name = 'board/bulk_transfer.html'
     form_class = board_forms.BulkTransferForm
     success_url = reverse_lazy('bulk_transfer')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['bulk_transfers'] = BulkTransfer.transfers.select_related('new_owner').order_by('-pk')[:50]
+        return context
+
     def form_valid(self, form):
         new_owner_email = form.cleaned_data.get('new_owner')
         body = form.cleaned_data.get('body')
         new_owner = Account.objects.filter(email=new_owner_email).first()
-        report = []
-        processed_count = 0
         if not new_owner:
             messages.warning(self.request, 'This user does not exist.')
             return super().form_valid(form)
-        try:
-            for line in body.split('\n'):
-                if line.count(','):
-                    domain_name, auth_code = line.strip().split(',')
-                elif line.strip().count(';'):
-                    domain_name, auth_code = line.strip().split(';')
-                elif line.strip().count('|'):
-                    domain_name, auth_code = line.strip().split('|')
-                elif line.strip().count(' '):
-                    domain_name, auth_code = line.strip().split(' ')
-                else:
-                    report.append(('', 'invlid input line', ))
-                    continue
-                domain_obj = zdomains.domain_find(domain_name=domain_name)
-                if not domain_obj:
-                    report.append((domain_name, 'domain does not exist', ))
-                    continue
-                if domain_obj.owner == new_owner:
-                    report.append((domain_name, 'domain is already owned by %r' % new_owner, ))
-                    continue
-                outputs = zmaster.domain_read_info(
-                    domain=domain_name,
-                    auth_info=auth_code,
-                    return_outputs=True,
-                )
-                if not outputs:
-                    report.append((domain_name, 'domain name is not registered or transfer is not possible at the moment', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPAuthorizationError):
-                    if outputs[-1].message.lower().count('incorrect authcode provided'):
-                        report.append((domain_name, 'incorrect authorization code provided', ))
-                    else:
-                        report.append((domain_name, 'you are not authorized to transfer this domain', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPAuthorizationInvalidError):
-                    if outputs[-1].message.lower().count('invalid authorization information'):
-                        report.append((domain_name, 'invalid authorization information provided', ))
-                    else:
-                        report.append((domain_name, 'you are not authorized to transfer this domain', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPObjectNotExist):
-                    report.append((domain_name, 'domain name is not registered', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPError):
-                    report.append((domain_name, 'domain transfer failed due to unexpected error, please try again later', ))
-                    continue
-                if not outputs[-1].get(domain_name):
-                    report.append((domain_name, 'domain name is not registered', ))
-                    continue
-                if len(outputs) < 2:
-                    report.append((domain_name, 'domain name transfer is not possible at the moment, please try again later', ))
-                    continue
-                info = outputs[-2]
-                current_registrar = info['epp']['response']['resData']['infData']['clID']
-                if current_registrar.lower() == settings.ZENAIDA_REGISTRAR_ID.lower():
-                    internal = True
-                current_statuses = info['epp']['response']['resData']['infData']['status']
-                current_statuses = [current_statuses, ] if not isinstance(current_statuses, list) else current_statuses
-                current_statuses = [s['@s'] for s in current_statuses]
-                pw = info['epp']['response']['resData']['infData']['authInfo']['pw']
-                if pw != 'Authinfo Correct' and pw != auth_code:
-                    report.append((domain_name, 'given transfer code is not correct', ))
-                    continue
-                if 'clientTransferProhibited' in current_statuses or 'serverTransferProhibited' in current_statuses:
-                    report.append((domain_name, 'transfer failed because domain was locked or auth code was wrong', ))
-                    continue
-                if len(orders.find_pending_domain_transfer_order_items(domain_name)):
-                    report.append((domain_name, 'domain transfer is already in progress', ))
-                    continue
-                if current_registrar.lower() in [settings.ZENAIDA_AUCTION_REGISTRAR_ID.lower(), settings.ZENAIDA_REGISTRAR_ID.lower()]:
-                    price = 0.0
-                else:
-                    price = settings.ZENAIDA_DOMAIN_PRICE
-                if price > new_owner.balance:
-                    report.append((domain_name, 'account %r does not have enough funds to complete domain transfer', ))
-                    continue
-                transfer_order = orders.order_single_item(
-                    owner=new_owner,
-                    item_type='domain_transfer',
-                    item_price=price,
-                    item_name=domain_name,
-                    item_details={
-                        'transfer_code': auth_code,
-                        'rewrite_contacts': True,
-                        'internal': internal,
-                    },
-                    item_duration=None,
-                )
-                new_status = orders.execute_order(transfer_order)
-                report.append((domain_name, 'created and executed %r, order status is %r' % (transfer_order, new_status, ), ))
-                if new_status == 'processed':
-                    processed_count += 1
-            txt = ''
-            counter = 0
-            for item in report:
-                txt += ('[%s] %s' % (item[0], item[1], )).strip() + '\n'
-                counter += 1
-            file_name = f"bulk_transfer_{counter}_domains_{time.strftime('%Y%m%d%H%M%S', time.localtime())}.txt"
-            open(f'/tmp/{file_name}', 'wt').write(txt)
-            messages.success(self.request, mark_safe('Bulk transfer completed, %d orders were processed. Download full report via <a href="%s">this link</a>' % (
-                processed_count, reverse("bulk_transfer_result_download", args=[file_name.replace('.txt', ''), ]),
-            )))
-        except Exception as e:
-            logging.exception('bulk transfer failed due to %r' % e)
-            messages.error(self.request, f'Bulk transfer failed due to {e}')
-        return super().form_valid(form)
+        bulk_transfer_obj = bulk_transfer.create(new_owner=new_owner, body=body)
+        logger.info('new bulk transfer created: %r', bulk_transfer_obj)
+        messages.success(self.request, 'Bulk transfer of %d domains added to the queue.' % bulk_transfer_obj.total_count)
+        return shortcuts.redirect('bulk_transfer_record', transfer_id=bulk_transfer_obj.pk)
@@ -23,6 +23,7 @@ from django.views.generic import UpdateView, CreateView, DeleteView, ListView, T
 from back.models.domain import Domain, BlockedTransfer
 from back.models.contact import Contact
 from back.models.profile import Profile
+from back import refresh_queue
 
 from front import forms
 from front.decorators import validate_profile_exists, brute_force_protection
@@ -74,13 +75,9 @@ class AccountDomainsListView(ListView):
         context = super().get_context_data(**kwargs)
         context['q'] = self.request.GET.get("q") or ''
         context['s'] = self.request.GET.get("s") or 'expiry date'
-        domain_objects_list = context.get('object_list', [])
-        if settings.ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST and len(domain_objects_list) < 10:
-            zmaster.domains_quick_sync(
-                domain_objects_list=domain_objects_list,
-                hours_passed=12,
-                request_time_limit=3,
-            )
+        context['refreshing_domains'] = set()
+        if settings.ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST:
+            context['refreshing_domains'] = refresh_queue.enqueue(context.get('object_list', []))
         return context
 
 
@@ -156,7 +153,7 @@ class AccountDomainCreateView(FormView):
                 messages.error(self.request, f'Please use another nameserver instead of {nameserver}, "glue" records are not supported yet.')
                 return super().form_valid(form)
 
-        check_result = zmaster.domains_check(domain_names=[domain_name, ], )
+        check_result = zmaster.domain_check_cached(domain_name)
         if check_result is None:
             messages.error(self.request, mark_safe('Service is unavailable at this moment. <br /> Please try again later.'))
             return super().form_valid(form)
@@ -753,7 +750,7 @@ class DomainLookupView(FormView):
                 return self.render_to_response(self.get_context_data(form=form, domain_name=domain_name, result=result))
             domain_available = zdomains.is_domain_available(domain_name)
             if domain_available:
-                check_result = zmaster.domains_check(domain_names=[domain_name, ], )
+                check_result = zmaster.domain_check_cached(domain_name)
                 if check_result is None:
                     messages.error(self.request, mark_safe('Service is unavailable at this moment. <br /> Please try again later.'))
                 elif check_result == 'non-supported-zone':
@@ -12,3 +12,13 @@ def safe_unescape(s):
     if s is None:
         return s
     return html.unescape(str(s))
+
+
+def normalize_epp_id(epp_id):
+    """
+    EPP IDs are case-insensitive, all of them are stored in the DB in lower case.
+    Returns None for empty value.
+    """
+    if not epp_id:
+        return None
+    return str(epp_id).strip().lower()
@@ -0,0 +1,61 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.core.management.base import BaseCommand
+
+from logs.middleware import LogRequestsMiddleware
+
+HOT_URLS = [
+    '/',
+    '/domains/',
+    '/domains/create/example.ai/',
+    '/domains/edit/123/',
+    '/domains/123/transfer-code/',
+    '/contacts/',
+    '/billing/orders/',
+    '/billing/order/create/renew/example.ai/',
+    '/billing/payments/',
+    '/profile/',
+    '/lookup/',
+    '/accounts/login/',
+    '/admin/',
+    '/not-existing-page/',
+]
+
+
+class _NotStoringMiddleware(LogRequestsMiddleware):
+
+    def store_log(self, **fields):
+        pass
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py benchmark_request_logs_middleware --loops 2000
+
+    Only the middleware itself is measured, views are not executed and request logs are not stored.
+    """
+
+    help = 'Measures overhead of LogRequestsMiddleware for the most often requested pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loops', type=int, default=2000, dest='loops')
+
+    def handle(self, loops, *args, **options):
+        factory = RequestFactory()
+        requests = [factory.get(url) for url in HOT_URLS]
+        for label, cache_size in (('without cache', 0, ), ('with cache', 4096, ), ):
+            with override_settings(REQUEST_LOG_ROUTES_CACHE_SIZE=cache_size):
+                middleware = _NotStoringMiddleware(lambda request: HttpResponse('ok'))
+            started = time.perf_counter()
+            for _ in range(loops):
+                for request in requests:
+                    middleware(request)
+            elapsed = time.perf_counter() - started
+            total = loops * len(requests)
+            self.stdout.write('%s: %d requests in %.3f seconds, %.1f microseconds per request\n' % (
+                label, total, elapsed, elapsed * 1000000.0 / total))
+        self.stdout.write(self.style.SUCCESS('Done'))
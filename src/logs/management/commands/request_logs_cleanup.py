@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from logs import retention
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py request_logs_cleanup --days 30
+
+    To convert the table into partitioned table on PostgreSQL (must be done once, web server must be stopped):
+
+        ./venv/bin/python src/manage.py request_logs_cleanup --partitions monthly
+
+    """
+
+    help = 'Removes old request logs from the DB'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, dest='days',
+                            help='keep only records for given number of days, default is REQUEST_LOG_RETENTION_DAYS')
+        parser.add_argument('--batch_size', type=int, default=None, dest='batch_size')
+        parser.add_argument('--partitions', choices=retention.PERIODS, default=None, dest='partitions',
+                            help='convert the table into partitioned table, only PostgreSQL is supported')
+
+    def handle(self, days, batch_size, partitions, *args, **options):
+        if partitions:
+            if retention.convert_to_partitioned(partitions):
+                self.stdout.write('request logs table converted to %s partitions\n' % partitions)
+            else:
+                self.stdout.write('request logs table is already partitioned\n')
+            if settings.REQUEST_LOG_PARTITIONS != partitions:
+                self.stdout.write(self.style.WARNING('set REQUEST_LOG_PARTITIONS = %r to drop old partitions\n' % partitions))
+        result = retention.cleanup(days=days, batch_size=batch_size)
+        if result['partitions_created'] or result['partitions_dropped']:
+            self.stdout.write('%d partitions created, %d partitions dropped\n' % (
+                result['partitions_created'], result['partitions_dropped'], ))
+        self.stdout.write(self.style.SUCCESS('%d rows removed in %.3f seconds' % (result['rows_removed'], result['elapsed'], )))
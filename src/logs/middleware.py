@@ -1,6 +1,7 @@
 import re
 import logging
 import time
+import functools
 import traceback
 
 from django.conf import settings
@@ -10,6 +11,7 @@ from django.urls.exceptions import Resolver404
 
 from django_extensions.management.commands import show_urls
 
+from logs import writer
 from logs.models import RequestLog
 
 
@@ -58,11 +60,38 @@ SHORT_PATHS = [
 ]
 
 
+def compile_ignore_paths(prefixes):
+    """
+    Builds one regular expression to match a path against all given prefixes at once.
+    """
+    if not prefixes:
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(re.escape(prefix) for prefix in prefixes))
+
+
+def compile_short_paths(rules):
+    """
+    Builds one regular expression from `SHORT_PATHS` rules, first matching rule wins.
+    Returns the expression and the list of short paths, the rule number is the name of the matched group.
+    """
+    patterns = []
+    short_paths = []
+    for pos, (head, tail, short_path) in enumerate(rules):
+        patterns.append('(?P<r%d>%s.*%s)' % (pos, re.escape(head), (re.escape(tail) + '$') if tail else '', ))
+        short_paths.append(short_path)
+    return re.compile('|'.join(patterns) or r'(?!)'), short_paths
+
+
 class LogRequestsMiddleware(object):
 
     def __init__(self, get_response):
         self.get_response = get_response
-        self.whitelisted_routes = self.scan_all_routes()
+        self.whitelisted_routes = frozenset(self.scan_all_routes())
+        self.monitoring_hosts = frozenset(settings.MONITORING_HOSTS)
+        self.ignore_paths_re = compile_ignore_paths(IGNORE_PATH_STARTSWITH)
+        self.short_paths_re, self.short_paths = compile_short_paths(SHORT_PATHS)
+        # most of the requests are hitting the same few pages, resolving the route again and again is not needed
+        self.classify_path = functools.lru_cache(maxsize=settings.REQUEST_LOG_ROUTES_CACHE_SIZE)(self._classify_path)
 
     def __call__(self, request):
         request._start_time = time.monotonic_ns()
@@ -74,13 +103,9 @@ class LogRequestsMiddleware(object):
         if not self.log_filter(request):
             return self.get_response(request)
 
-        route = None
-        try:
-            route = resolve(request_path).route
-        except Resolver404 as exc:
-            route = exc.args[0]['path']
+        allowed, short_path = self.classify_path(request_path)
 
-        if route not in self.whitelisted_routes:
+        if not allowed:
             #TODO: possibly we could block this IP if it hits the web-site too often
             return HttpResponseForbidden()
 
@@ -90,11 +115,11 @@ class LogRequestsMiddleware(object):
             return response
 
         try:
-            RequestLog.objects.create(
+            self.store_log(
                 ip_address=ip_addr,
                 user=self.user_email(request) or '',
                 method=request.method or '',
-                path=self.short_path(request.path) or '',
+                path=short_path or '',
                 path_full=request.path or '',
                 request=request_body,
                 status_code=response.status_code,
@@ -106,16 +131,21 @@ class LogRequestsMiddleware(object):
 
         return response
 
+    def store_log(self, **fields):
+        if settings.REQUEST_LOG_BUFFERED:
+            writer.get_writer().push(**fields)
+        else:
+            RequestLog.objects.create(**fields)
+
     def process_exception(self, request, exception):
         request._captured_exception = str(exception) + '\n\n' + traceback.format_exc()
         return None
 
     def log_filter(self, request):
-        if self.client_ip(request) in settings.MONITORING_HOSTS:
+        if self.client_ip(request) in self.monitoring_hosts:
             # skip logging all monitoring requests from specific hosts
             return False
-        p = request.path or ''
-        if any([p.startswith(ignore_path) for ignore_path in IGNORE_PATH_STARTSWITH]):
+        if self.ignore_paths_re.match(request.path or ''):
             # skip logging of some specific requests
             return False
         return True
@@ -140,15 +170,7 @@ class LogRequestsMiddleware(object):
         raw_request_body = ""
         if request.POST:
             try:
-                raw_request_body += '\n'.join(['%s=%s' % (k, v) for k, v in request.POST.items() if k not in [
-                    'csrfmiddlewaretoken',
-                    'g-recaptcha-response',
-                    'auth-password',
-                    'new_password1',
-                    'new_password2',
-                    'password1',
-                    'password2',
-                ]])
+                raw_request_body += '\n'.join(['%s=%s' % (k, v) for k, v in request.POST.items() if k not in STRIP_INPUT_FIELDS])
             except Exception as e:
                 raw_request_body += str(e)
         if request.GET:
@@ -167,13 +189,18 @@ class LogRequestsMiddleware(object):
             routes.add(regex)
         return routes
 
+    def _classify_path(self, path):
+        """
+        Returns tuple `(allowed, short_path)` for given path, results are cached in `classify_path()`.
+        """
+        try:
+            route = resolve(path).route
+        except Resolver404 as exc:
+            route = exc.args[0]['path']
+        return route in self.whitelisted_routes, self.short_path(path)
+
     def short_path(self, path):
-        for head, tail, short_path in SHORT_PATHS:
-            if head:
-                if not path.startswith(head):
-                    continue
-                if tail:
-                    if not ''.endswith(tail):
-                        continue
-                return short_path
+        matched = self.short_paths_re.match(path)
+        if matched:
+            return self.short_paths[int(matched.lastgroup[1:])]
         return path
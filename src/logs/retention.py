@@ -0,0 +1,219 @@
+"""
+Removes old `RequestLog` records.
+
+Records older than `REQUEST_LOG_RETENTION_DAYS` are deleted with plain SQL in small batches by the `timestamp` index,
+objects are never loaded into memory and no signals are fired.
+
+On PostgreSQL the table can be converted into a partitioned table, see `convert_to_partitioned()`.
+Then every day or every month has its own partition and old partitions are dropped whole,
+which is much faster than deleting rows. New partitions are created in advance by `cleanup()`,
+the "default" partition receives records which are not matching any existing partition.
+"""
+
+import re
+import time
+import logging
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from logs.models import RequestLog
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('daily', 'monthly', )
+
+_PartitionNameRe = re.compile(r'^%s_p(\d{6}|\d{8})$' % RequestLog._meta.db_table)
+
+
+def delete_older_than(cutoff, batch_size=None):
+    """
+    Deletes all records with `timestamp` older than `cutoff` moment, returns number of removed rows.
+    """
+    batch_size = batch_size or settings.REQUEST_LOG_DELETE_BATCH_SIZE
+    table = connection.ops.quote_name(RequestLog._meta.db_table)
+    total = 0
+    while True:
+        batch = list(RequestLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM %s WHERE timestamp < %%s AND id IN (%s)' % (
+                    table, ', '.join(['%s', ] * len(batch)), ), [cutoff, ] + batch)
+                total += cursor.rowcount
+        if len(batch) < batch_size:
+            break
+    return total
+
+#------------------------------------------------------------------------------
+
+def _period_start(moment, period):
+    if period == 'daily':
+        return datetime.datetime(moment.year, moment.month, moment.day, tzinfo=datetime.timezone.utc)
+    return datetime.datetime(moment.year, moment.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _next_period(start, period):
+    if period == 'daily':
+        return start + datetime.timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def _partition_name(start, period):
+    return '%s_p%s' % (RequestLog._meta.db_table, start.strftime('%Y%m%d' if period == 'daily' else '%Y%m'))
+
+
+def _partition_bounds(name):
+    """
+    Returns `(start, end)` of the time range covered by given partition, or None for the "default" partition.
+    """
+    found = _PartitionNameRe.match(name)
+    if not found:
+        return None
+    suffix = found.group(1)
+    if len(suffix) == 8:
+        start = datetime.datetime.strptime(suffix, '%Y%m%d').replace(tzinfo=datetime.timezone.utc)
+        return start, _next_period(start, 'daily')
+    start = datetime.datetime.strptime(suffix, '%Y%m').replace(tzinfo=datetime.timezone.utc)
+    return start, _next_period(start, 'monthly')
+
+
+def is_partitioned():
+    """
+    Returns True if the table was already converted into a partitioned table.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s',
+            [RequestLog._meta.db_table, ],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """
+    Returns names of all partitions of the table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s ORDER BY c.relname',
+            [RequestLog._meta.db_table, ],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ensure_partitions(period, since=None, ahead=None):
+    """
+    Creates missing partitions starting from `since` moment (current time by default) and `ahead` periods more.
+    Returns list of created partitions.
+    """
+    ahead = ahead if ahead is not None else (7 if period == 'daily' else 2)
+    start = _period_start(since or timezone.now(), period)
+    end = _period_start(timezone.now(), period)
+    for _ in range(ahead):
+        end = _next_period(end, period)
+    existing = set(list_partitions())
+    table = connection.ops.quote_name(RequestLog._meta.db_table)
+    created = []
+    while start <= end:
+        name = _partition_name(start, period)
+        if name not in existing:
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%%s) TO (%%s)' % (
+                    connection.ops.quote_name(name), table, ), [start, _next_period(start, period), ])
+            created.append(name)
+        start = _next_period(start, period)
+    if created:
+        logger.info('created %d request log partitions: %r', len(created), created)
+    return created
+
+
+def drop_partitions_older_than(cutoff):
+    """
+    Drops partitions which are covering time range completely before `cutoff` moment.
+    Returns tuple `(dropped_partitions_count, removed_rows_count)`.
+    """
+    dropped = 0
+    rows = 0
+    for name in list_partitions():
+        bounds = _partition_bounds(name)
+        if not bounds or bounds[1] > cutoff:
+            continue
+        quoted = connection.ops.quote_name(name)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s' % quoted)
+            rows += cursor.fetchone()[0]
+            cursor.execute('DROP TABLE %s' % quoted)
+        dropped += 1
+        logger.info('request log partition %r dropped', name)
+    return dropped, rows
+
+
+def convert_to_partitioned(period):
+    """
+    Re-creates the table as partitioned by `timestamp` and copies all existing records into new partitions.
+    Must be executed once, while web server is stopped, because the table is locked until finished.
+    """
+    if connection.vendor != 'postgresql':
+        raise Exception('partitioning of request logs is only supported on PostgreSQL')
+    if period not in PERIODS:
+        raise Exception('unknown partitioning period: %r' % period)
+    if is_partitioned():
+        return False
+    db_table = RequestLog._meta.db_table
+    table = connection.ops.quote_name(db_table)
+    old_table = connection.ops.quote_name(db_table + '_old')
+    oldest = RequestLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    # records which are going to be removed soon anyway are placed into the "default" partition
+    since = timezone.now() - datetime.timedelta(days=settings.REQUEST_LOG_RETENTION_DAYS)
+    if oldest and oldest > since:
+        since = oldest
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE %s RENAME TO %s' % (table, old_table, ))
+            cursor.execute('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)' % (table, old_table, ))
+            cursor.execute('ALTER TABLE %s ADD CONSTRAINT %s PRIMARY KEY (id, timestamp)' % (
+                table, connection.ops.quote_name(db_table + '_partitioned_pkey'), ))
+            for field in RequestLog._meta.fields:
+                if field.db_index:
+                    cursor.execute('CREATE INDEX %s ON %s (%s)' % (
+                        connection.ops.quote_name('%s_%s_idx' % (db_table, field.column)), table, connection.ops.quote_name(field.column), ))
+            cursor.execute('CREATE TABLE %s PARTITION OF %s DEFAULT' % (connection.ops.quote_name(db_table + '_default'), table, ))
+            cursor.execute('ALTER SEQUENCE %s OWNED BY %s.id' % (connection.ops.quote_name(db_table + '_id_seq'), table, ))
+        ensure_partitions(period, since=since)
+        with connection.cursor() as cursor:
+            cursor.execute('INSERT INTO %s SELECT * FROM %s' % (table, old_table, ))
+            cursor.execute('DROP TABLE %s' % old_table)
+    logger.info('request logs table converted to %s partitions', period)
+    return True
+
+#------------------------------------------------------------------------------
+
+def cleanup(days=None, batch_size=None):
+    """
+    Removes all records older than `days`, returns dictionary with results.
+    """
+    days = days if days is not None else settings.REQUEST_LOG_RETENTION_DAYS
+    started = time.time()
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    result = {
+        'partitions_created': 0,
+        'partitions_dropped': 0,
+        'rows_removed': 0,
+    }
+    if settings.REQUEST_LOG_PARTITIONS and is_partitioned():
+        result['partitions_created'] = len(ensure_partitions(settings.REQUEST_LOG_PARTITIONS))
+        result['partitions_dropped'], result['rows_removed'] = drop_partitions_older_than(cutoff)
+    # remaining rows in partially expired and "default" partitions, or in not partitioned table
+    result['rows_removed'] += delete_older_than(cutoff, batch_size=batch_size)
+    result['elapsed'] = time.time() - started
+    logger.info('request logs cleanup finished: %r', result)
+    return result
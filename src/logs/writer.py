@@ -0,0 +1,160 @@
+"""
+Writes `RequestLog` records in the background, so web requests are not waiting for the DB insert.
+
+Records are placed into a bounded in-memory queue and a daemon thread stores them with `bulk_create()`
+when `REQUEST_LOG_BATCH_SIZE` records were collected or `REQUEST_LOG_FLUSH_INTERVAL_SECONDS` passed.
+When the queue is full new records are dropped and counted, the request is never blocked.
+Thread is started on the first record in every process, so it works fine after uwsgi forked the workers.
+Remaining records are written when the process is shutting down.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+
+from django import db
+from django.conf import settings
+
+from logs.models import RequestLog
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogWriter(object):
+
+    def __init__(self, queue_size=None, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or settings.REQUEST_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.REQUEST_LOG_FLUSH_INTERVAL_SECONDS
+        self.queue = queue.Queue(maxsize=(queue_size or settings.REQUEST_LOG_QUEUE_SIZE))
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        self.stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def push(self, **fields):
+        """
+        Adds new record to the queue, returns False if the record was dropped because the queue is full.
+        """
+        self.start()
+        try:
+            self.queue.put_nowait(RequestLog(**fields))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def start(self):
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread is not None and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stopping = False
+            self.thread = threading.Thread(target=self._run, name='request_log_writer', daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=10):
+        """
+        Stops the thread and writes all remaining records.
+        """
+        self.stopping = True
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            self.thread.join(timeout)
+        self.thread = None
+        return self.flush()
+
+    def flush(self):
+        """
+        Writes everything what is currently in the queue, returns number of stored records.
+        """
+        total = 0
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                break
+            total += self._write(batch)
+        return total
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+    def _take(self, block=True):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            RequestLog.objects.bulk_create(batch)
+        except:
+            logger.exception('failed to store %d RequestLog records', len(batch))
+            with self.lock:
+                self.failed += len(batch)
+            return 0
+        finally:
+            if threading.current_thread() is self.thread:
+                # this thread is mostly sleeping, do not keep DB connection open
+                db.connection.close()
+        with self.lock:
+            self.written += len(batch)
+        return len(batch)
+
+    def _run(self):
+        reported_dropped = 0
+        while not self.stopping:
+            batch = self._take()
+            if batch:
+                self._write(batch)
+            if self.dropped != reported_dropped:
+                logger.warning('request log queue is full, %d records dropped so far', self.dropped)
+                reported_dropped = self.dropped
+
+#------------------------------------------------------------------------------
+
+_Writer = None
+
+
+def get_writer():
+    global _Writer
+    if _Writer is None:
+        _Writer = RequestLogWriter()
+        _register_shutdown(_Writer.stop)
+    return _Writer
+
+
+def _register_shutdown(callback):
+    atexit.register(callback)
+    try:
+        import uwsgi  # @UnresolvedImport
+    except ImportError:
+        return
+    # uwsgi workers are not always running python "atexit" handlers
+    previous = getattr(uwsgi, 'atexit', None)
+
+    def _uwsgi_atexit():
+        callback()
+        if previous:
+            previous()
+
+    uwsgi.atexit = _uwsgi_atexit
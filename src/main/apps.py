@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import random
 
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MainConfig(AppConfig):
@@ -11,4 +12,7 @@ class MainConfig(AppConfig):
     def ready(self):
         """Location for package configurations"""
         random.seed()
+        if settings.ZENAIDA_AUTOMATS_TRACING_ENABLED:
+            from automats import tracing
+            tracing.start()
         return True
@@ -436,6 +436,18 @@ SMOKETEST_MAXIMUM_UNAVAILABLE_AMOUNT = getattr(params, 'SMOKETEST_MAXIMUM_UNAVAI
 
 MONITORING_HOSTS = getattr(params, 'MONITORING_HOSTS', [])
 
+#------------------------------------------------------------------------------
+#--- REQUEST LOGS
+REQUEST_LOG_BUFFERED = getattr(params, 'REQUEST_LOG_BUFFERED', True)
+REQUEST_LOG_QUEUE_SIZE = getattr(params, 'REQUEST_LOG_QUEUE_SIZE', 10000)
+REQUEST_LOG_BATCH_SIZE = getattr(params, 'REQUEST_LOG_BATCH_SIZE', 200)
+REQUEST_LOG_FLUSH_INTERVAL_SECONDS = getattr(params, 'REQUEST_LOG_FLUSH_INTERVAL_SECONDS', 2)
+REQUEST_LOG_ROUTES_CACHE_SIZE = getattr(params, 'REQUEST_LOG_ROUTES_CACHE_SIZE', 4096)
+REQUEST_LOG_RETENTION_DAYS = getattr(params, 'REQUEST_LOG_RETENTION_DAYS', 30)
+REQUEST_LOG_DELETE_BATCH_SIZE = getattr(params, 'REQUEST_LOG_DELETE_BATCH_SIZE', 5000)
+# PostgreSQL only: None, 'daily' or 'monthly', run "request_logs_cleanup --partitions" once to convert the table
+REQUEST_LOG_PARTITIONS = getattr(params, 'REQUEST_LOG_PARTITIONS', None)
+
 #------------------------------------------------------------------------------
 #--- BRUTE FORCE PROTECTION SETTINGS
 BRUTE_FORCE_PROTECTION_ENABLED = getattr(params, 'BRUTE_FORCE_PROTECTION_ENABLED', False)
@@ -445,6 +457,9 @@ BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_TIMEOUT = getattr(params, 'BRUTE_FORCE_PROT
 BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_KEY_PREFIX = getattr(params, 'BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_KEY_PREFIX', 'domain_transfer_brute_force')
 BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_MAX_ATTEMPTS = getattr(params, 'BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_MAX_ATTEMPTS', 15)
 BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_TIMEOUT = getattr(params, 'BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_TIMEOUT', 60*15)
+BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED = getattr(params, 'BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED', True)
+BRUTE_FORCE_PROTECTION_LOCAL_CACHE_SECONDS = getattr(params, 'BRUTE_FORCE_PROTECTION_LOCAL_CACHE_SECONDS', 60)
+BRUTE_FORCE_PROTECTION_LOCAL_CACHE_MAX_KEYS = getattr(params, 'BRUTE_FORCE_PROTECTION_LOCAL_CACHE_MAX_KEYS', 10000)
 
 #------------------------------------------------------------------------------
 #--- GOOGLE RE-CAPTCHA KEYS
@@ -489,6 +504,19 @@ RATE_LIMIT_TARGET_PATHS = getattr(params, 'RATE_LIMIT_TARGET_PATHS', [
     ('POST', '/accounts/login'),
     ('POST', '/lookup'),
 ])
+# "sliding_window" or "token_bucket"
+RATE_LIMIT_ALGORITHM = getattr(params, 'RATE_LIMIT_ALGORITHM', 'sliding_window')
+# list of dicts: {'method': 'POST', 'path': '/lookup', 'limit': 5, 'window': 60, 'per': 'ip' or 'user', 'algorithm': ...}
+# when empty, rules are made from RATE_LIMIT_TARGET_PATHS
+RATE_LIMIT_RULES = getattr(params, 'RATE_LIMIT_RULES', [])
+RATE_LIMIT_LOCAL_FLOOD_FACTOR = getattr(params, 'RATE_LIMIT_LOCAL_FLOOD_FACTOR', 2)
+RATE_LIMIT_LOCAL_MAX_KEYS = getattr(params, 'RATE_LIMIT_LOCAL_MAX_KEYS', 10000)
+RATE_LIMIT_REDIS_HOST = getattr(params, 'RATE_LIMIT_REDIS_HOST', 'localhost')
+RATE_LIMIT_REDIS_PORT = getattr(params, 'RATE_LIMIT_REDIS_PORT', 6379)
+RATE_LIMIT_REDIS_DB = getattr(params, 'RATE_LIMIT_REDIS_DB', 0)
+RATE_LIMIT_REDIS_PASSWORD = getattr(params, 'RATE_LIMIT_REDIS_PASSWORD', '')
+RATE_LIMIT_REDIS_MAX_CONNECTIONS = getattr(params, 'RATE_LIMIT_REDIS_MAX_CONNECTIONS', 20)
+RATE_LIMIT_REDIS_SOCKET_TIMEOUT = getattr(params, 'RATE_LIMIT_REDIS_SOCKET_TIMEOUT', 0.5)
 
 #------------------------------------------------------------------------------
 #--- LOGIN SETTINGS
@@ -510,11 +538,40 @@ ZENAIDA_GATE_HEALTH_CACHE_ENABLED = getattr(params, 'ZENAIDA_GATE_HEALTH_CACHE_E
 ZENAIDA_GATE_HEALTH_CHECK_DOMAIN_NAME = getattr(params, 'ZENAIDA_GATE_HEALTH_CHECK_DOMAIN_NAME', 'some-domain.com')
 ZENAIDA_GATE_HEALTH_CHECK_PERIOD = getattr(params, 'ZENAIDA_GATE_HEALTH_CHECK_PERIOD', 30)
 
+ZENAIDA_RPC_PIPELINE_MAX_INFLIGHT = getattr(params, 'ZENAIDA_RPC_PIPELINE_MAX_INFLIGHT', 16)
+ZENAIDA_RPC_PIPELINE_TIMEOUT_SECONDS = getattr(params, 'ZENAIDA_RPC_PIPELINE_TIMEOUT_SECONDS', 30)
+
 #------------------------------------------------------------------------------
 #--- ZENAIDA RELATED CONFIGS
 ZENAIDA_CSV_FILES_SYNC_FOLDER_PATH = getattr(params, 'ZENAIDA_CSV_FILES_SYNC_FOLDER_PATH', '/tmp/')
+ZENAIDA_CSV_IMPORT_CHUNK_SIZE = getattr(params, 'ZENAIDA_CSV_IMPORT_CHUNK_SIZE', 500)
+ZENAIDA_CSV_IMPORT_WORKERS = getattr(params, 'ZENAIDA_CSV_IMPORT_WORKERS', 1)
+ZENAIDA_CSV_IMPORT_SYNC_WORKERS = getattr(params, 'ZENAIDA_CSV_IMPORT_SYNC_WORKERS', 1)
+ZENAIDA_CSV_IMPORT_LOG_MAX_BYTES = getattr(params, 'ZENAIDA_CSV_IMPORT_LOG_MAX_BYTES', 10*1024*1024)
+ZENAIDA_CSV_IMPORT_LOG_BACKUP_COUNT = getattr(params, 'ZENAIDA_CSV_IMPORT_LOG_BACKUP_COUNT', 3)
+ZENAIDA_CSV_IMPORT_LOG_BATCH_SIZE = getattr(params, 'ZENAIDA_CSV_IMPORT_LOG_BATCH_SIZE', 100)
+ZENAIDA_CSV_IMPORT_LOG_TAIL_BYTES = getattr(params, 'ZENAIDA_CSV_IMPORT_LOG_TAIL_BYTES', 64*1024)
+ZENAIDA_CSV_IMPORT_STALE_SECONDS = getattr(params, 'ZENAIDA_CSV_IMPORT_STALE_SECONDS', 2*60*60)
+ZENAIDA_BULK_TRANSFER_WORKERS = getattr(params, 'ZENAIDA_BULK_TRANSFER_WORKERS', 5)
+ZENAIDA_BULK_TRANSFER_STALE_SECONDS = getattr(params, 'ZENAIDA_BULK_TRANSFER_STALE_SECONDS', 30*60)
+ZENAIDA_NOTIFICATIONS_BATCH_SIZE = getattr(params, 'ZENAIDA_NOTIFICATIONS_BATCH_SIZE', 20)
+ZENAIDA_NOTIFICATIONS_SEND_DELAY = getattr(params, 'ZENAIDA_NOTIFICATIONS_SEND_DELAY', 0.5)
+ZENAIDA_NOTIFICATIONS_SEND_BURST = getattr(params, 'ZENAIDA_NOTIFICATIONS_SEND_BURST', 10)
 
 ZENAIDA_EPP_POLL_INTERVAL_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_INTERVAL_SECONDS', 20)
+ZENAIDA_EPP_POLL_MIN_INTERVAL_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_MIN_INTERVAL_SECONDS', 1)
+
+ZENAIDA_EPP_DOMAIN_CHECK_BATCH_SIZE = getattr(params, 'ZENAIDA_EPP_DOMAIN_CHECK_BATCH_SIZE', 20)
+ZENAIDA_BULK_SYNC_TRANSACTION_GROUP_SIZE = getattr(params, 'ZENAIDA_BULK_SYNC_TRANSACTION_GROUP_SIZE', 20)
+ZENAIDA_BULK_SYNC_PIPELINED = getattr(params, 'ZENAIDA_BULK_SYNC_PIPELINED', False)
+ZENAIDA_CONTACT_INFO_CACHE_TTL_SECONDS = getattr(params, 'ZENAIDA_CONTACT_INFO_CACHE_TTL_SECONDS', 5*60)
+ZENAIDA_DOMAIN_AVAILABILITY_CACHE_REGISTERED_TTL_SECONDS = getattr(params, 'ZENAIDA_DOMAIN_AVAILABILITY_CACHE_REGISTERED_TTL_SECONDS', 60)
+ZENAIDA_DOMAIN_AVAILABILITY_CACHE_AVAILABLE_TTL_SECONDS = getattr(params, 'ZENAIDA_DOMAIN_AVAILABILITY_CACHE_AVAILABLE_TTL_SECONDS', 15)
+ZENAIDA_AUTOMATS_POOL_SIZE = getattr(params, 'ZENAIDA_AUTOMATS_POOL_SIZE', 10)
+ZENAIDA_AUTO_RENEW_WORKERS = getattr(params, 'ZENAIDA_AUTO_RENEW_WORKERS', 1)
+ZENAIDA_AUTOMATS_TRACING_ENABLED = getattr(params, 'ZENAIDA_AUTOMATS_TRACING_ENABLED', False)
+ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH = getattr(params, 'ZENAIDA_AUTOMATS_TRACING_FOLDER_PATH', '/tmp/zenaida_automats_tracing/')
+ZENAIDA_AUTOMATS_TRACING_FLUSH_INTERVAL_SECONDS = getattr(params, 'ZENAIDA_AUTOMATS_TRACING_FLUSH_INTERVAL_SECONDS', 60)
 
 ZENAIDA_REGISTRAR_ID = getattr(params, 'ZENAIDA_REGISTRAR_ID', 'zenaida_registrar')
 ZENAIDA_SUPPORTED_ZONES = getattr(params, 'ZENAIDA_SUPPORTED_ZONES', [])
@@ -525,6 +582,10 @@ ZENAIDA_ADMIN_NOTIFY_EMAILS = getattr(params, 'ZENAIDA_ADMIN_NOTIFY_EMAILS', '')
 ZENAIDA_PING_NAMESERVERS_ENABLED = getattr(params, 'ZENAIDA_PING_NAMESERVERS_ENABLED', True)
 
 ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST = getattr(params, 'ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST', True)
+ZENAIDA_DOMAINS_REFRESH_HOURS_PASSED = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_HOURS_PASSED', 12)
+ZENAIDA_DOMAINS_REFRESH_BATCH_SIZE = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_BATCH_SIZE', 20)
+ZENAIDA_DOMAINS_REFRESH_TIMEOUT_SECONDS = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_TIMEOUT_SECONDS', 5*60)
+ZENAIDA_DOMAINS_REFRESH_REQUEST_TIME_LIMIT = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_REQUEST_TIME_LIMIT', 10)
 
 #--- Billing
 ZENAIDA_DOMAIN_PRICE = getattr(params, 'ZENAIDA_DOMAIN_PRICE', 100.0)
@@ -532,6 +593,8 @@ ZENAIDA_DOMAIN_RESTORE_PRICE = getattr(params, 'ZENAIDA_DOMAIN_RESTORE_PRICE', 2
 ZENAIDA_DOMAIN_RENEW_YEARS = getattr(params, 'ZENAIDA_DOMAIN_RENEW_YEARS', 2)
 ZENAIDA_DOMAIN_RENEW_MAX_YEARS = getattr(params, 'ZENAIDA_DOMAIN_RENEW_MAX_YEARS', 10)
 ZENAIDA_BILLING_PAYMENT_TIME_FREEZE_SECONDS = getattr(params, 'ZENAIDA_BILLING_PAYMENT_TIME_FREEZE_SECONDS', 3*60)
+ZENAIDA_BILLING_RECEIPT_CACHE_TTL_SECONDS = getattr(params, 'ZENAIDA_BILLING_RECEIPT_CACHE_TTL_SECONDS', 7*24*60*60)
+ZENAIDA_BILLING_RECEIPT_CACHE_MAX_SIZE = getattr(params, 'ZENAIDA_BILLING_RECEIPT_CACHE_MAX_SIZE', 900*1024)
 
 #--- Credit Card payments via 4csonline
 ZENAIDA_BILLING_4CSONLINE_ENABLED = getattr(params, 'ZENAIDA_BILLING_4CSONLINE_ENABLED', True)
@@ -92,12 +92,16 @@ patterns = [
     path('board/two-factor-reset/', board_views.TwoFactorResetView.as_view(), name='two_factor_reset'),
     path('board/financial-report/', board_views.FinancialReportView.as_view(), name='financial_report'),
     path('board/domain-sync/', board_views.NotExistingDomainSyncView.as_view(), name='not_existing_domain_sync'),
+    path('board/csv-file-sync/<str:record_id>/progress/', board_views.CSVFileSyncProgressView.as_view(), name='csv_file_sync_progress'),
     path('board/csv-file-sync/<str:record_id>/', board_views.CSVFileSyncRecordView.as_view(), name='csv_file_sync_record'),
     path('board/csv-file-sync/', board_views.CSVFileSyncView.as_view(), name='csv_file_sync'),
+    path('board/automats-timings/', board_views.AutomatsTimingsView.as_view(), name='automats_timings'),
     path('board/single-email/', board_views.SendingSingleEmailView.as_view(), name='sending_single_email'),
     path('board/auth-codes/<str:file_id>/', board_views.AuthCodesDownloadView.as_view(), name='auth_codes_download'),
     path('board/bulk-transfer/', board_views.BulkTransferView.as_view(), name='bulk_transfer'),
-    path('board/bulk-transfer-result/<str:file_id>/', board_views.BulkTransferResultDownloadView.as_view(), name='bulk_transfer_result_download'),
+    path('board/bulk-transfer/<int:transfer_id>/progress/', board_views.BulkTransferProgressView.as_view(), name='bulk_transfer_progress'),
+    path('board/bulk-transfer/<int:transfer_id>/report/', board_views.BulkTransferResultDownloadView.as_view(), name='bulk_transfer_result_download'),
+    path('board/bulk-transfer/<int:transfer_id>/', board_views.BulkTransferRecordView.as_view(), name='bulk_transfer_record'),
 
     path('lookup/', front_views.DomainLookupView.as_view(), name='domain_lookup'),
 
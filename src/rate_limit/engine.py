@@ -0,0 +1,194 @@
+"""
+Rate limiting algorithms executed atomically in Redis with Lua scripts, one round trip per request.
+
+Two algorithms are supported:
+
+    "sliding_window" - keeps timestamps of all accepted requests inside the window, never lets more than
+                       `limit` requests in any `window` seconds
+    "token_bucket"   - bucket of `limit` tokens refilled with `limit / window` tokens per second,
+                       allows short bursts but keeps the average rate
+
+Before going to Redis every request is also counted locally in the current process, when one process alone
+already received much more requests than allowed the request is rejected without asking Redis at all.
+"""
+
+import time
+import uuid
+import logging
+import threading
+import collections
+
+from django.conf import settings
+
+from redis import Redis, ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ('sliding_window', 'token_bucket', )
+
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    count = count + 1
+    allowed = 1
+end
+redis.call('PEXPIRE', key, math.ceil(window * 1000))
+return {allowed, count}
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local rate = capacity / window
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HMSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil(window * 1000))
+return {allowed, math.floor(capacity - tokens)}
+"""
+
+
+class Rule(object):
+    """
+    Limits requests with given HTTP method to given path (trailing "/" is ignored).
+    Requests are counted per client IP address or per authenticated user, when `per` is "user".
+    """
+
+    def __init__(self, method, path, limit, window, per='ip', algorithm='sliding_window'):
+        if algorithm not in ALGORITHMS:
+            raise ValueError('unknown rate limit algorithm: %r' % algorithm)
+        if per not in ('ip', 'user', ):
+            raise ValueError('unknown rate limit scope: %r' % per)
+        self.method = method.upper()
+        self.path = path.rstrip('/')
+        self.limit = limit
+        self.window = window
+        self.per = per
+        self.algorithm = algorithm
+
+    def __repr__(self):
+        return 'Rule(%s %s %d/%ds per %s %s)' % (self.method, self.path, self.limit, self.window, self.per, self.algorithm)
+
+
+def load_rules():
+    """
+    Reads `RATE_LIMIT_RULES` from settings, when not set builds rules from `RATE_LIMIT_TARGET_PATHS`.
+    """
+    rules = []
+    for rule in (settings.RATE_LIMIT_RULES or []):
+        rules.append(Rule(
+            method=rule['method'],
+            path=rule['path'],
+            limit=rule.get('limit', settings.RATE_LIMIT_COUNT),
+            window=rule.get('window', settings.RATE_LIMIT_WINDOW_SECONDS),
+            per=rule.get('per', 'ip'),
+            algorithm=rule.get('algorithm', settings.RATE_LIMIT_ALGORITHM),
+        ))
+    if not rules:
+        for method, path in settings.RATE_LIMIT_TARGET_PATHS:
+            rules.append(Rule(
+                method=method,
+                path=path,
+                limit=settings.RATE_LIMIT_COUNT,
+                window=settings.RATE_LIMIT_WINDOW_SECONDS,
+                algorithm=settings.RATE_LIMIT_ALGORITHM,
+            ))
+    return rules
+
+
+class LocalPreFilter(object):
+    """
+    Remembers latest requests of every key in the current process.
+    Returns False when the key already made `limit * factor` requests during the last `window` seconds here,
+    such client is definitely over the limit, because other processes could only add more requests to that.
+    """
+
+    def __init__(self, factor=None, max_keys=None):
+        self.factor = factor or settings.RATE_LIMIT_LOCAL_FLOOD_FACTOR
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+        self.history = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def check(self, key, rule, now=None):
+        now = now or time.time()
+        threshold = max(1, int(rule.limit * self.factor))
+        with self.lock:
+            recent = self.history.get(key)
+            if recent is None or recent.maxlen != threshold:
+                recent = self.history[key] = collections.deque(maxlen=threshold)
+                if len(self.history) > self.max_keys:
+                    self.history.popitem(last=False)
+            else:
+                self.history.move_to_end(key)
+            if len(recent) >= threshold and now - recent[0] < rule.window:
+                return False
+            recent.append(now)
+        return True
+
+
+class RateLimiter(object):
+
+    def __init__(self, redis_client=None, rules=None, pre_filter=None):
+        self.redis_client = redis_client or create_redis_client()
+        self.rules = {(r.method, r.path): r for r in (rules if rules is not None else load_rules())}
+        self.pre_filter = pre_filter or LocalPreFilter()
+        self.scripts = {
+            'sliding_window': self.redis_client.register_script(SLIDING_WINDOW_SCRIPT),
+            'token_bucket': self.redis_client.register_script(TOKEN_BUCKET_SCRIPT),
+        }
+
+    def find_rule(self, method, path):
+        return self.rules.get((method, path.rstrip('/')))
+
+    def hit(self, rule, identity, now=None):
+        """
+        Registers one request from given client, returns True if the request is allowed.
+        If Redis is not available all requests are allowed.
+        """
+        now = now or time.time()
+        key = 'rate_limit:%s:%s:%s:%s' % (rule.algorithm, rule.method, rule.path, identity, )
+        if not self.pre_filter.check(key, rule, now=now):
+            logger.critical('rate limit exceeded for [%s], rejected locally', key)
+            return False
+        try:
+            allowed, count = self.scripts[rule.algorithm](
+                keys=[key, ],
+                args=[now, rule.window, rule.limit, '%f:%s' % (now, uuid.uuid4().hex, ), ],
+            )
+        except Exception as exc:
+            # ignore Redis errors
+            logger.error('rate limiter failed: %r', exc)
+            return True
+        if not allowed:
+            logger.critical('rate limit exceeded for [%s], %d requests', key, count)
+            return False
+        return True
+
+
+def create_redis_client():
+    pool = ConnectionPool(
+        host=settings.RATE_LIMIT_REDIS_HOST,
+        port=settings.RATE_LIMIT_REDIS_PORT,
+        db=settings.RATE_LIMIT_REDIS_DB,
+        password=settings.RATE_LIMIT_REDIS_PASSWORD or None,
+        max_connections=settings.RATE_LIMIT_REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.RATE_LIMIT_REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.RATE_LIMIT_REDIS_SOCKET_TIMEOUT,
+    )
+    return Redis(connection_pool=pool)
@@ -1,11 +1,10 @@
 import re
 import logging
-import time
 
 from django.conf import settings
 from django.http import HttpResponse
 
-from redis import Redis
+from rate_limit import engine
 
 logger = logging.getLogger(__name__)
 
@@ -14,58 +13,40 @@ class HttpResponseRateLimitExceeded(HttpResponse):
     status_code = 429
 
 
-class RedisClient:
-
-    def __init__(self, client: Redis):
-        self.client = client
-
-    def incr(self, key: str):
-        return self.client.incr(key)
-
-    def expire(self, key: str, ex: int):
-        return self.client.expire(key, ex)
-
-
 class RateLimiterMiddleware(object):
+    """
+    Limits number of requests to the selected end-points, see `rate_limit.engine` module for details.
+    Requests are checked in `process_view()`, when all other middlewares already populated `request.user`.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
         self.enabled = settings.RATE_LIMIT_ENABLED
-        self.limit = settings.RATE_LIMIT_COUNT
-        self.window = settings.RATE_LIMIT_WINDOW_SECONDS
-        self.targets = settings.RATE_LIMIT_TARGET_PATHS
-        self.redis_client = RedisClient(client=Redis())
+        self.limiter = engine.RateLimiter() if self.enabled else None
 
     def __call__(self, request):
-        if not self.enabled:
-            return self.get_response(request)
+        return self.get_response(request)
 
-        ip_addr = self.client_ip(request)
-        request_path = (request.path or '').rstrip("/")
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled:
+            return None
 
         # Only use rate limiter for the selected end-points
-        if (request.method, request_path.rstrip("/")) not in self.targets:
-            return self.get_response(request)
-
-        # Create the cache key using the client's IP and the current minute timestamp
-        key = f"{ip_addr}:{int(time.time() // self.window)}"
-
-        # Check the current request count for the client
-        request_count = self.redis_client.incr(key)
-        if request_count is None:
-            # ignore Cache errors
-            return self.get_response(request)
+        rule = self.limiter.find_rule(request.method, request.path or '')
+        if not rule:
+            return None
 
-        if request_count == 1:
-            # Set an expiration for the key if it's the first request within the window
-            self.redis_client.expire(key, self.window)
-
-        # Check if the client has exceeded the rate limit
-        if request_count > self.limit:
-            logger.critical(f"Rate limit exceeded for [{key}]")
+        if not self.limiter.hit(rule, self.identity(request, rule)):
             return HttpResponseRateLimitExceeded(content=b'please try again later')
 
-        return self.get_response(request)
+        return None
+
+    def identity(self, request, rule):
+        if rule.per == 'user':
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                return 'user:%s' % user.pk
+        return 'ip:%s' % self.client_ip(request)
 
     def client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -1,9 +1,11 @@
+import time
 import mock
 import pytest
 
 from tests import testsupport
 
 from accounts import notifications
+from accounts.models.notification import Notification
 
 
 @pytest.mark.django_db
@@ -115,3 +117,69 @@ def test_process_notifications_queue_with_failed(mock_send):
     notifications.process_notifications_queue(iterations=1, delay=0.1, iteration_delay=0.1)
     new_notification.refresh_from_db()
     assert new_notification.status == 'failed'
+
+
+@pytest.mark.django_db
+@mock.patch('accounts.notifications.get_connection')
+@mock.patch('accounts.notifications.EmailMultiAlternatives.send')
+def test_send_notifications_batch_one_connection(mock_send, mock_get_connection):
+    tester = testsupport.prepare_tester_account()
+    for domain_name in ('abcd.ai', 'efgh.ai', 'ijkl.ai', ):
+        notifications.start_email_notification_domain_expiring(
+            user=tester,
+            domain_name=domain_name,
+            expiry_date='2050-01-01',
+        )
+    mock_send.return_value = True
+    bucket = notifications.TokenBucket(rate=0)
+    assert notifications.send_notifications_batch(bucket, batch_size=2) == 2
+    assert notifications.send_notifications_batch(bucket, batch_size=2) == 1
+    assert notifications.send_notifications_batch(bucket, batch_size=2) == 0
+    assert mock_get_connection.call_count == 2
+    assert mock_send.call_count == 3
+    assert Notification.notifications.filter(status='sent').count() == 3
+
+
+@pytest.mark.django_db
+@mock.patch('accounts.notifications.get_connection')
+@mock.patch('accounts.notifications.EmailMultiAlternatives.send')
+def test_send_notifications_batch_connection_reopened(mock_send, mock_get_connection):
+    tester = testsupport.prepare_tester_account()
+    for domain_name in ('abcd.ai', 'efgh.ai', 'ijkl.ai', ):
+        notifications.start_email_notification_domain_expiring(
+            user=tester,
+            domain_name=domain_name,
+            expiry_date='2050-01-01',
+        )
+    mock_send.side_effect = [Exception('connection lost'), True, True, ]
+    bucket = notifications.TokenBucket(rate=0)
+    assert notifications.send_notifications_batch(bucket, batch_size=3) == 3
+    connection = mock_get_connection.return_value
+    assert mock_get_connection.call_count == 1
+    assert connection.open.call_count == 2
+    assert connection.close.call_count == 2
+    assert Notification.notifications.filter(status='failed').count() == 1
+    assert Notification.notifications.filter(status='sent').count() == 2
+
+
+@pytest.mark.django_db
+@mock.patch('accounts.notifications.EmailMultiAlternatives.send')
+def test_process_notifications_queue_skipped(mock_send):
+    tester = testsupport.prepare_tester_account(email_notifications_enabled=False)
+    new_notification = notifications.start_email_notification_domain_expiring(
+        user=tester,
+        domain_name='abcd.ai',
+        expiry_date='2050-01-01',
+    )
+    notifications.process_notifications_queue(iterations=1, delay=0.1, iteration_delay=0.1)
+    new_notification.refresh_from_db()
+    assert new_notification.status == 'skipped'
+    mock_send.assert_not_called()
+
+
+def test_token_bucket():
+    bucket = notifications.TokenBucket(rate=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(10):
+        bucket.consume()
+    assert time.monotonic() - started >= 0.09
@@ -9,7 +9,7 @@ from django.test import TestCase
 
 from tests import testsupport
 
-from accounts.tasks import activations_cleanup, check_notify_domain_expiring
+from accounts.tasks import activations_cleanup, check_notify_domain_expiring, check_notify_domains_expiring
 from accounts.models import Account
 from accounts.models.activation import Activation
 from accounts.models.notification import Notification
@@ -335,3 +335,31 @@ class TestCheckNotifyDomainExpiring(TestCase):
             subject='domain_expiring',
         )
         assert len(outgoing_emails_one_more) == 0
+
+    @pytest.mark.django_db
+    def test_all_windows_single_pass(self):
+        windows = [
+            (0, 2, 'domain_expire_in_1_day', ),
+            (7, 30, 'domain_expire_soon', ),
+            (31, 60, 'domain_expiring', ),
+        ]
+        for i, days in enumerate([1, 15, 45, 75, ]):
+            tester = testsupport.prepare_tester_account(email='tester%d@zenaida.ai' % i)
+            tester_domain = testsupport.prepare_tester_domain(
+                domain_name='abcd%d.ai' % i,
+                tester=tester,
+                domain_epp_id='aaa12%d' % i,
+            )
+            tester_domain.expiry_date = timezone.now() + datetime.timedelta(days=days, hours=1)
+            tester_domain.status = 'active'
+            tester_domain.save()
+        with self.assertNumQueries(2):
+            outgoing_emails = check_notify_domains_expiring(windows=windows, dry_run=False)
+        assert sorted((e[1], e[3], ) for e in outgoing_emails) == [
+            ('abcd0.ai', 'domain_expire_in_1_day', ),
+            ('abcd1.ai', 'domain_expire_soon', ),
+            ('abcd2.ai', 'domain_expiring', ),
+        ]
+        assert Notification.notifications.count() == 3
+        with self.assertNumQueries(1):
+            assert check_notify_domains_expiring(windows=windows, dry_run=False) == []
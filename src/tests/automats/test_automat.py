@@ -0,0 +1,138 @@
+from django.test import override_settings
+
+from automats import automat
+
+
+class SimpleMachine(automat.Automat):
+
+    def __init__(self, **kwargs):
+        super(SimpleMachine, self).__init__(name='simple_machine', state='AT_STARTUP', outputs=[], **kwargs)
+
+    def init(self):
+        self.runs = 0
+
+    def A(self, event, *args, **kwargs):
+        if self.state == 'AT_STARTUP':
+            if event == 'run':
+                self.state = 'DONE'
+                self.runs += 1
+                self.outputs.append(args[0])
+        return None
+
+
+def test_not_registered():
+    m = SimpleMachine(registered=False)
+    assert m.index not in automat.objects()
+    m.event('run', 'abc')
+    assert m.state == 'DONE'
+    assert m.outputs == ['abc', ]
+
+
+def test_live_count():
+    before = automat.live_count()
+    m = SimpleMachine(registered=False)
+    assert automat.live_count() == before + 1
+    del m
+    assert automat.live_count() == before
+
+
+def test_reset():
+    m = SimpleMachine(registered=False)
+    m.event('run', 'abc')
+    m.reset(raise_errors=True)
+    assert m.state == 'AT_STARTUP'
+    assert m.outputs == []
+    assert m.runs == 0
+    assert m.raise_errors is True
+
+
+@override_settings(DEBUG=True)
+def test_reset_log_flags_like_constructor():
+    m = SimpleMachine(registered=False, log_events=None, log_transitions=None)
+    assert m.log_events is True
+    assert m.log_transitions is True
+    m.reset(log_events=False, log_transitions=False)
+    assert m.log_events is False
+    m.reset(log_events=None, log_transitions=None)
+    assert m.log_events is True
+    assert m.log_transitions is True
+
+
+class SlottedMachine(automat.Automat):
+
+    __slots__ = ('state', 'runs', )
+
+    def __init__(self, **kwargs):
+        super(SlottedMachine, self).__init__(name='slotted_machine', state='AT_STARTUP', outputs=[], **kwargs)
+
+    def init(self):
+        self.runs = 0
+
+    def A(self, event, *args, **kwargs):
+        if self.state == 'AT_STARTUP' and event == 'run':
+            self.state = 'DONE'
+            self.runs += 1
+        return None
+
+
+def test_slotted_machine_without_dict():
+    m = SlottedMachine(registered=False)
+    assert not hasattr(m, '__dict__')
+    m.event('run')
+    assert m.state == 'DONE'
+    m.reset()
+    assert m.state == 'AT_STARTUP'
+    assert m.runs == 0
+
+
+def test_pool_reuse():
+    pool = automat.AutomatPool(SimpleMachine, size=1)
+    m1 = pool.acquire()
+    m1.event('run', 'abc')
+    assert pool.release(m1) is True
+    m2 = pool.acquire()
+    assert m2 is m1
+    assert m2.state == 'AT_STARTUP'
+    m3 = pool.acquire()
+    assert m3 is not m2
+    assert pool.release(m2) is True
+    assert pool.release(m3) is False
+    assert pool.to_dict() == {'idle': 1, 'created': 2, 'reused': 1, }
+
+
+class TableMachine(automat.Automat):
+
+    transitions = {
+        ('AT_STARTUP', 'run'): [
+            (None, 'READY', ['doInit', ]),
+        ],
+        ('READY', 'response'): [
+            (lambda self, *args, **kwargs: args[0] == 'ok', 'DONE', ['doReport(event)', ]),
+            (None, 'FAILED', ['doReport(event)', ]),
+        ],
+    }
+
+    def __init__(self, **kwargs):
+        super(TableMachine, self).__init__(name='table_machine', state='AT_STARTUP', outputs=[], **kwargs)
+
+    def doInit(self, *args, **kwargs):
+        self.outputs.append('init')
+
+    def doReport(self, event, *args, **kwargs):
+        self.outputs.append((event, args[0], ))
+
+
+def test_transitions_table():
+    m = TableMachine(registered=False)
+    m.event('response', 'ok')
+    assert m.state == 'AT_STARTUP'
+    m.event('run')
+    assert m.state == 'READY'
+    m.event('response', 'ok')
+    assert m.state == 'DONE'
+    assert m.outputs == ['init', ('response', 'ok', ), ]
+    m.reset()
+    m.event('run')
+    m.event('response', 'bad')
+    assert m.state == 'FAILED'
+    assert '_compiled_transitions' in TableMachine.__dict__
@@ -1,4 +1,5 @@
 import os
+import mock
 import pytest
 
 from django.conf import settings
@@ -75,3 +76,22 @@ def test_domain_refreshed():
     assert outputs[2]['epp']['response']['result']['@code'] == '1000'
     assert outputs[3]['epp']['response']['result']['@code'] == '1000'
     assert outputs[4]['epp']['response']['result']['@code'] == '1000'
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zdomains.domain_join_contact')
+def test_upper_case_contact_ids_in_sync(mock_domain_join_contact):
+    tester_domain = testsupport.prepare_tester_domain(
+        domain_name='abc.ai',
+        epp_id_dict={'registrant': 'reg1', 'admin': 'adm1', 'billing': 'bil1', 'tech': 'tech1', },
+    )
+    dr = domain_refresher.DomainRefresher()
+    dr.target_domain = tester_domain
+    dr.change_owner_allowed = False
+    dr.doDBCheckChangeContacts({
+        'admin': {'id': 'ADM1', },
+        'billing': {'id': 'Bil1', },
+        'tech': {'id': 'TECH1', },
+    })
+    assert mock_domain_join_contact.call_count == 0
+    dr.destroy()
@@ -0,0 +1,64 @@
+import time
+
+from automats import automat
+from automats import tracing
+
+
+class NestedMachine(automat.Automat):
+
+    def __init__(self, **kwargs):
+        super(NestedMachine, self).__init__(name='nested_machine', state='AT_STARTUP', outputs=[], **kwargs)
+
+    def A(self, event, *args, **kwargs):
+        if self.state == 'AT_STARTUP':
+            if event == 'run':
+                self.state = 'REQUEST'
+                self.doEppRequest(*args, **kwargs)
+        elif self.state == 'REQUEST':
+            if event == 'response':
+                self.state = 'DONE'
+                self.doSaveToDB(*args, **kwargs)
+        return None
+
+    def doEppRequest(self, *args, **kwargs):
+        time.sleep(0.02)
+        self.event('response')
+
+    def doSaveToDB(self, *args, **kwargs):
+        time.sleep(0.05)
+
+
+def test_histogram():
+    h = tracing.Histogram()
+    for v in (0.0005, 0.002, 0.2, 100.0, ):
+        h.add(v)
+    assert h.count == 4
+    assert h.buckets[0] == 1
+    assert h.buckets[-1] == 1
+    assert h.max == 100.0
+    assert h.percentile(50) == 0.005
+    other = tracing.Histogram()
+    other.merge(h.to_dict())
+    assert other.to_dict() == h.to_dict()
+
+
+def test_tracer_nested_actions(tmpdir):
+    tracer = tracing.TransitionsTracer(folder_path=str(tmpdir), flush_interval=3600)
+    automat.SetTracer(tracer)
+    try:
+        m = NestedMachine(registered=False)
+        m.event('run')
+        assert m.state == 'DONE'
+    finally:
+        automat.SetTracer(None)
+    actions = tracer.to_dict()['actions']['NestedMachine']
+    assert actions['doEppRequest']['count'] == 1
+    assert actions['doSaveToDB']['count'] == 1
+    assert actions['doEppRequest']['total'] < 0.05
+    assert actions['doSaveToDB']['total'] >= 0.05
+    assert 'AT_STARTUP' in tracer.to_dict()['states']['NestedMachine']
+    assert tracer.flush() is True
+    data = tracing.read_all(folder_path=str(tmpdir))
+    rows = tracing.report_rows(data, section='actions')
+    assert [r['name'] for r in rows] == ['doSaveToDB', 'doEppRequest', ]
+    assert tracing.clear_all(folder_path=str(tmpdir)) == 1
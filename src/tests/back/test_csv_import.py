@@ -1,3 +1,4 @@
+import csv
 import os
 import pytest
 
@@ -35,3 +36,43 @@ def test_domain_regenerate_from_csv_row():
     assert domain2.registrant.epp_id == 'epp583472wixr'
     assert domain2.contact_admin.epp_id == 'epp583456ht51'
     assert domain2.list_nameservers() == ['ns1.google.com', 'ns2.google.com', 'ns3.google.com', '']
+
+
+@pytest.mark.django_db
+def test_load_from_csv_resume_from_row():
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    progress = []
+    assert csv_import.load_from_csv(
+        filename, dry_run=False, start_row=2, chunk_size=1,
+        progress=lambda row_number, stats: progress.append((row_number, stats, )),
+    ) == 2
+    assert zdomains.domain_find('test-import-1.ai') is None
+    assert zdomains.domain_find('test-import-2.ai') is not None
+    assert progress == [(2, {'processed': 1, }, ), ]
+
+
+def test_parse_csv_chunk():
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    with open(filename) as csv_file:
+        rows = list(csv.reader(csv_file))
+    parsed = csv_import.parse_csv_chunk([(1, rows[1], ), (2, ['broken', ], ), ], rows[0])
+    assert parsed[0][0] == 1
+    assert parsed[0][2].name == 'test-import-1.ai'
+    assert parsed[0][3] is None
+    assert parsed[1][3].startswith('failed processing csv record')
+
+
+def test_make_row_parser():
+    headers = ['client_id', 'x', 'x', 'x', 'name', 'create_date', 'expiry_date', 'eppstatus', ] + ['x', ] * 19 + ['registrant_Phone', ]
+    headers[25] = 'registrant_email'
+    row = ['zenaida_ai', '', '', '', 'abc.ai', '2020-01-02', '2030-1-2', 'Ok', ] + [''] * 19 + [' +1 (264) 555-12.34 ', ]
+    row[25] = ' Tester@Zenaida.AI '
+    record = csv_import.make_row_parser(headers)(row)
+    assert record.client_id == 'zenaida_ai'
+    assert record.roid is None
+    assert record.name == 'abc.ai'
+    assert record.expiry_date.year == 2030
+    assert record.registrant['contact_voice'] == '+126455512.34'
+    assert record.registrant['contact_email'] == 'tester@zenaida.ai'
+    assert record.admin['contact_email'] == ''
+    assert record.nameservers == ['', '', '', '', ]
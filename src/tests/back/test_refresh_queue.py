@@ -0,0 +1,50 @@
+import datetime
+import mock
+import pytest
+
+from django.utils import timezone
+
+from back import refresh_queue
+from back.models.domain_refresh import DomainRefresh
+
+from tests import testsupport
+
+
+@pytest.mark.django_db
+def test_enqueue_only_stale_domains_once():
+    tester = testsupport.prepare_tester_account()
+    fresh = testsupport.prepare_tester_domain(domain_name='fresh.ai', tester=tester)
+    fresh.latest_sync_date = timezone.now() - datetime.timedelta(hours=1)
+    fresh.save()
+    stale = testsupport.prepare_tester_domain(domain_name='stale.ai', tester=tester)
+    stale.latest_sync_date = timezone.now() - datetime.timedelta(hours=13)
+    stale.save()
+    assert refresh_queue.enqueue([fresh, stale, ], hours_passed=12) == {'stale.ai', }
+    assert refresh_queue.enqueue([fresh, stale, ], hours_passed=12) == {'stale.ai', }
+    assert DomainRefresh.refreshes.count() == 1
+
+
+@pytest.mark.django_db
+def test_claim_and_refresh():
+    DomainRefresh.refreshes.create(domain_name='abc.ai')
+    claimed = refresh_queue.claim(limit=5, timeout=60)
+    assert [r.domain_name for r in claimed] == ['abc.ai', ]
+    assert refresh_queue.claim(limit=5, timeout=60) == []
+    with mock.patch('zen.zmaster.domains_bulk_synchronize') as mock_sync:
+        mock_sync.return_value = {'abc.ai': ['ok', ], }
+        assert refresh_queue.refresh(claimed) == {'abc.ai', }
+    assert mock_sync.call_args[1]['domain_names'] == ['abc.ai', ]
+    assert DomainRefresh.refreshes.count() == 0
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domains_bulk_synchronize')
+def test_process_queue_one_bulk_call(mock_sync):
+    for domain_name in ('a1.ai', 'a2.ai', 'a3.ai', ):
+        DomainRefresh.refreshes.create(domain_name=domain_name)
+    mock_sync.return_value = {'a1.ai': ['ok', ], 'a2.ai': [Exception('failed'), ], 'a3.ai': ['ok', ], }
+    assert refresh_queue.process_queue(batch_size=5, iterations=1, delay=0) == 2
+    assert mock_sync.call_count == 1
+    assert sorted(mock_sync.call_args[1]['domain_names']) == ['a1.ai', 'a2.ai', 'a3.ai', ]
+    # failed domain will be added to the queue again next time the page is opened
+    assert DomainRefresh.refreshes.count() == 0
@@ -0,0 +1,49 @@
+import datetime
+import pytest
+
+from django.utils import timezone
+
+from back import scheduler
+from back.models.background_task import BackgroundTask
+
+
+@pytest.mark.django_db
+def test_claim_task_overlap():
+    task = scheduler.Task('some_task', lambda: None, interval=60, timeout=10)
+    assert scheduler.claim_task(task) is True
+    assert scheduler.claim_task(task) is False
+    assert scheduler.claim_task(task, now=timezone.now() + datetime.timedelta(seconds=11)) is True
+    scheduler.release_task(task, status='succeeded', duration=1.5)
+    bt = BackgroundTask.tasks.get(name='some_task')
+    assert bt.locked_until is None
+    assert bt.last_status == 'succeeded'
+    assert bt.last_duration == 1.5
+    assert bt.runs_count == 1
+    assert scheduler.claim_task(task) is True
+
+
+@pytest.mark.django_db
+def test_run_pending_priority_and_failures():
+    executed = []
+
+    def _failing():
+        executed.append('failing')
+        raise Exception('some error')
+
+    tasks = [
+        scheduler.Task('low', lambda: executed.append('low'), interval=60, priority=20),
+        scheduler.Task('failing', _failing, interval=60, priority=5),
+        scheduler.Task('high', lambda: executed.append('high'), interval=60, priority=0),
+    ]
+    s = scheduler.Scheduler(tasks)
+    s.load_schedule()
+    assert s.run_pending() == 3
+    assert executed == ['high', 'failing', 'low', ]
+    assert s.run_pending() == 0
+    failed = BackgroundTask.tasks.get(name='failing')
+    assert failed.last_status == 'failed'
+    assert failed.failures_count == 1
+    assert 'some error' in failed.last_error
+    s2 = scheduler.Scheduler(tasks)
+    s2.load_schedule()
+    assert s2.due_tasks() == []
@@ -36,9 +36,9 @@ class TestSyncExpiredDomains(TestCase):
         assert report[0] == (tester_domain, [], )
 
     @pytest.mark.django_db
-    @mock.patch('zen.zmaster.domain_synchronize_from_backend')
-    def test_ok(self, mock_domain_synchronize_from_backend):
-        mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    @mock.patch('zen.zmaster.domains_bulk_synchronize')
+    def test_ok(self, mock_domains_bulk_synchronize):
+        mock_domains_bulk_synchronize.return_value = {'abcd.ai': ['ok', ], }
         tester = testsupport.prepare_tester_account()
         tester_domain = testsupport.prepare_tester_domain(
             domain_name='abcd.ai',
@@ -449,6 +449,60 @@ class TestAutoRenewExpiringDomains(TestCase):
         assert report[0][1] == tester.email
         assert report[0][2].args[0] == 'renew order status is failed'
 
+    @pytest.mark.django_db
+    def test_balance_reserved_for_domain_expiring_first(self):
+        tester = testsupport.prepare_tester_account(account_balance=150.0)
+        testsupport.prepare_tester_domain(
+            domain_name='abcd.ai',
+            tester=tester,
+            domain_epp_id='aaa123',
+            domain_status='active',
+            expiry_date=timezone.now() + datetime.timedelta(days=89),  # will expire in 89 days
+            auto_renew_enabled=True,
+        )
+        testsupport.prepare_tester_domain(
+            domain_name='efgh.ai',
+            tester=tester,
+            domain_epp_id='bbb123',
+            domain_status='active',
+            expiry_date=timezone.now() + datetime.timedelta(days=70),  # will expire in 70 days
+            auto_renew_enabled=True,
+        )
+        report = tasks.auto_renew_expiring_domains(dry_run=True)
+        assert len(report) == 3
+        assert report[0][0] == 'efgh.ai'
+        assert isinstance(report[0][2], datetime.datetime)
+        assert report[1][0] == 'abcd.ai'
+        assert report[1][2].args[0] == 'not enough funds'
+        assert report[2] == (None, tester.email, True, )
+
+    @pytest.mark.django_db
+    def test_balance_reserved_for_expired_domain_first(self):
+        tester = testsupport.prepare_tester_account(account_balance=150.0)
+        testsupport.prepare_tester_domain(
+            domain_name='abcd.ai',
+            tester=tester,
+            domain_epp_id='aaa123',
+            domain_status='active',
+            expiry_date=timezone.now() + datetime.timedelta(days=70),  # will expire in 70 days
+            auto_renew_enabled=True,
+        )
+        testsupport.prepare_tester_domain(
+            domain_name='efgh.ai',
+            tester=tester,
+            domain_epp_id='bbb123',
+            domain_status='suspended',
+            expiry_date=timezone.now() - datetime.timedelta(days=1),  # expired yesterday
+            auto_renew_enabled=True,
+        )
+        report = tasks.auto_renew_expiring_domains(dry_run=True)
+        assert len(report) == 3
+        assert report[0][0] == 'efgh.ai'
+        assert isinstance(report[0][2], datetime.datetime)
+        assert report[1][0] == 'abcd.ai'
+        assert report[1][2].args[0] == 'not enough funds'
+        assert report[2] == (None, tester.email, True, )
+
     @pytest.mark.django_db
     def test_domain_auto_renew_disabled(self):
         tester = testsupport.prepare_tester_account(
@@ -19,13 +19,39 @@ class TestBruteForceProtection(TestCase):
     def test_read_total_attempts(self):
         assert self.brute_force_protection.read_total_attempts() == 0
 
-    @mock.patch('django.core.cache.cache.set')
-    def test_increase_total_attempts(self, mock_cache_set):
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_total_attempts(self, mock_cache_incr, mock_cache_add):
+        mock_cache_incr.side_effect = ValueError('Key not found')
+        mock_cache_add.return_value = True
         assert self.brute_force_protection.increase_total_attempts() == 1
-        mock_cache_set.assert_called_once_with('test_hashkey_prefix_192.168.1.1', 1, timeout=2)
+        mock_cache_add.assert_called_once_with('test_hashkey_prefix_192.168.1.1', 1, timeout=2)
 
-    @mock.patch('django.core.cache.cache.get')
-    def test_register_attempt_returns_exception(self, mock_cache_get):
-        mock_cache_get.return_value = 2
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_existing_counter(self, mock_cache_incr, mock_cache_add):
+        mock_cache_incr.return_value = 5
+        assert self.brute_force_protection.increase_total_attempts() == 5
+        mock_cache_incr.assert_called_once_with('test_hashkey_prefix_192.168.1.1')
+        mock_cache_add.assert_not_called()
+
+    @mock.patch('django.core.cache.cache.incr')
+    def test_register_attempt_returns_exception(self, mock_cache_incr):
+        mock_cache_incr.return_value = 2
         with pytest.raises(ExceededMaxAttemptsException):
             self.brute_force_protection.register_attempt()
+
+    @mock.patch('django.core.cache.cache.incr')
+    def test_blocked_key_not_going_to_cache(self, mock_cache_incr):
+        brute_force_protection = BruteForceProtection(
+            cache_key_prefix="test_hashkey_prefix",
+            key="192.168.1.2",
+            max_attempts=1,
+            timeout=2
+        )
+        mock_cache_incr.return_value = 2
+        with pytest.raises(ExceededMaxAttemptsException):
+            brute_force_protection.register_attempt()
+        with pytest.raises(ExceededMaxAttemptsException):
+            brute_force_protection.register_attempt()
+        assert mock_cache_incr.call_count == 1
@@ -28,3 +28,19 @@ class TestEmail(object):
         )
 
         mock_log_exception.assert_called_once_with("Failed to send email")
+
+    @mock.patch("django.core.mail.message.EmailMultiAlternatives.send", autospec=True)
+    def test_send_email_html_without_copies(self, mock_mail_send):
+        send_email(
+            subject="Subject",
+            text_content="Text Content",
+            from_email="noreply@example.com",
+            to_email="receiver@example.com",
+            html_content="<b>Text Content</b>",
+        )
+
+        message = mock_mail_send.call_args[0][0]
+        assert message.to == ["receiver@example.com"]
+        assert message.cc == []
+        assert message.bcc == []
+        assert message.alternatives == [("<b>Text Content</b>", "text/html")]
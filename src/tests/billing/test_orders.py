@@ -260,3 +260,27 @@ class TestOrders(TestCase):
         assert l[0].id == order_object_3.id
         assert l[1].id == order_object_2.id
         assert l[2].id == order_object_1.id
+
+
+@pytest.mark.django_db
+def test_list_processed_orders_by_date_for_specific_user():
+    tester = testsupport.prepare_tester_account()
+    for year in (2019, 2020, 2021, 2022, ):
+        testsupport.prepare_tester_order(
+            domain_name='abcd.ai',
+            status='processed',
+            item_status='processed',
+            finished_at=timezone.make_aware(datetime.datetime(year, 6, 1)),
+            owner=tester,
+        )
+    testsupport.prepare_tester_order(
+        domain_name='abcd.ai',
+        status='cancelled',
+        finished_at=timezone.make_aware(datetime.datetime(2020, 7, 1)),
+        owner=tester,
+    )
+    l = orders.list_processed_orders_by_date_for_specific_user(tester, year=2020, year_till=2021)
+    assert [o.finished_at.year for o in l] == [2021, 2020, ]
+    assert l[0].items.all()[0].name == 'abcd.ai'
+    assert len(orders.list_processed_orders_by_date_for_specific_user(tester, year=2020, month=6)) == 1
+    assert len(orders.list_processed_orders_by_date_for_specific_user(tester, year=None)) == 4
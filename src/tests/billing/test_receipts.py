@@ -0,0 +1,49 @@
+import hashlib
+import datetime
+import mock
+import pytest
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from billing import orders
+from billing import receipts
+
+from tests import testsupport
+
+
+def test_is_period_closed():
+    now = datetime.datetime(2020, 5, 10, tzinfo=datetime.timezone.utc)
+    assert receipts.is_period_closed(year=2020, month=4, now=now) is True
+    assert receipts.is_period_closed(year=2020, month=5, now=now) is False
+    assert receipts.is_period_closed(year=2019, now=now) is True
+    assert receipts.is_period_closed(year=2020, now=now) is False
+    assert receipts.is_period_closed(year=2018, year_till=2020, now=now) is False
+    assert receipts.is_period_closed(now=now) is False
+
+
+@pytest.mark.django_db
+@mock.patch('billing.receipts.get_template')
+@mock.patch('pdfkit.from_string')
+def test_build_receipt_in_memory_and_cached(mock_from_string, mock_get_template):
+    mock_get_template.return_value.render.return_value = '<html>receipt</html>'
+    mock_from_string.return_value = b'%PDF-1.4 receipt'
+    tester = testsupport.prepare_tester_account()
+    previous_year = timezone.now().year - 1
+    testsupport.prepare_tester_order(
+        domain_name='test.ai',
+        status='processed',
+        finished_at=datetime.datetime(previous_year, 6, 1, tzinfo=datetime.timezone.utc),
+        owner=tester,
+    )
+    test_cache = LocMemCache('test_build_receipt', {})
+    with mock.patch('billing.receipts.cache', test_cache):
+        first = orders.build_receipt(owner=tester, year=previous_year)
+        second = orders.build_receipt(owner=tester, year=previous_year)
+    assert first['body'] == second['body'] == b'%PDF-1.4 receipt'
+    assert first['filename'] == '{}_receipt.pdf'.format(previous_year)
+    assert mock_from_string.call_count == 1
+    mock_from_string.assert_called_once_with('<html>receipt</html>', False)
+    cache_key = 'zenaida_receipt_{}_{}_all_{}'.format(
+        tester.pk, previous_year, hashlib.sha256(b'<html>receipt</html>').hexdigest(), )
+    assert test_cache.get(cache_key) == b'%PDF-1.4 receipt'
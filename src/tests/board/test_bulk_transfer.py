@@ -0,0 +1,135 @@
+import mock
+import pytest
+
+from billing import orders
+
+from board import bulk_transfer
+from board.models.bulk_transfer import BulkTransfer
+
+from tests import testsupport
+
+
+def _domain_info(domain_name, registrar='12345', statuses=None):
+    return [{
+        'epp': {
+            'response': {
+                'resData': {
+                    'infData': {
+                        'clID': registrar,
+                        'status': statuses or {'@s': 'ok', },
+                        'authInfo': {
+                            'pw': 'Authinfo Correct',
+                        },
+                    },
+                },
+            },
+        },
+    }, {
+        domain_name: True,
+    }, ]
+
+
+def test_parse_line():
+    assert bulk_transfer.parse_line('abc.ai,12345\n') == ('abc.ai', '12345', )
+    assert bulk_transfer.parse_line(' ABC.ai ; 12345 ') == ('abc.ai', '12345', )
+    assert bulk_transfer.parse_line('abc.ai|123 45') == ('abc.ai', '123 45', )
+    assert bulk_transfer.parse_line('abc.ai 12345') == ('abc.ai', '12345', )
+    assert bulk_transfer.parse_line('abc.ai') is None
+
+
+@pytest.mark.django_db
+def test_create():
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai')
+    job = bulk_transfer.create(new_owner, 'abc.ai,12345\n\nabc.ai,12345\nbad-line\nxyz.ai,54321\n')
+    assert job.status == 'pending'
+    assert job.total_count == 3
+    assert job.processed_count == 1
+    assert bulk_transfer.build_report(job) == '[abc.ai]\n[bad-line] invalid input line\n[xyz.ai]\n'
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.execute_order')
+@mock.patch('zen.zmaster.domain_read_info')
+def test_execute(mock_domain_read_info, mock_execute_order):
+    old_owner = testsupport.prepare_tester_account(email='old_owner@zenaida.ai')
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai', account_balance=1000)
+    testsupport.prepare_tester_domain(domain_name='abc.ai', tester=old_owner)
+    testsupport.prepare_tester_domain(domain_name='xyz.ai', tester=new_owner)
+    mock_domain_read_info.side_effect = lambda domain, auth_info, return_outputs: _domain_info(domain)
+    mock_execute_order.return_value = 'processed'
+    job = bulk_transfer.create(new_owner, 'abc.ai,12345\nxyz.ai,12345\nnot-exist.ai,12345\n')
+    assert bulk_transfer.claim_next().pk == job.pk
+    assert bulk_transfer.execute(job, workers=1) is True
+    assert job.status == 'finished'
+    assert job.processed_count == 3
+    assert job.succeeded_count == 1
+    items = {item.domain_name: item for item in job.items.all()}
+    assert items['abc.ai'].status == 'succeeded'
+    assert items['abc.ai'].order_id == mock_execute_order.call_args[0][0].pk
+    assert items['xyz.ai'].result.startswith('domain is already owned by')
+    assert items['not-exist.ai'].result == 'domain does not exist'
+    order_item = mock_execute_order.call_args[0][0].items.first()
+    assert order_item.name == 'abc.ai'
+    assert order_item.details == {'transfer_code': '12345', 'rewrite_contacts': True, 'internal': False}
+    # started again only not processed domains are transferred
+    assert bulk_transfer.execute(job, workers=1) is True
+    assert mock_execute_order.call_count == 1
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.execute_order')
+@mock.patch('zen.zmaster.domain_read_info')
+def test_execute_transfer_prohibited(mock_domain_read_info, mock_execute_order):
+    old_owner = testsupport.prepare_tester_account(email='old_owner@zenaida.ai')
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai', account_balance=1000)
+    testsupport.prepare_tester_domain(domain_name='abc.ai', tester=old_owner)
+    mock_domain_read_info.return_value = _domain_info('abc.ai', statuses=[{'@s': 'ok', }, {'@s': 'clientTransferProhibited', }, ])
+    job = bulk_transfer.create(new_owner, 'abc.ai,12345\n')
+    assert bulk_transfer.execute(job, workers=1) is True
+    item = job.items.first()
+    assert item.status == 'failed'
+    assert item.result == 'transfer failed because domain was locked or auth code was wrong'
+    mock_execute_order.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_restart_stale_jobs():
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai')
+    job = BulkTransfer.transfers.create(new_owner=new_owner, status='started')
+    assert bulk_transfer.restart_stale_jobs(stale_seconds=60) == 1
+    job.refresh_from_db()
+    assert job.status == 'pending'
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.execute_order')
+@mock.patch('zen.zmaster.domain_read_info')
+def test_restart_interrupted_items(mock_domain_read_info, mock_execute_order):
+    old_owner = testsupport.prepare_tester_account(email='old_owner@zenaida.ai')
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai', account_balance=1000)
+    testsupport.prepare_tester_domain(domain_name='abc.ai', tester=old_owner)
+    testsupport.prepare_tester_domain(domain_name='xyz.ai', tester=old_owner)
+    mock_domain_read_info.side_effect = lambda domain, auth_info, return_outputs: _domain_info(domain)
+    mock_execute_order.return_value = 'pending'
+    job = bulk_transfer.create(new_owner, 'abc.ai,12345\nxyz.ai,12345\n')
+    existing_order = orders.order_single_item(
+        owner=new_owner,
+        item_type='domain_transfer',
+        item_price=0,
+        item_name='abc.ai',
+    )
+    # worker was interrupted after the order for abc.ai was created and while xyz.ai was verified
+    job.items.filter(domain_name='abc.ai').update(status='executing', order=existing_order)
+    job.items.filter(domain_name='xyz.ai').update(status='executing')
+    BulkTransfer.transfers.filter(pk=job.pk).update(status='started')
+    assert bulk_transfer.restart_stale_jobs(stale_seconds=60) == 1
+    items = {item.domain_name: item for item in job.items.all()}
+    assert items['abc.ai'].status == 'executing'
+    assert items['xyz.ai'].status == 'pending'
+    assert bulk_transfer.execute(job, workers=1) is True
+    assert mock_execute_order.call_count == 1
+    assert mock_execute_order.call_args[0][0].items.first().name == 'xyz.ai'
+    # item which is already taken by another worker is not executed again
+    item = job.items.get(domain_name='xyz.ai')
+    assert bulk_transfer.claim_item(item) is False
+
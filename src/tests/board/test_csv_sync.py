@@ -0,0 +1,42 @@
+import os
+import shutil
+import datetime
+import pytest
+
+from django.utils import timezone
+
+from board import csv_sync
+from board.models.csv_file_sync import CSVFileSync
+
+
+@pytest.mark.django_db
+def test_execute_dry_run(tmp_path):
+    filename = str(tmp_path / 'domains.csv')
+    shutil.copy(os.path.join(os.path.dirname(__file__), '..', 'back', 'domains_sample.csv'), filename)
+    record = csv_sync.enqueue(input_filename=filename, dry_run=True)
+    assert csv_sync.claim_next().pk == record.pk
+    assert csv_sync.claim_next() is None
+    assert csv_sync.execute(record) is True
+    assert record.status == 'finished'
+    assert record.processed_count == 2
+    assert record.log_filename == filename + '.log'
+    assert 'is not exist in local DB' in csv_sync.read_log_tail(record)
+
+
+@pytest.mark.django_db
+def test_execute_file_not_found():
+    record = csv_sync.enqueue(input_filename='/tmp/not-existing-file.csv', dry_run=True)
+    assert csv_sync.execute(record) is False
+    record.refresh_from_db()
+    assert record.status == 'failed'
+
+
+@pytest.mark.django_db
+def test_fail_stale_jobs():
+    stale = CSVFileSync.executions.create(input_filename='a.csv', status='started', updated_at=timezone.now() - datetime.timedelta(hours=3))
+    running = CSVFileSync.executions.create(input_filename='b.csv', status='started', updated_at=timezone.now())
+    assert csv_sync.fail_stale_jobs(stale_seconds=60*60) == 1
+    stale.refresh_from_db()
+    running.refresh_from_db()
+    assert stale.status == 'failed'
+    assert running.status == 'started'
@@ -220,37 +220,38 @@ class TestCSVFileSyncView(BaseAuthTesterMixin, TestCase):
         assert response.url == '/'
         mock_messages_error.assert_called_once()
 
-    @mock.patch('subprocess.Popen')
-    def test_another_process_already_started(self, mock_popen):
+    def test_file_queued_while_another_process_running(self):
         CSVFileSync.executions.create(input_filename='abc.csv', dry_run=True, status='started')
         csv_file = SimpleUploadedFile("domains.csv", b"some_text_here", content_type="text/csv")
-        response = self.client.post('/board/csv-file-sync/', {'csv_file': csv_file, 'dry_run': False, })
-        assert response.status_code == 200
-        assert [m for m in response.context['messages']][0].message == 'Another background process is currently running, please wait before starting a new one.'
-        mock_popen.assert_not_called()
+        self.client.post('/board/csv-file-sync/', {'csv_file': csv_file, 'dry_run': False, })
+        latest_record = CSVFileSync.executions.latest('id')
+        assert latest_record.status == 'pending'
+        assert latest_record.dry_run is False
+        os.remove(latest_record.input_filename)
 
-    @mock.patch('subprocess.Popen')
-    def test_dry_run(self, mock_popen):
+    def test_dry_run(self):
         csv_file = SimpleUploadedFile("domains.csv", b"some_text_here", content_type="text/csv")
         self.client.post('/board/csv-file-sync/', {'csv_file': csv_file, 'dry_run': True, })
         latest_record = CSVFileSync.executions.latest('id')
-        popen_cmd = mock_popen.call_args_list[0][0][0]
-        assert popen_cmd.count('src/manage.py csv_import')
-        assert popen_cmd.count('--record_id=%d --dry_run' % latest_record.id)
+        assert latest_record.status == 'pending'
+        assert latest_record.dry_run is True
         os.remove(latest_record.input_filename)
 
-    @mock.patch('subprocess.Popen')
-    def test_file_uploaded(self, mock_popen):
+    def test_file_uploaded(self):
         raw_csv_data = open(os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv')), 'rb').read()
         csv_file = SimpleUploadedFile("domains.csv", raw_csv_data, content_type="text/csv")
         self.client.post('/board/csv-file-sync/', {'csv_file': csv_file})
         latest_record = CSVFileSync.executions.latest('id')
         assert os.path.isfile(latest_record.input_filename)
-        popen_cmd = mock_popen.call_args_list[0][0][0]
-        assert popen_cmd.count('src/manage.py csv_import')
-        assert popen_cmd.count('--record_id=%d ' % latest_record.id)
+        assert open(latest_record.input_filename, 'rb').read() == raw_csv_data
+        assert latest_record.status == 'pending'
         os.remove(latest_record.input_filename)
 
+    def test_progress(self):
+        record = CSVFileSync.executions.create(input_filename='abc.csv', dry_run=True, status='started', processed_count=15)
+        response = self.client.get('/board/csv-file-sync/%d/progress/' % record.id)
+        assert response.json() == {'status': 'started', 'processed_count': 15, 'output_log': None, }
+
 
 class TestSendingSingleEmailView(BaseAuthTesterMixin, TestCase):
 
@@ -1,4 +1,10 @@
 from django import setup
+from django.conf import settings
 
 def pytest_configure():
+    # request logs must be written inside of the test transaction
+    settings.REQUEST_LOG_BUFFERED = False
+    # results of domain checks are mocked in tests and must not be cached between them
+    settings.ZENAIDA_DOMAIN_AVAILABILITY_CACHE_REGISTERED_TTL_SECONDS = 0
+    settings.ZENAIDA_DOMAIN_AVAILABILITY_CACHE_AVAILABLE_TTL_SECONDS = 0
     setup()
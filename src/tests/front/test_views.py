@@ -894,15 +894,15 @@ class TestAccountDomainTransferTakeoverView(BaseAuthTesterMixin, TestCase):
     @mock.patch('zen.zcontacts.list_contacts')
     @mock.patch('back.models.profile.Profile.is_complete')
     @mock.patch('django.contrib.messages.error')
-    @mock.patch('django.core.cache.cache.get')
-    @override_settings(BRUTE_FORCE_PROTECTION_ENABLED=True)
-    def test_domain_transfer_too_many_attempts(self, mock_cache_get, mock_messages_error, mock_user_profile_complete, mock_list_contacts):
+    @mock.patch('django.core.cache.cache.incr')
+    @override_settings(BRUTE_FORCE_PROTECTION_ENABLED=True, BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED=False)
+    def test_domain_transfer_too_many_attempts(self, mock_cache_incr, mock_messages_error, mock_user_profile_complete, mock_list_contacts):
         mock_user_profile_complete.return_value = True
         mock_list_contacts.return_value = [mock.MagicMock(), mock.MagicMock(), ]
-        mock_cache_get.return_value = settings.BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_MAX_ATTEMPTS
+        mock_cache_incr.return_value = settings.BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_MAX_ATTEMPTS + 1
         response = self.client.post('/domains/transfer/', data=dict(domain_name='bitdust.ai', transfer_code='12345'))
         assert response.status_code == 200
-        mock_messages_error.assert_called_once()
+        mock_messages_error.assert_called_once_with(mock.ANY, 'Too many attempts made, please try again later')
 
 
 class TestAccountDomainDSRecordsView(BaseAuthTesterMixin, TestCase):
@@ -1358,14 +1358,14 @@ class TestDomainLookupView(TestCase):
         mock_messages_error.assert_called_once()
 
     @mock.patch('django.contrib.messages.error')
-    @mock.patch('django.core.cache.cache.get')
-    @override_settings(BRUTE_FORCE_PROTECTION_ENABLED=True)
-    def test_domain_lookup_too_many_attempts(self, mock_cache_get, mock_messages_error):
-        mock_cache_get.return_value = settings.BRUTE_FORCE_PROTECTION_DOMAIN_TRANSFER_MAX_ATTEMPTS
+    @mock.patch('django.core.cache.cache.incr')
+    @override_settings(BRUTE_FORCE_PROTECTION_ENABLED=True, BRUTE_FORCE_PROTECTION_LOCAL_CACHE_ENABLED=False)
+    def test_domain_lookup_too_many_attempts(self, mock_cache_incr, mock_messages_error):
+        mock_cache_incr.return_value = settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_MAX_ATTEMPTS + 1
         response = self.client.post('/lookup/', data=dict(domain_name='bitdust.ai'))
         assert response.status_code == 302
         assert response.url == '/lookup/'
-        mock_messages_error.assert_called_once()
+        mock_messages_error.assert_called_once_with(mock.ANY, 'Too many attempts made, please try again later')
 
 
 class TestEPPStatusViewView(BaseAuthTesterMixin, TestCase):
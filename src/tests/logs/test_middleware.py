@@ -0,0 +1,26 @@
+from logs import middleware
+
+
+def test_compile_ignore_paths():
+    ignore_re = middleware.compile_ignore_paths(middleware.IGNORE_PATH_STARTSWITH)
+    assert ignore_re.match('/admin/back/domain/')
+    assert ignore_re.match('/favicon.ico')
+    assert not ignore_re.match('/domains/')
+    assert not middleware.compile_ignore_paths([]).match('/admin/')
+
+
+def test_compile_short_paths():
+    short_paths_re, short_paths = middleware.compile_short_paths(middleware.SHORT_PATHS)
+
+    def short_path(path):
+        matched = short_paths_re.match(path)
+        return short_paths[int(matched.lastgroup[1:])] if matched else path
+
+    assert short_path('/accounts/activate/abcd/') == '/accounts/activate/*'
+    assert short_path('/accounts/password/reset/done/') == '/accounts/password/reset/done/'
+    assert short_path('/accounts/password/abc/def/') == '/accounts/password/*'
+    assert short_path('/billing/order/process/12/') == '/billing/order/process/*'
+    assert short_path('/billing/order/12/') == '/billing/order/*'
+    assert short_path('/domains/12/transfer-code/') == '/domains/*/transfer-code/'
+    assert short_path('/domains/12/ds/') == '/domains/12/ds/'
+    assert short_path('/billing/orders/') == '/billing/orders/'
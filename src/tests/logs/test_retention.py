@@ -0,0 +1,30 @@
+import pytest
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from logs import retention
+from logs.models import RequestLog
+
+
+class TestRequestLogRetention(TestCase):
+
+    @pytest.mark.django_db
+    def test_delete_older_than(self):
+        for i in range(10):
+            RequestLog.objects.create(method='GET', path='/%d/' % i, status_code=200)
+        old_ids = list(RequestLog.objects.order_by('id').values_list('pk', flat=True)[:7])
+        RequestLog.objects.filter(pk__in=old_ids).update(timestamp=timezone.now() - datetime.timedelta(days=40))
+        result = retention.cleanup(days=30, batch_size=3)
+        assert result['rows_removed'] == 7
+        assert result['partitions_dropped'] == 0
+        assert RequestLog.objects.count() == 3
+        assert RequestLog.objects.filter(pk__in=old_ids).count() == 0
+
+    def test_partition_bounds(self):
+        start = datetime.datetime(2024, 12, 1, tzinfo=datetime.timezone.utc)
+        assert retention._partition_name(start, 'monthly') == 'logs_requestlog_p202412'
+        assert retention._partition_bounds('logs_requestlog_p202412') == (start, datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        assert retention._partition_bounds('logs_requestlog_p20241231')[1] == datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        assert retention._partition_bounds('logs_requestlog_default') is None
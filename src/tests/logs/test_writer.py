@@ -0,0 +1,31 @@
+import mock
+import pytest
+
+from django.test import TestCase
+
+from logs import writer
+from logs.models import RequestLog
+
+
+class TestRequestLogWriter(TestCase):
+
+    @pytest.mark.django_db
+    @mock.patch('logs.writer.RequestLogWriter.start')
+    def test_drop_when_queue_is_full(self, mock_start):
+        w = writer.RequestLogWriter(queue_size=2, batch_size=10, flush_interval=1)
+        assert w.push(method='GET', path='/a/', status_code=200) is True
+        assert w.push(method='GET', path='/b/', status_code=200) is True
+        assert w.push(method='GET', path='/c/', status_code=200) is False
+        assert w.stats()['dropped'] == 1
+        assert w.flush() == 2
+        assert RequestLog.objects.count() == 2
+        assert w.stats() == {'queued': 0, 'written': 2, 'dropped': 1, 'failed': 0, }
+
+    @pytest.mark.django_db
+    @mock.patch('logs.writer.RequestLogWriter.start')
+    def test_flush_in_batches(self, mock_start):
+        w = writer.RequestLogWriter(queue_size=100, batch_size=3, flush_interval=1)
+        for i in range(7):
+            w.push(method='GET', path='/%d/' % i, status_code=200)
+        assert w.stop() == 7
+        assert RequestLog.objects.count() == 7
@@ -0,0 +1,54 @@
+import mock
+
+from rate_limit import engine
+
+
+def _limiter(script_results, factor=2):
+    redis_client = mock.MagicMock()
+    script = mock.MagicMock(side_effect=script_results)
+    redis_client.register_script.return_value = script
+    rule = engine.Rule(method='POST', path='/lookup/', limit=2, window=60)
+    limiter = engine.RateLimiter(redis_client=redis_client, rules=[rule, ], pre_filter=engine.LocalPreFilter(factor=factor, max_keys=10))
+    return limiter, rule, script
+
+
+def test_find_rule():
+    limiter, rule, _ = _limiter([])
+    assert limiter.find_rule('POST', '/lookup/') is rule
+    assert limiter.find_rule('POST', '/lookup') is rule
+    assert limiter.find_rule('GET', '/lookup/') is None
+
+
+def test_redis_decides():
+    limiter, rule, script = _limiter([[1, 1], [1, 2], [0, 2], ])
+    assert limiter.hit(rule, 'ip:1.2.3.4', now=100.0) is True
+    assert limiter.hit(rule, 'ip:1.2.3.4', now=101.0) is True
+    assert limiter.hit(rule, 'ip:1.2.3.4', now=102.0) is False
+    assert script.call_count == 3
+    assert script.call_args[1]['keys'] == ['rate_limit:sliding_window:POST:/lookup:ip:1.2.3.4', ]
+
+
+def test_redis_failed():
+    limiter, rule, _ = _limiter(Exception('connection refused'))
+    assert limiter.hit(rule, 'ip:1.2.3.4') is True
+
+
+def test_local_flood_rejected_without_redis():
+    limiter, rule, script = _limiter([[0, 2], ] * 10)
+    for i in range(4):
+        limiter.hit(rule, 'ip:1.2.3.4', now=100.0 + i)
+    assert script.call_count == 4
+    assert limiter.hit(rule, 'ip:1.2.3.4', now=105.0) is False
+    assert script.call_count == 4
+    # the window passed, Redis is asked again
+    limiter.hit(rule, 'ip:1.2.3.4', now=200.0)
+    assert script.call_count == 5
+
+
+def test_unknown_algorithm():
+    try:
+        engine.Rule(method='POST', path='/lookup/', limit=2, window=60, algorithm='fixed_window')
+    except ValueError:
+        pass
+    else:
+        assert False, 'exception was not raised'
@@ -0,0 +1,84 @@
+import mock
+
+from django.test import override_settings
+from django.core.cache.backends.locmem import LocMemCache
+
+from zen import zcache
+from zen import zmaster
+
+
+def _contact_info_response(contact_id, code='1000'):
+    return {'epp': {'response': {
+        'result': {'@code': code, },
+        'resData': {'infData': {'id': contact_id, 'email': 'tester@zenaida.ai', }, },
+    }, }, }
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contact_info_without_scope(mock_contact_info):
+    mock_contact_info.return_value = _contact_info_response('abc123')
+    zcache.contact_info('abc123')
+    zcache.contact_info('abc123')
+    assert mock_contact_info.call_count == 2
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contact_info_scope(mock_contact_info):
+    mock_contact_info.return_value = _contact_info_response('abc123')
+    with zcache.contacts_scope() as cache:
+        assert zcache.contact_info('abc123') == _contact_info_response('abc123')
+        assert zcache.contact_info('ABC123') == _contact_info_response('abc123')
+        with zcache.contacts_scope() as nested_cache:
+            assert nested_cache is cache
+            zcache.contact_info('abc123')
+        assert cache.to_dict()['hits'] == 2
+        assert cache.to_dict()['misses'] == 1
+    assert mock_contact_info.call_count == 1
+    assert zcache.active_contacts_cache() is None
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contact_info_invalidate(mock_contact_info):
+    mock_contact_info.return_value = _contact_info_response('abc123')
+    with zcache.contacts_scope() as cache:
+        zcache.contact_info('abc123')
+        zcache.invalidate_contact('abc123')
+        zcache.contact_info('abc123')
+        assert cache.to_dict()['invalidations'] == 1
+    assert mock_contact_info.call_count == 2
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contact_info_expired(mock_contact_info):
+    mock_contact_info.return_value = _contact_info_response('abc123')
+    with zcache.contacts_scope(ttl=0):
+        zcache.contact_info('abc123')
+        zcache.contact_info('abc123')
+    assert mock_contact_info.call_count == 2
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contact_info_error_not_cached(mock_contact_info):
+    mock_contact_info.return_value = _contact_info_response('abc123', code='2303')
+    with zcache.contacts_scope():
+        zcache.contact_info('abc123', raise_for_result=False)
+        zcache.contact_info('abc123', raise_for_result=False)
+    assert mock_contact_info.call_count == 2
+
+
+@mock.patch('zen.zmaster.domains_check')
+def test_domain_check_cached(mock_domains_check):
+    mock_domains_check.return_value = {'abcd.ai': True, }
+    with override_settings(
+        ZENAIDA_DOMAIN_AVAILABILITY_CACHE_REGISTERED_TTL_SECONDS=60,
+        ZENAIDA_DOMAIN_AVAILABILITY_CACHE_AVAILABLE_TTL_SECONDS=15,
+    ), mock.patch('zen.zcache.django_cache', LocMemCache('test_domain_check_cached', {})):
+        hits_before = zcache.domain_availability_stats()['hits']
+        assert zmaster.domain_check_cached('abcd.ai') == {'abcd.ai': True, }
+        assert zmaster.domain_check_cached('abcd.ai') == {'abcd.ai': True, }
+        assert mock_domains_check.call_count == 1
+        assert zcache.domain_availability_stats()['hits'] == hits_before + 1
+        zcache.invalidate_domain_availability('ABCD.ai')
+        mock_domains_check.return_value = {'abcd.ai': False, }
+        assert zmaster.domain_check_cached('abcd.ai') == {'abcd.ai': False, }
+        assert mock_domains_check.call_count == 2
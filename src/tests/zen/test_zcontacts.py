@@ -48,6 +48,25 @@ def test_registrant_find_by_epp_id():
     assert zcontacts.registrant_find(epp_id='reg1234') == tester_registrant
 
 
+@pytest.mark.django_db
+def test_epp_id_stored_in_lower_case():
+    tester = testsupport.prepare_tester_account(email='my@zenaida.ai')
+    tester_contact = zcontacts.contact_create(
+        epp_id='AbCd1234',
+        owner=tester,
+        person_name='Tester Tester',
+        address_street='TestStreet',
+        address_city='TestCity',
+        address_country='AI',
+        contact_voice='1234567890',
+        contact_email='tester@zenaida.ai',
+    )
+    assert tester_contact.epp_id == 'abcd1234'
+    assert zcontacts.by_epp_id('ABCD1234') == tester_contact
+    assert zcontacts.exists('abcd1234') is True
+    assert zcontacts.registrant_find(epp_id=None) is None
+
+
 class TestClearContactsChange(TestCase):
 
     def test_add3_remove3_no_change(self):
@@ -0,0 +1,146 @@
+import mock
+import pytest
+
+from django.test import override_settings
+
+from zen import zdomains
+from zen import zmaster
+from zen import zrpc
+
+from tests import testsupport
+
+
+def _domain_check_response(*results):
+    return {'epp': {'response': {
+        'result': {'@code': '1000', },
+        'resData': {'chkData': {'cd': [
+            {'name': {'#text': name, '@avail': '0' if exists else '1', }, 'reason': 'Domain exists' if exists else None, }
+            for name, exists in results
+        ], }, },
+    }, }, }
+
+
+@pytest.mark.django_db
+@mock.patch('epp.rpc_client.cmd_domain_info')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+@mock.patch('epp.rpc_client.cmd_domain_check')
+def test_domains_bulk_synchronize(mock_domain_check, mock_domain_synchronize_from_backend, mock_domain_info):
+    testsupport.prepare_tester_domain(domain_name='abc.ai', domain_epp_id='aaa123')
+    testsupport.prepare_tester_domain(domain_name='xyz.ai', domain_epp_id='bbb123')
+    mock_domain_check.return_value = _domain_check_response(('abc.ai', True, ), ('xyz.ai', False, ), )
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    results = zmaster.domains_bulk_synchronize(['abc.ai', 'xyz.ai', ], batch_size=10)
+    assert results == {'abc.ai': ['ok', ], 'xyz.ai': [None, ], }
+    assert mock_domain_check.call_count == 1
+    assert mock_domain_synchronize_from_backend.call_count == 1
+    call_kwargs = mock_domain_synchronize_from_backend.call_args[1]
+    assert call_kwargs['domain_name'] == 'abc.ai'
+    assert call_kwargs['skip_check'] is True
+    assert zdomains.domain_find(domain_name='xyz.ai').status == 'inactive'
+
+
+@pytest.mark.django_db
+@mock.patch('epp.rpc_client.cmd_domain_info')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+@mock.patch('epp.rpc_client.cmd_domain_check')
+def test_domains_bulk_synchronize_batches(mock_domain_check, mock_domain_synchronize_from_backend, mock_domain_info):
+    mock_domain_check.side_effect = [
+        _domain_check_response(('a1.ai', True, ), ('a2.ai', True, ), ),
+        _domain_check_response(('a3.ai', True, ), ),
+    ]
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    results = zmaster.domains_bulk_synchronize(['a1.ai', 'a2.ai', 'a3.ai', 'A1.ai', ], batch_size=2)
+    assert sorted(results.keys()) == ['a1.ai', 'a2.ai', 'a3.ai', ]
+    assert mock_domain_check.call_count == 2
+    assert mock_domain_synchronize_from_backend.call_count == 3
+
+
+def _domain_check_handler(args):
+    return zrpc.FakeGate.make_response(res_data='<chkData>%s</chkData>' % ''.join([
+        '<cd><name avail="%s">%s</name></cd>' % ('1' if name.startswith('free') else '0', name, ) for name in args['domains']
+    ]))
+
+
+def _domain_info_handler(args):
+    return zrpc.FakeGate.make_response(res_data=(
+        '<infData><name>%s</name><registrant>reg1</registrant>'
+        '<contact type="admin">adm1</contact><contact type="tech">%s</contact></infData>'
+    ) % (args['name'], 'tech-' + args['name'], ))
+
+
+def _contact_info_handler(args):
+    return zrpc.FakeGate.make_response(res_data='<infData><id>%s</id></infData>' % args['contact'])
+
+
+@pytest.mark.django_db
+@override_settings(ZENAIDA_BULK_SYNC_PIPELINED=True)
+@mock.patch('epp.rpc_client.cmd_contact_info')
+@mock.patch('epp.rpc_client.cmd_domain_info')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+@mock.patch('epp.rpc_client.cmd_domain_check')
+def test_domains_bulk_synchronize_pipelined(mock_domain_check, mock_domain_synchronize_from_backend, mock_domain_info, mock_contact_info):
+    gate = zrpc.FakeGate(handlers={
+        'domain_check': _domain_check_handler,
+        'domain_info': _domain_info_handler,
+        'contact_info': _contact_info_handler,
+    }, latency=0.1, workers=4)
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    with mock.patch('zen.zrpc.AMQPTransport', return_value=gate):
+        results = zmaster.domains_bulk_synchronize(['a1.ai', 'a2.ai', 'a3.ai', 'free.ai', ], batch_size=1, refresh_contacts=True)
+    assert results == {'a1.ai': ['ok', ], 'a2.ai': ['ok', ], 'a3.ai': ['ok', ], 'free.ai': [None, ], }
+    assert mock_domain_check.call_count == 0
+    assert mock_domain_info.call_count == 0
+    assert mock_contact_info.call_count == 0
+    commands = [r['cmd'] for r in gate.requests]
+    assert commands.count('domain_check') == 4
+    assert commands.count('domain_info') == 3
+    # common contacts are requested only once
+    assert sorted(r['args']['contact'] for r in gate.requests if r['cmd'] == 'contact_info') == [
+        'adm1', 'reg1', 'tech-a1.ai', 'tech-a2.ai', 'tech-a3.ai', ]
+    assert gate.max_active > 1
+    for call in mock_domain_synchronize_from_backend.call_args_list:
+        domain_info = call[1]['domain_info_response']['epp']['response']['resData']['infData']
+        assert domain_info['name'] == call[1]['domain_name']
+
+
+@pytest.mark.django_db
+@mock.patch('epp.rpc_client.cmd_domain_info')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+@mock.patch('epp.rpc_client.cmd_domain_check')
+def test_domains_bulk_synchronize_skip_check(mock_domain_check, mock_domain_synchronize_from_backend, mock_domain_info):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    results = zmaster.domains_bulk_synchronize(['abc.ai', ], skip_check=True)
+    assert results == {'abc.ai': ['ok', ], }
+    assert mock_domain_check.call_count == 0
+
+
+def _domain_info_response(domain_name, registrant, contacts):
+    return {'epp': {'response': {
+        'result': {'@code': '1000', },
+        'resData': {'infData': {
+            'name': domain_name,
+            'registrant': registrant,
+            'contact': [{'@type': role, '#text': contact_id, } for role, contact_id in contacts],
+        }, },
+    }, }, }
+
+
+@pytest.mark.django_db
+@mock.patch('epp.rpc_client.cmd_contact_info')
+@mock.patch('epp.rpc_client.cmd_domain_info')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_bulk_synchronize_info_requested_before_transaction(mock_domain_synchronize_from_backend, mock_domain_info, mock_contact_info):
+    calls = []
+    info_responses = {
+        'a1.ai': _domain_info_response('a1.ai', 'reg1', [('admin', 'adm1', ), ('tech', 'adm1', ), ]),
+        'a2.ai': _domain_info_response('a2.ai', 'reg1', [('admin', 'adm2', ), ]),
+    }
+    mock_domain_info.side_effect = lambda domain, **kw: calls.append(('info', domain, )) or info_responses[domain]
+    mock_contact_info.return_value = {'epp': {'response': {'result': {'@code': '1000', }, }, }, }
+    mock_domain_synchronize_from_backend.side_effect = lambda domain_name, **kw: calls.append(('sync', domain_name, )) or ['ok', ]
+    results = zmaster.domains_bulk_synchronize(['a1.ai', 'a2.ai', ], skip_check=True, refresh_contacts=True, transaction_group_size=2)
+    assert results == {'a1.ai': ['ok', ], 'a2.ai': ['ok', ], }
+    assert calls == [('info', 'a1.ai', ), ('info', 'a2.ai', ), ('sync', 'a1.ai', ), ('sync', 'a2.ai', ), ]
+    for call in mock_domain_synchronize_from_backend.call_args_list:
+        assert call[1]['domain_info_response'] is info_responses[call[1]['domain_name']]
+    assert sorted(c[1]['contact_id'] for c in mock_contact_info.call_args_list) == ['adm1', 'adm2', 'reg1', ]
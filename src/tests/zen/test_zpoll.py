@@ -0,0 +1,102 @@
+import mock
+import threading
+
+from zen import zpoll
+
+
+def _poll_response(res_data=None, msg_text=None):
+    response = {'result': {'@code': '1301'}, 'msgQ': {'@id': '123', }, }
+    if res_data is not None:
+        response['resData'] = res_data
+    if msg_text is not None:
+        response['msgQ']['msg'] = msg_text
+    return {'epp': {'response': response, }, }
+
+
+def test_read_event_domain_renewal():
+    req = _poll_response(res_data={'renData': {'name': 'ABC.ai', 'exDate': '2030-01-01T00:00:00.0Z', }, })
+    assert zpoll.read_event_domain(req) == 'abc.ai'
+
+
+def test_read_event_domain_transfer():
+    req = _poll_response(res_data={'trnData': {'name': 'abc.ai', 'trStatus': 'serverApproved', 'acID': 'a', 'reID': 'b', }, })
+    assert zpoll.read_event_domain(req) == 'abc.ai'
+
+
+def test_read_event_domain_text_message():
+    req = _poll_response(msg_text='Delete Completed: abc.ai')
+    assert zpoll.read_event_domain(req) == 'abc.ai'
+
+
+def test_read_event_domain_unknown():
+    assert zpoll.read_event_domain({}) is None
+    assert zpoll.read_event_domain(_poll_response(res_data={'something': {}, })) is None
+
+
+def test_poll_stats():
+    stats = zpoll.PollStats()
+    stats.message_queued()
+    stats.message_queued()
+    stats.message_finished(True)
+    stats.add_latency('do_domain_renewal', 2.0)
+    stats.add_latency('do_domain_renewal', 4.0)
+    result = stats.to_dict()
+    assert result['received'] == 2
+    assert result['processed'] == 1
+    assert result['queue_depth'] == 1
+    assert result['handlers']['do_domain_renewal'] == {'count': 2, 'avg': 3.0, 'max': 4.0, }
+    assert result['drain_rate'] > 0
+
+
+@mock.patch('zen.zpoll.handle_event')
+def test_events_worker_pool_keeps_order_per_domain(mock_handle_event):
+    handled = []
+    lock = threading.Lock()
+
+    def _handle(req):
+        with lock:
+            handled.append(req['epp']['response']['resData']['renData']['exDate'])
+        return True
+
+    mock_handle_event.side_effect = _handle
+    pool = zpoll.EventsWorkerPool(workers=3, max_inflight=5, stats=zpoll.PollStats())
+    pool.start()
+    for i in range(20):
+        pool.submit(_poll_response(res_data={'renData': {'name': 'abc.ai', 'exDate': i, }, }))
+    pool.stop(wait=True)
+    assert handled == list(range(20))
+    assert pool.stats.to_dict()['processed'] == 20
+    assert pool.stats.to_dict()['queue_depth'] == 0
+
+
+def test_poll_scheduler_backoff():
+    scheduler = zpoll.PollScheduler(min_interval=1, max_interval=10, backoff_factor=2.0, jitter=0.0)
+    assert scheduler.next_delay() == 0.0
+    scheduler.queue_empty()
+    assert scheduler.current_interval == 1.0
+    scheduler.queue_empty()
+    assert scheduler.current_interval == 2.0
+    scheduler.error()
+    assert scheduler.current_interval == 4.0
+    scheduler.queue_empty()
+    scheduler.queue_empty()
+    assert scheduler.current_interval == 10.0
+    assert scheduler.next_delay() == 10.0
+
+
+def test_poll_scheduler_drain():
+    scheduler = zpoll.PollScheduler(min_interval=1, max_interval=10, jitter=0.0)
+    scheduler.queue_empty()
+    scheduler.queue_empty()
+    scheduler.message_received()
+    assert scheduler.current_interval == 0.0
+    assert scheduler.next_delay() == 0.0
+    scheduler.message_received()
+    assert scheduler.to_dict()['messages_per_second'] > 0
+
+
+def test_poll_scheduler_jitter():
+    scheduler = zpoll.PollScheduler(min_interval=10, max_interval=10, jitter=0.1)
+    scheduler.queue_empty()
+    for _ in range(10):
+        assert 9.0 <= scheduler.next_delay() <= 11.0
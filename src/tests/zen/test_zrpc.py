@@ -0,0 +1,98 @@
+import time
+import asyncio
+import pytest
+
+from epp import rpc_error
+
+from zen import zrpc
+
+
+def _domain_info_handler(args):
+    return zrpc.FakeGate.make_response(
+        res_data='<infData><name>%s</name><roid>%s_roid</roid></infData>' % (args['name'], args['name'], ),
+    )
+
+
+def test_read_credentials_plain_text(tmpdir):
+    f = tmpdir.join('creds.txt')
+    f.write('rabbit.host 5673 epp_client epp_password\n')
+    assert zrpc.read_credentials(str(f)) == {
+        'host': 'rabbit.host', 'port': 5673, 'username': 'epp_client', 'password': 'epp_password',
+    }
+    f.write('epp_client epp_password')
+    assert zrpc.read_credentials(str(f))['host'] == 'localhost'
+
+
+def test_read_credentials_json(tmpdir):
+    f = tmpdir.join('creds.json')
+    f.write('{"host": "127.0.0.1", "port": 5672, "username": "epp_client", "password": "epp_password"}')
+    assert zrpc.read_credentials(str(f))['username'] == 'epp_client'
+
+
+def test_pipelined_requests():
+    gate = zrpc.FakeGate(handlers={'domain_info': _domain_info_handler, }, latency=0.2, workers=10)
+    with zrpc.PipelinedClient(transport=gate, max_inflight=10, timeout=5) as client:
+        started = time.time()
+        futures = [client.submit_domain_info('domain%d.ai' % i) for i in range(10)]
+        responses = [f.result(timeout=5) for f in futures]
+        assert time.time() - started < 1.0
+    assert [r['epp']['response']['resData']['infData']['name'] for r in responses] == ['domain%d.ai' % i for i in range(10)]
+    assert gate.max_active > 1
+    assert client.to_dict() == {'sent': 10, 'received': 10, 'failed': 0, 'inflight': 0, }
+
+
+def test_max_inflight():
+    gate = zrpc.FakeGate(handlers={'domain_info': _domain_info_handler, }, latency=0.05, workers=10)
+    with zrpc.PipelinedClient(transport=gate, max_inflight=2, timeout=5) as client:
+        futures = [client.submit_domain_info('domain%d.ai' % i) for i in range(6)]
+        [f.result(timeout=5) for f in futures]
+    assert gate.max_active <= 2
+
+
+def test_error_response():
+    gate = zrpc.FakeGate(handlers={
+        'contact_info': lambda args: zrpc.FakeGate.make_response(code=2303, msg='Object does not exist'),
+        'domain_check': lambda args: '',
+    })
+    with zrpc.PipelinedClient(transport=gate, max_inflight=2, timeout=5) as client:
+        with pytest.raises(rpc_error.EPPObjectNotExist):
+            client.submit_contact_info('abcd1234').result(timeout=5)
+        response = client.submit_contact_info('abcd1234', raise_for_result=False).result(timeout=5)
+        assert response['epp']['response']['result']['@code'] == '2303'
+        with pytest.raises(rpc_error.EPPResponseEmpty):
+            client.submit_domain_check(['abc.ai', ]).result(timeout=5)
+    assert client.to_dict()['failed'] == 2
+
+
+def test_request_timeout():
+    gate = zrpc.FakeGate(handlers={'domain_info': _domain_info_handler, }, latency=0.5)
+    client = zrpc.PipelinedClient(transport=gate, max_inflight=2, timeout=0.1).start()
+    future = client.submit_domain_info('abc.ai')
+    time.sleep(0.2)
+    client._on_tick()
+    with pytest.raises(rpc_error.EPPConnectionFailed):
+        future.result(timeout=1)
+    client.stop()
+    assert client.to_dict()['failed'] == 1
+
+
+def test_asyncio_call():
+    gate = zrpc.FakeGate(handlers={'domain_info': _domain_info_handler, }, latency=0.1)
+
+    async def _run(client):
+        return await asyncio.gather(*[client.call('domain_info', {'name': 'domain%d.ai' % i, }) for i in range(3)])
+
+    with zrpc.PipelinedClient(transport=gate, max_inflight=4, timeout=5) as client:
+        responses = asyncio.run(_run(client))
+    assert len(responses) == 3
+
+
+def test_cancelled_request_releases_slot():
+    gate = zrpc.FakeGate(handlers={'domain_info': _domain_info_handler, }, latency=0.2)
+    with zrpc.PipelinedClient(transport=gate, max_inflight=1, timeout=5) as client:
+        future = client.submit_domain_info('abc.ai')
+        assert future.cancel() is True
+        assert client.inflight.acquire(timeout=2) is True
+        client.inflight.release()
+        response = client.submit_domain_info('xyz.ai').result(timeout=5)
+    assert response['epp']['response']['resData']['infData']['name'] == 'xyz.ai'
@@ -0,0 +1,238 @@
+import time
+import logging
+import threading
+import contextlib
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+
+from epp import rpc_client
+
+logger = logging.getLogger(__name__)
+
+#------------------------------------------------------------------------------
+
+_Scope = threading.local()
+_TotalStats = {'hits': 0, 'misses': 0, 'invalidations': 0, }
+_TotalStatsLock = threading.Lock()
+_AvailabilityStats = {'hits': 0, 'misses': 0, 'invalidations': 0, }
+
+#------------------------------------------------------------------------------
+
+class ContactInfoCache(object):
+    """
+    Keeps in memory contact_info EPP responses keyed by the contact epp_id.
+    Only successful responses are stored and each record expires after `ttl` seconds.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.ZENAIDA_CONTACT_INFO_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, contact_id):
+        record = self.records.get(contact_id)
+        if record is None:
+            return None
+        stored, response = record
+        if time.time() - stored > self.ttl:
+            self.records.pop(contact_id, None)
+            return None
+        return response
+
+    def put(self, contact_id, response):
+        self.records[contact_id] = (time.time(), response, )
+
+    def invalidate(self, contact_id=None):
+        if contact_id is None:
+            self.invalidations += len(self.records)
+            self.records.clear()
+            return
+        if self.records.pop(contact_id, None) is not None:
+            self.invalidations += 1
+
+    def to_dict(self):
+        return {
+            'size': len(self.records),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+#------------------------------------------------------------------------------
+
+def _normalize(contact_id):
+    return str(contact_id).lower()
+
+
+def _count(key):
+    with _TotalStatsLock:
+        _TotalStats[key] += 1
+
+
+def active_contacts_cache():
+    """
+    Returns `ContactInfoCache` object opened with `contacts_scope()` in the current thread, or None.
+    """
+    return getattr(_Scope, 'contacts_cache', None)
+
+
+@contextlib.contextmanager
+def contacts_scope(ttl=None):
+    """
+    Opens a scope where all contact_info EPP responses received via `contact_info()` are re-used.
+    Scope is bound to the current thread, nested scopes are re-using the outer cache.
+    Intended to be used around long running synchronization processes:
+
+        with zcache.contacts_scope():
+            for domain_name in domain_names:
+                zmaster.domain_synchronize_from_backend(domain_name)
+    """
+    current = active_contacts_cache()
+    if current is not None:
+        yield current
+        return
+    cache = ContactInfoCache(ttl=ttl)
+    _Scope.contacts_cache = cache
+    try:
+        yield cache
+    finally:
+        _Scope.contacts_cache = None
+        logger.info('contact info cache scope closed: %r', cache.to_dict())
+
+
+def contact_info(contact_id, request_time_limit=None, raise_for_result=True):
+    """
+    Same as `rpc_client.cmd_contact_info()`, but when `contacts_scope()` is opened in the current thread
+    the response can be taken from the cache instead of sending EPP request to the back-end.
+    """
+    cache = active_contacts_cache()
+    key = _normalize(contact_id)
+    if cache is not None:
+        response = cache.get(key)
+        if response is not None:
+            cache.hits += 1
+            _count('hits')
+            return response
+        cache.misses += 1
+    _count('misses')
+    kwargs = {'contact_id': contact_id, 'raise_for_result': raise_for_result, }
+    if request_time_limit is not None:
+        kwargs['request_time_limit'] = request_time_limit
+    response = rpc_client.cmd_contact_info(**kwargs)
+    remember_contact_info(contact_id, response)
+    return response
+
+
+def cached_contact_info(contact_id):
+    """
+    Returns contact_info response kept in the `contacts_scope()` opened in the current thread, or None.
+    """
+    cache = active_contacts_cache()
+    if cache is None:
+        return None
+    return cache.get(_normalize(contact_id))
+
+
+def remember_contact_info(contact_id, response):
+    """
+    Keeps successful contact_info response in the `contacts_scope()` opened in the current thread,
+    used when the response was received not via `contact_info()`, for example by `zrpc.PipelinedClient`.
+    """
+    cache = active_contacts_cache()
+    if cache is None:
+        return
+    try:
+        code = int(response['epp']['response']['result']['@code'])
+    except (ValueError, KeyError, TypeError, ):
+        code = None
+    if code == 1000:
+        cache.put(_normalize(contact_id), response)
+
+
+def invalidate_contact(contact_id=None):
+    """
+    Must be called after contact was changed on the back-end, for example after `cmd_contact_update()`.
+    If `contact_id` is None all cached contacts are removed.
+    """
+    cache = active_contacts_cache()
+    if cache is None:
+        return
+    _count('invalidations')
+    cache.invalidate(None if contact_id is None else _normalize(contact_id))
+
+
+def contacts_cache_stats():
+    """
+    Returns total number of cache hits and misses in the current process.
+    Every hit is one contact_info EPP request which was not sent to the back-end.
+    """
+    with _TotalStatsLock:
+        return dict(_TotalStats)
+
+#------------------------------------------------------------------------------
+
+def _availability_key(domain_name):
+    return 'zenaida_domain_availability_%s' % str(domain_name).strip().lower()
+
+
+def _count_availability(key):
+    with _TotalStatsLock:
+        _AvailabilityStats[key] += 1
+
+
+def get_domain_availability(domain_name):
+    """
+    Returns recent result of domain check from the cache: True if domain is registered, False if it is available,
+    or None if the domain was not checked recently.
+    Cache is shared between all processes, so many visitors checking same domain name produce only one EPP request.
+    """
+    try:
+        registered = django_cache.get(_availability_key(domain_name))
+    except Exception as exc:
+        logger.warning('domain availability cache is not available: %r', exc)
+        registered = None
+    _count_availability('misses' if registered is None else 'hits')
+    return registered
+
+
+def put_domain_availability(domain_name, registered):
+    """
+    Stores result of domain check. Domain which is available right now can be registered by someone else
+    any moment, so such results are kept for a shorter time.
+    """
+    if registered:
+        ttl = settings.ZENAIDA_DOMAIN_AVAILABILITY_CACHE_REGISTERED_TTL_SECONDS
+    else:
+        ttl = settings.ZENAIDA_DOMAIN_AVAILABILITY_CACHE_AVAILABLE_TTL_SECONDS
+    if not ttl:
+        return
+    try:
+        django_cache.set(_availability_key(domain_name), bool(registered), timeout=ttl)
+    except Exception as exc:
+        logger.warning('domain availability cache is not available: %r', exc)
+
+
+def invalidate_domain_availability(domain_name):
+    """
+    Must be called when domain was created, transferred, deleted or restored on the back-end.
+    """
+    try:
+        django_cache.delete(_availability_key(domain_name))
+    except Exception as exc:
+        logger.warning('domain availability cache is not available: %r', exc)
+    _count_availability('invalidations')
+
+
+def domain_availability_stats():
+    """
+    Returns number of cache hits, misses and invalidations in the current process.
+    Every hit is one domain_check EPP request which was not sent to the back-end.
+    """
+    with _TotalStatsLock:
+        result = dict(_AvailabilityStats)
+    total = result['hits'] + result['misses']
+    result['hit_rate'] = (result['hits'] / float(total)) if total else 0.0
+    return result
@@ -22,7 +22,7 @@ def by_epp_id(epp_id):
     """
     if not epp_id:
         return None
-    return Contact.contacts.filter(epp_id__iexact=epp_id.lower()).first()
+    return Contact.contacts.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
 
 
 def exists(epp_id):
@@ -31,7 +31,7 @@ def exists(epp_id):
     """
     if not epp_id:
         return False
-    return bool(Contact.contacts.filter(epp_id__iexact=epp_id.lower()).first())
+    return bool(Contact.contacts.filter(epp_id=strng.normalize_epp_id(epp_id)).first())
 
 
 def list_contacts(owner):
@@ -48,7 +48,7 @@ def verify(epp_id, email=None, owner=None):
     if not exists(epp_id):
         logger.warn('contact with epp ID %r is not found in local DB', epp_id)
         return False
-    cont = Contact.contacts.get(epp_id=epp_id)
+    cont = Contact.contacts.get(epp_id=strng.normalize_epp_id(epp_id))
     if email and cont.owner.email.lower() != email.lower():
         logger.warn('known contact email %r is not matching with %r', cont.owner.email, email)
         return False
@@ -65,7 +65,7 @@ def verify_registrant(epp_id, email=None, owner=None):
     if not registrant_exists(epp_id):
         logger.warn('registrant with epp ID %r is not found in local DB', epp_id)
         return False
-    reg = Registrant.registrants.get(epp_id=epp_id)
+    reg = Registrant.registrants.get(epp_id=strng.normalize_epp_id(epp_id))
     if email and reg.owner.email.lower() != email.lower():
         logger.warn('known registrant email %r is not matching with %r', reg.owner.email, email)
         return False
@@ -126,7 +126,7 @@ def contact_create(epp_id, owner, contact_info_response=None, raise_owner_exist=
     Creates new contact for given owner, but only if Contact with same epp_id not exist yet.
     """
     if epp_id:
-        existing_contact = Contact.contacts.filter(epp_id__iexact=epp_id.lower()).first()
+        existing_contact = Contact.contacts.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
         if existing_contact:
             logger.debug('contact with epp_id=%s already exist, owner is %r', epp_id, existing_contact.owner)
             if existing_contact.owner.pk != owner.pk:
@@ -186,7 +186,7 @@ def contact_update(epp_id, **kwargs):
     """
     if not epp_id:
         raise Exception('EPP ID of the contact is empty')
-    existing_contact = Contact.contacts.filter(epp_id__iexact=epp_id.lower()).first()
+    existing_contact = Contact.contacts.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
     if not existing_contact:
         raise Exception('Contact not found')
     updated = Contact.contacts.filter(pk=existing_contact.pk).update(**kwargs)
@@ -200,7 +200,7 @@ def contact_refresh(epp_id, contact_info_response):
     """
     if not epp_id:
         raise Exception('EPP ID of the contact is empty')
-    existing_contact = Contact.contacts.filter(epp_id__iexact=epp_id.lower()).first()
+    existing_contact = Contact.contacts.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
     if not existing_contact:
         raise Exception('Contact not found')
     d = contact_info_response['epp']['response']['resData']['infData']
@@ -429,7 +429,7 @@ def registrant_delete(epp_id):
     """
     if not epp_id:
         raise Exception('EPP ID of the contact was empty')
-    Registrant.registrants.filter(epp_id__iexact=epp_id.lower()).delete()
+    Registrant.registrants.filter(epp_id=strng.normalize_epp_id(epp_id)).delete()
     logger.info('registrant with epp_id=%r deleted', epp_id)
     return True
 
@@ -440,7 +440,9 @@ def registrant_find(epp_id=None, contact_email=None):
     """
     if contact_email is not None:
         return Registrant.registrants.filter(contact_email=contact_email).first()
-    return Registrant.registrants.filter(epp_id__iexact=epp_id.lower()).first()
+    if not epp_id:
+        return None
+    return Registrant.registrants.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
 
 
 def registrant_exists(epp_id):
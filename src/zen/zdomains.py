@@ -13,6 +13,8 @@ from django.core import exceptions
 
 from back.models.registrar import Registrar
 
+from lib import strng
+
 from zen import zzones
 from zen import zusers
 
@@ -100,7 +102,7 @@ def is_exist(domain_name='', epp_id=None):
     """
     from back.models.domain import Domain
     if epp_id:
-        return bool(Domain.domains.filter(epp_id__iexact=epp_id.lower()).first())
+        return bool(Domain.domains.filter(epp_id=strng.normalize_epp_id(epp_id)).first())
     return bool(Domain.domains.filter(name=domain_name).first())
 
 
@@ -131,7 +133,7 @@ def domain_find(domain_name='', epp_id=None, domain_id=None):
     if domain_id:
         return Domain.domains.filter(id=domain_id).first()
     if epp_id:
-        return Domain.domains.filter(epp_id__iexact=epp_id.lower()).first()
+        return Domain.domains.filter(epp_id=strng.normalize_epp_id(epp_id)).first()
     return Domain.domains.filter(name=domain_name.strip().lower()).first()
 
 
@@ -555,7 +557,7 @@ def compare_contacts(domain_object, domain_info_response, target_contacts=None):
         current_registrant = domain_info_response['epp']['response']['resData']['infData']['registrant']
     except:
         pass
-    if domain_object.registrant and current_registrant and current_registrant != domain_object.registrant.epp_id:
+    if domain_object.registrant and current_registrant and strng.normalize_epp_id(current_registrant) != domain_object.registrant.epp_id:
         change_registrant = domain_object.registrant.epp_id
     logger.info('for %r found such changes: add_contacts=%r remove_contacts=%r change_registrant=%r',
                  domain_object.name, add_contacts, remove_contacts, change_registrant)
@@ -667,7 +669,7 @@ def domain_update_statuses(domain_object, domain_info_response, save=True):
     if extensions_modified:
         domain_object.extension_info = new_domain_extensions
         updated = True
-    if epp_id and domain_object.epp_id != epp_id:
+    if epp_id and domain_object.epp_id != strng.normalize_epp_id(epp_id):
         domain_object.epp_id = epp_id
         updated = True
     if 'ok' in new_domain_statuses:
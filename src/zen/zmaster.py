@@ -1,9 +1,11 @@
 import logging
 import datetime
 
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 
+from automats import automat
 from automats import contact_synchronizer
 from automats import domains_checker
 from automats import domain_synchronizer
@@ -16,9 +18,30 @@ from epp import rpc_client
 
 from zen import zerrors
 from zen import zdomains
+from zen import zcache
+from zen import zrpc
 
 logger = logging.getLogger(__name__)
 
+#------------------------------------------------------------------------------
+
+_DomainsCheckersPool = automat.AutomatPool(domains_checker.DomainsChecker, size=settings.ZENAIDA_AUTOMATS_POOL_SIZE)
+_DomainSynchronizersPool = automat.AutomatPool(domain_synchronizer.DomainSynchronizer, size=settings.ZENAIDA_AUTOMATS_POOL_SIZE)
+_DomainRefreshersPool = automat.AutomatPool(domain_refresher.DomainRefresher, size=settings.ZENAIDA_AUTOMATS_POOL_SIZE)
+
+#------------------------------------------------------------------------------
+
+def automats_pools_stats():
+    """
+    Returns info about re-used state machines and total number of state machines existing in memory.
+    """
+    return {
+        'live': automat.live_count(),
+        'domains_checker': _DomainsCheckersPool.to_dict(),
+        'domain_synchronizer': _DomainSynchronizersPool.to_dict(),
+        'domain_refresher': _DomainRefreshersPool.to_dict(),
+    }
+
 
 def contact_create_update(contact_object, raise_errors=False, log_events=True, log_transitions=True):
     """
@@ -53,7 +76,7 @@ def domains_check(domain_names, verify_registrant=False, raise_errors=False, log
     and compare with current registrant information stored in DB for every domain : epp_id must be in sync.
     Returns None if error happened, or raise Exception if `raise_errors` is True.
     """
-    dc = domains_checker.DomainsChecker(
+    dc = _DomainsCheckersPool.acquire(
         skip_check=False,
         skip_info=(not verify_registrant),
         verify_registrant=verify_registrant,
@@ -64,6 +87,7 @@ def domains_check(domain_names, verify_registrant=False, raise_errors=False, log
     )
     dc.event('run', domain_names)
     outputs = list(dc.outputs)
+    _DomainsCheckersPool.release(dc)
     del dc
     logger.info('domains_checker(%r) finished with %d outputs', domain_names, len(outputs))
 
@@ -78,31 +102,303 @@ def domains_check(domain_names, verify_registrant=False, raise_errors=False, log
     return outputs[-1]
 
 
+def domain_check_cached(domain_name, log_events=True, log_transitions=True):
+    """
+    Same as `domains_check(domain_names=[domain_name, ])`, but recent results are taken from the cache.
+    Used in domain lookup and domain create pages, where same domain names are checked by many visitors.
+    """
+    registered = zcache.get_domain_availability(domain_name)
+    if registered is not None:
+        return {domain_name: registered, }
+    check_result = domains_check(domain_names=[domain_name, ], log_events=log_events, log_transitions=log_transitions)
+    if isinstance(check_result, dict) and check_result.get(domain_name) in (True, False, ):
+        zcache.put_domain_availability(domain_name, check_result[domain_name])
+    return check_result
+
+
 def domains_quick_sync(domain_objects_list, hours_passed=12, request_time_limit=5, raise_errors=False, log_events=True, log_transitions=True):
     """
     Run domain_info EPP command for each domain object from the list to verify and update actual status from the back-end.
     """
+    domain_names = []
     for domain_object in domain_objects_list:
         sync_hours_ago = None
         if domain_object.latest_sync_date:
             sync_hours_ago = (timezone.now() - domain_object.latest_sync_date).total_seconds() / (60 * 60)
         if sync_hours_ago is None or sync_hours_ago > hours_passed:
             logger.info('starting domain sync for %r, latest sync was %r hours ago', domain_object, sync_hours_ago)
-            domain_synchronize_from_backend(
-                domain_name=domain_object.name,
-                skip_check=True,
-                refresh_contacts=False,
-                rewrite_contacts=None,
-                change_owner_allowed=False,
-                create_new_owner_allowed=False,
-                expected_owner=None,
-                soft_delete=True,
-                domain_transferred_away=False,
+            domain_names.append(domain_object.name)
+    if not domain_names:
+        return {}
+    return domains_bulk_synchronize(
+        domain_names=domain_names,
+        skip_check=True,
+        refresh_contacts=False,
+        rewrite_contacts=None,
+        change_owner_allowed=False,
+        create_new_owner_allowed=False,
+        soft_delete=True,
+        domain_transferred_away=False,
+        request_time_limit=request_time_limit,
+        raise_errors=raise_errors,
+        log_events=log_events,
+        log_transitions=log_transitions,
+    )
+
+
+def domains_bulk_synchronize(domain_names,
+                             skip_check=False,
+                             refresh_contacts=False,
+                             rewrite_contacts=None,
+                             change_owner_allowed=False,
+                             create_new_owner_allowed=False,
+                             soft_delete=True,
+                             domain_transferred_away=False,
+                             request_time_limit=0,
+                             batch_size=None,
+                             transaction_group_size=None,
+                             raise_errors=False, log_events=True, log_transitions=True):
+    """
+    Synchronize many domains from back-end at once, works similar to `domain_synchronize_from_backend()`.
+    Domain names are checked on back-end in batches: only one domain_check EPP command is sent for
+    every `batch_size` domains. Domains which are not exist on back-end anymore are removed from local DB right away.
+    For existing domains `DomainRefresher` is started with `skip_check=True` inside of `zcache.contacts_scope()`,
+    so contacts common for multiple domains are only requested once.
+    DB changes are applied in grouped transactions of `transaction_group_size` domains,
+    each domain is processed inside its own savepoint to not affect other domains in case of failure.
+    Domain info (and contacts info if `refresh_contacts=True`) for the whole group is requested from back-end
+    before the transaction is opened, so DB locks are not held while waiting for EPP responses.
+    When `ZENAIDA_BULK_SYNC_PIPELINED` is enabled all those EPP requests are sent via `zrpc.PipelinedClient`.
+    Returns dictionary with list of outputs for every domain name.
+    """
+    batch_size = batch_size or settings.ZENAIDA_EPP_DOMAIN_CHECK_BATCH_SIZE
+    transaction_group_size = transaction_group_size or settings.ZENAIDA_BULK_SYNC_TRANSACTION_GROUP_SIZE
+    domain_names = list(dict.fromkeys([d.lower() for d in domain_names]))
+    results = {}
+    existing_domain_names = []
+    client = None
+    if settings.ZENAIDA_BULK_SYNC_PIPELINED and len(domain_names) > 1:
+        # one pipelined client is used for all EPP requests sent before DB transactions are opened
+        client = zrpc.PipelinedClient().start()
+    try:
+        if skip_check:
+            existing_domain_names = list(domain_names)
+        else:
+            batches = [domain_names[i:i + batch_size] for i in range(0, len(domain_names), batch_size)]
+            pipelined_results = None
+            if client is not None and len(batches) > 1:
+                pipelined_results = _domains_check_pipelined(batches, client=client)
+            for batch in batches:
+                check_results = pipelined_results if pipelined_results is not None else _domains_check_batch(batch)
+                with transaction.atomic():
+                    for domain_name in batch:
+                        check_result = check_results.get(domain_name)
+                        if check_result is True:
+                            existing_domain_names.append(domain_name)
+                        elif check_result is False:
+                            logger.info('domain %r not exist on back-end', domain_name)
+                            if soft_delete:
+                                zdomains.domain_unregister(domain_name=domain_name)
+                            else:
+                                zdomains.domain_delete(domain_name=domain_name)
+                            results[domain_name] = [None, ]
+                        else:
+                            results[domain_name] = [check_result or rpc_error.EPPResponseEmpty(), ]
+        with zcache.contacts_scope() as contacts_cache:
+            for i in range(0, len(existing_domain_names), transaction_group_size):
+                group = existing_domain_names[i:i + transaction_group_size]
+                if client is not None:
+                    domains_info = _domains_info_pipelined(group, refresh_contacts=refresh_contacts, client=client)
+                else:
+                    domains_info = _domains_info_batch(group, refresh_contacts=refresh_contacts, request_time_limit=request_time_limit)
+                with transaction.atomic():
+                    for domain_name in group:
+                        try:
+                            with transaction.atomic():
+                                results[domain_name] = domain_synchronize_from_backend(
+                                    domain_name=domain_name,
+                                    skip_check=True,
+                                    refresh_contacts=refresh_contacts,
+                                    rewrite_contacts=rewrite_contacts,
+                                    change_owner_allowed=change_owner_allowed,
+                                    create_new_owner_allowed=create_new_owner_allowed,
+                                    soft_delete=soft_delete,
+                                    domain_transferred_away=domain_transferred_away,
+                                    request_time_limit=request_time_limit,
+                                    domain_info_response=domains_info.get(domain_name),
+                                    raise_errors=raise_errors,
+                                    log_events=log_events,
+                                    log_transitions=log_transitions,
+                                )
+                        except Exception as exc:
+                            if raise_errors:
+                                raise
+                            logger.exception('domain %r synchronize failed: %r' % (domain_name, exc, ))
+                            results[domain_name] = [exc, ]
+        logger.info('domains_bulk_synchronize() finished for %d domains, %d existing, contacts cache: %r',
+                    len(domain_names), len(existing_domain_names), contacts_cache.to_dict())
+    finally:
+        if client is not None:
+            client.stop()
+    return results
+
+
+def _domains_info_batch(domain_names, refresh_contacts=False, request_time_limit=0):
+    """
+    Requests domain info from back-end for every domain name and returns dictionary with received responses.
+    When `refresh_contacts=True` contacts of every domain are also requested via `zcache.contact_info()`,
+    so responses are kept in the `zcache.contacts_scope()` opened by the caller.
+    Domains with failed or unexpected responses are not included, `DomainRefresher` will request them again.
+    """
+    results = {}
+    for domain_name in domain_names:
+        try:
+            response = rpc_client.cmd_domain_info(
+                domain=domain_name,
                 request_time_limit=request_time_limit,
-                raise_errors=raise_errors,
-                log_events=log_events,
-                log_transitions=log_transitions,
+                raise_for_result=False,
             )
+        except rpc_error.EPPError as exc:
+            response = exc
+        response, contact_ids = _read_domain_info_response(domain_name, response)
+        if response is None:
+            continue
+        results[domain_name] = response
+        if not refresh_contacts:
+            continue
+        for contact_id in contact_ids:
+            try:
+                zcache.contact_info(contact_id, request_time_limit=request_time_limit, raise_for_result=False)
+            except rpc_error.EPPError as exc:
+                logger.warning('contact info request failed for %r: %r', contact_id, exc)
+    return results
+
+
+def _domains_info_pipelined(domain_names, refresh_contacts=False, client=None):
+    """
+    Same as `_domains_info_batch()`, but domain_info EPP commands for all domains and then contact_info
+    EPP commands for all not yet known contacts are sent at once via `zrpc.PipelinedClient`.
+    """
+    results = {}
+    contact_ids = []
+    own_client = client is None
+    if own_client:
+        client = zrpc.PipelinedClient().start()
+    try:
+        futures = [(domain_name, client.submit_domain_info(domain_name, raise_for_result=False), ) for domain_name in domain_names]
+        for domain_name, future in futures:
+            try:
+                response = future.result()
+            except rpc_error.EPPError as exc:
+                response = exc
+            response, domain_contact_ids = _read_domain_info_response(domain_name, response)
+            if response is None:
+                continue
+            results[domain_name] = response
+            contact_ids.extend(domain_contact_ids)
+        if refresh_contacts:
+            contact_ids = [c for c in dict.fromkeys(contact_ids) if zcache.cached_contact_info(c) is None]
+            futures = [(contact_id, client.submit_contact_info(contact_id, raise_for_result=False), ) for contact_id in contact_ids]
+            for contact_id, future in futures:
+                try:
+                    zcache.remember_contact_info(contact_id, future.result())
+                except rpc_error.EPPError as exc:
+                    logger.warning('contact info request failed for %r: %r', contact_id, exc)
+    finally:
+        if own_client:
+            client.stop()
+    return results
+
+
+def _read_domain_info_response(domain_name, response):
+    """
+    Returns tuple `(response, contact_ids)`, response is None if domain info was not received.
+    """
+    if isinstance(response, rpc_error.EPPError):
+        logger.warning('domain info request failed for %r: %r', domain_name, response)
+        return None, []
+    try:
+        if int(response['epp']['response']['result']['@code']) != 1000:
+            return None, []
+        info = response['epp']['response']['resData']['infData']
+    except (ValueError, KeyError, TypeError, ) as exc:
+        logger.warning('unexpected domain info response for %r: %r', domain_name, exc)
+        return None, []
+    contacts = info.get('contact') or []
+    if not isinstance(contacts, list):
+        contacts = [contacts, ]
+    contact_ids = [c['#text'] for c in contacts if isinstance(c, dict) and c.get('#text')]
+    if info.get('registrant'):
+        contact_ids.append(info['registrant'])
+    return response, contact_ids
+
+
+def _domains_check_batch(domain_names):
+    """
+    Sends single domain_check EPP command for a batch of domains.
+    Returns dictionary with True value for existing domains, False for not existing domains
+    and an exception object if domain status was not identified.
+    """
+    try:
+        response = rpc_client.cmd_domain_check(
+            domains=domain_names,
+            raise_for_result=False,
+        )
+    except rpc_error.EPPError as exc:
+        response = exc
+    return _read_domains_check_response(domain_names, response)
+
+
+def _domains_check_pipelined(batches, client=None):
+    """
+    Same as `_domains_check_batch()`, but domain_check EPP commands for all batches are sent at once
+    via `zrpc.PipelinedClient`, so latency of the back-end is not multiplied by number of batches.
+    Returns dictionary with results for all domain names.
+    """
+    results = {}
+    own_client = client is None
+    if own_client:
+        client = zrpc.PipelinedClient().start()
+    try:
+        futures = [(batch, client.submit_domain_check(batch, raise_for_result=False), ) for batch in batches]
+        for batch, future in futures:
+            try:
+                response = future.result()
+            except rpc_error.EPPError as exc:
+                response = exc
+            results.update(_read_domains_check_response(batch, response))
+    finally:
+        if own_client:
+            client.stop()
+    return results
+
+
+def _read_domains_check_response(domain_names, response):
+    if isinstance(response, rpc_error.EPPError):
+        logger.error('domain_check failed for %d domains: %r', len(domain_names), response)
+        return {domain_name: response for domain_name in domain_names}
+    try:
+        code = int(response['epp']['response']['result']['@code'])
+    except (ValueError, KeyError, TypeError, ) as exc:
+        logger.error('unexpected domain_check response for %d domains: %r', len(domain_names), exc)
+        return {domain_name: rpc_error.EPPBadResponse('response field not recognized') for domain_name in domain_names}
+    if code != 1000:
+        exc = rpc_error.exception_from_response(response=response)
+        return {domain_name: exc for domain_name in domain_names}
+    try:
+        cd_list = response['epp']['response']['resData']['chkData']['cd']
+    except (KeyError, TypeError, ):
+        cd_list = []
+    if not isinstance(cd_list, list):
+        cd_list = [cd_list, ]
+    results = {}
+    for cd in cd_list:
+        name = (cd.get('name', {}).get('#text') or '').lower()
+        if not name:
+            logger.error('unexpected EPP response, unknown domain name: %s', response)
+            continue
+        results[name] = cd.get('name', {}).get('@avail') == '0'
+    return results
 
 
 def domain_check_create_update_renew(domain_object, sync_contacts=True, sync_nameservers=True, renew_years=None,
@@ -114,7 +410,7 @@ def domain_check_create_update_renew(domain_object, sync_contacts=True, sync_nam
     If `renew_years` is positive integer it will also renew domain for that amount of years.
     If `renew_years=-1` it will use `domain_object.expiry_date` to decide how many days more needs to be added. 
     """
-    ds = domain_synchronizer.DomainSynchronizer(
+    ds = _DomainSynchronizersPool.acquire(
         log_events=log_events,
         log_transitions=log_transitions,
         raise_errors=raise_errors,
@@ -128,6 +424,7 @@ def domain_check_create_update_renew(domain_object, sync_contacts=True, sync_nam
         save_to_db=save_to_db,
     )
     outputs = list(ds.outputs)
+    _DomainSynchronizersPool.release(ds)
     del ds
     logger.info('domain_synchronizer(%r) finished with %d outputs', domain_object.name, len(outputs))
 
@@ -157,6 +454,7 @@ def domain_synchronize_from_backend(domain_name,
                                     soft_delete=True,
                                     domain_transferred_away=False,
                                     request_time_limit=0,
+                                    domain_info_response=None,
                                     raise_errors=False, log_events=True, log_transitions=True):
     """
     Requests domain info from back-end and take required actions to update local DB
@@ -171,8 +469,9 @@ def domain_synchronize_from_backend(domain_name,
     it will take `rewrite_contacts` value from there - to be able to complete the transfer and assign domain
     to another registrant on the back-end.
     if `refresh_contacts=True` Zenaida will read contacts from back-end and update local DB
+    Already received domain info can be passed via `domain_info_response` to not request it from back-end again.
     """
-    dr = domain_refresher.DomainRefresher(
+    dr = _DomainRefreshersPool.acquire(
         log_events=log_events,
         log_transitions=log_transitions,
         raise_errors=raise_errors,
@@ -190,11 +489,13 @@ def domain_synchronize_from_backend(domain_name,
             soft_delete=soft_delete,
             domain_transferred_away=domain_transferred_away,
             request_time_limit=request_time_limit,
+            domain_info_response=domain_info_response,
         )
         outputs = list(dr.outputs)
     except rpc_error.EPPError as exc:
         dr.destroy()
         outputs = [exc, ]
+    _DomainRefreshersPool.release(dr)
     del dr
     logger.info('domain_refresher(%r) finished with %d outputs', domain_name, len(outputs))
     return outputs or []
@@ -339,7 +640,7 @@ def domain_read_info(domain, auth_info=None, raise_errors=False, log_events=True
     """
     Request from back-end and returns actual info about the domain.
     """
-    dc = domains_checker.DomainsChecker(
+    dc = _DomainsCheckersPool.acquire(
         skip_check=True,
         skip_info=False,
         verify_registrant=False,
@@ -350,6 +651,7 @@ def domain_read_info(domain, auth_info=None, raise_errors=False, log_events=True
     )
     dc.event('run', [domain, ], auth_info=auth_info, )
     outputs = list(dc.outputs)
+    _DomainsCheckersPool.release(dc)
     del dc
     logger.info('domains_checker(%r) finished with %d outputs', domain, len(outputs))
 
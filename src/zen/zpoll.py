@@ -3,10 +3,16 @@
 import logging
 import json
 import time
+import queue
+import random
 import datetime
+import functools
+import threading
+import collections
 
 from lib import xml2json
 
+from django import db
 from django.utils import timezone
 from django.conf import settings
 
@@ -17,6 +23,7 @@ from epp import rpc_error
 
 from zen import zmaster
 from zen import zdomains
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -24,11 +31,116 @@ logger = logging.getLogger(__name__)
 
 #------------------------------------------------------------------------------
 
+_PollStats = None
+
+#------------------------------------------------------------------------------
+
 class XML2JsonOptions(object):
     pretty = True
 
 #------------------------------------------------------------------------------
 
+class PollStats(object):
+    """
+    Keeps counters about processed EPP poll messages: queue depth, latency of every handler and the drain rate.
+    Same object is shared between all worker threads, so all updates are protected with a lock.
+    """
+
+    def __init__(self, drain_window_seconds=60):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.drain_window_seconds = drain_window_seconds
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+        self.queue_depth = 0
+        self.handlers = {}
+        self.finished_moments = collections.deque()
+
+    def message_queued(self):
+        with self.lock:
+            self.received += 1
+            self.queue_depth += 1
+
+    def message_finished(self, result):
+        moment_now = time.time()
+        with self.lock:
+            self.queue_depth -= 1
+            if result:
+                self.processed += 1
+            else:
+                self.failed += 1
+            self.finished_moments.append(moment_now)
+            self._cleanup(moment_now)
+
+    def add_latency(self, handler_name, duration):
+        with self.lock:
+            if handler_name not in self.handlers:
+                self.handlers[handler_name] = {'count': 0, 'total': 0.0, 'max': 0.0, }
+            h = self.handlers[handler_name]
+            h['count'] += 1
+            h['total'] += duration
+            h['max'] = max(h['max'], duration)
+
+    def drain_rate(self):
+        """
+        Returns number of messages per second processed during the latest `drain_window_seconds`.
+        """
+        moment_now = time.time()
+        with self.lock:
+            self._cleanup(moment_now)
+            window = min(self.drain_window_seconds, max(moment_now - self.started, 1.0))
+            return len(self.finished_moments) / window
+
+    def to_dict(self):
+        drain_rate = self.drain_rate()
+        with self.lock:
+            return {
+                'received': self.received,
+                'processed': self.processed,
+                'failed': self.failed,
+                'queue_depth': self.queue_depth,
+                'drain_rate': drain_rate,
+                'handlers': {
+                    name: {
+                        'count': h['count'],
+                        'avg': (h['total'] / h['count']) if h['count'] else 0.0,
+                        'max': h['max'],
+                    } for name, h in self.handlers.items()
+                },
+            }
+
+    def _cleanup(self, moment_now):
+        while self.finished_moments and self.finished_moments[0] < moment_now - self.drain_window_seconds:
+            self.finished_moments.popleft()
+
+
+def poll_stats():
+    """
+    Returns global `PollStats` object, creates a new one at first call.
+    """
+    global _PollStats
+    if _PollStats is None:
+        _PollStats = PollStats()
+    return _PollStats
+
+
+def measured(handler):
+    """
+    Decorator to track how much time was spent by the given handler of the poll message.
+    """
+    @functools.wraps(handler)
+    def _wrapper(*args, **kwargs):
+        started = time.time()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            poll_stats().add_latency(handler.__name__, time.time() - started)
+    return _wrapper
+
+#------------------------------------------------------------------------------
+
+@measured
 def do_domain_transfer_in(domain):
     logger.info('domain %s transferred to Zenaida', domain)
     try:
@@ -56,6 +168,7 @@ def do_domain_transfer_in(domain):
     return True
 
 
+@measured
 def do_domain_transfer_away(domain, from_client=None, to_client=None, notify=False):
     logger.info('domain %s transferred away', domain)
     try:
@@ -73,6 +186,7 @@ def do_domain_transfer_away(domain, from_client=None, to_client=None, notify=Fal
     return True
 
 
+@measured
 def do_domain_deleted(domain, soft_delete=True, notify=False):
     logger.info('domain %s deleted', domain)
     try:
@@ -89,6 +203,7 @@ def do_domain_deleted(domain, soft_delete=True, notify=False):
     return True
 
 
+@measured
 def do_domain_status_changed(domain, notify=False):
     logger.info('domain %s status changed', domain)
     try:
@@ -104,6 +219,7 @@ def do_domain_status_changed(domain, notify=False):
     return True
 
 
+@measured
 def do_domain_restored(domain, notify=False):
     logger.info('domain %s was restored', domain)
     try:
@@ -121,6 +237,7 @@ def do_domain_restored(domain, notify=False):
     return True
 
 
+@measured
 def do_domain_renewal(domain, ex_date=None, notify=False):
     logger.info('domain %s renewal', domain)
     site_name = settings.SITE_BASE_URL.replace("https://","")
@@ -201,6 +318,7 @@ def do_domain_renewal(domain, ex_date=None, notify=False):
     return True
 
 
+@measured
 def do_domain_expiry_date_updated(domain):
     logger.info('domain %s expiry date updated', domain)
     try:
@@ -216,6 +334,7 @@ def do_domain_expiry_date_updated(domain):
     return True
 
 
+@measured
 def do_domain_create_date_updated(domain):
     logger.info('domain %s create date updated', domain)
     try:
@@ -231,6 +350,7 @@ def do_domain_create_date_updated(domain):
     return True
 
 
+@measured
 def do_domain_nameservers_changed(domain):
     logger.info('domain %s nameservers changed', domain)
     try:
@@ -246,6 +366,7 @@ def do_domain_nameservers_changed(domain):
     return True
 
 
+@measured
 def do_domain_contacts_changed(domain):
     logger.info('domain %s contacts changed', domain)
     # step 1: read info from back-end and make changes in local DB
@@ -288,6 +409,7 @@ def do_domain_contacts_changed(domain):
     return True
 
 
+@measured
 def do_domain_change_unknown(domain):
     logger.info('domain %s change is unknown, doing hard-synchronize', domain)
     try:
@@ -500,6 +622,11 @@ def handle_event(req):
         logger.exception('can not read poll_req response: %s' % req)
         return False
 
+    event_domain_name = read_event_domain(req)
+    if event_domain_name:
+        # domain was changed on the back-end, previous results of domain check are not valid anymore
+        zcache.invalidate_domain_availability(event_domain_name)
+
     try:
         if 'resData' in resp:
             return on_queue_response(resp['resData'])
@@ -518,26 +645,216 @@ def handle_event(req):
 
 #------------------------------------------------------------------------------
 
-def main():
-    logger.info('polling loop started at %r', time.asctime())
-    while True:
-        result = False
+def read_event_domain(req):
+    """
+    Extracts domain name from the poll_req response without processing the message.
+    That is used as a key to make sure all events related to the same domain are handled in order.
+    Returns None if domain name was not recognized.
+    """
+    try:
+        resp = req['epp']['response']
+    except:
+        return None
+    try:
+        if 'resData' in resp:
+            for data_key in ('trnData', 'renData', ):
+                if data_key in resp['resData']:
+                    return str(resp['resData'][data_key]['name']).lower()
+            return None
+        if 'msgQ' in resp:
+            msg_element = resp['msgQ']['msg']
+            msg_text = msg_element.get('#text') if isinstance(msg_element, dict) else str(msg_element)
+            if not msg_text:
+                return None
+            for prefix in ('delete requested: ', 'restore requested: ', 'restore completed: ', 'delete completed: ', 'pending delete: ', ):
+                if msg_text.lower().count(prefix):
+                    return msg_text.lower().replace(prefix, '')
+            json_input = json.loads(xml2json.xml2json(msg_text, XML2JsonOptions(), strip_ns=1, strip=1))
+            if 'offlineUpdate' in json_input:
+                return str(json_input['offlineUpdate']['domain']['name']).lower()
+    except:
+        return None
+    return None
+
+
+class EventsWorkerPool(object):
+    """
+    Bounded pool of worker threads processing EPP poll messages in parallel.
+    Every worker have its own queue and messages are distributed between workers by the domain name,
+    so events related to the same domain are always handled by the same worker in the same order they were received.
+    When `max_inflight` messages are already queued or in progress `submit()` will block,
+    so the polling loop stops reading new messages from the back-end.
+    """
+
+    def __init__(self, workers=4, max_inflight=None, stats=None):
+        self.workers = max(1, int(workers))
+        self.max_inflight = max(self.workers, int(max_inflight or self.workers * 4))
+        self.stats = stats or poll_stats()
+        self.inflight = threading.BoundedSemaphore(self.max_inflight)
+        self.queues = [queue.Queue() for _ in range(self.workers)]
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, args=(self.queues[i], ), name='zpoll_worker_%d' % i, daemon=True)
+            t.start()
+            self.threads.append(t)
+        logger.info('started %d poll workers with max_inflight=%d', self.workers, self.max_inflight)
+
+    def stop(self, wait=True):
+        for q in self.queues:
+            q.put(None)
+        if wait:
+            for t in self.threads:
+                t.join()
+        self.threads = []
+        logger.info('poll workers stopped')
+
+    def submit(self, req, key=None):
+        """
+        Put the message into one of the worker queues, blocks while `max_inflight` limit is reached.
+        """
+        self.inflight.acquire()
+        if key is None:
+            key = read_event_domain(req)
+        if key is None:
+            # domain name is unknown, ordering is not important
+            position = self.stats.received % self.workers
+        else:
+            position = hash(key) % self.workers
+        self.stats.message_queued()
+        self.queues[position].put(req)
+        return True
+
+    def _worker(self, q):
+        while True:
+            req = q.get()
+            if req is None:
+                break
+            result = False
+            try:
+                result = handle_event(req)
+            except:
+                logger.exception('ERROR in handle_event()')
+            finally:
+                self.stats.message_finished(result)
+                self.inflight.release()
+        db.connection.close()
+
+
+class PollScheduler(object):
+    """
+    Decides how long polling loop must wait before sending next poll_req command.
+    Messages are drained continuously without any delay while back-end keeps responding with 1301 code.
+    When queue is empty (1300 code) or an error happened the interval grows exponentially
+    starting from `min_interval` up to `max_interval`, random jitter is added to avoid synchronized polling.
+    """
+
+    def __init__(self, min_interval=None, max_interval=None, backoff_factor=2.0, jitter=0.1, rate_window_seconds=60):
+        self.min_interval = settings.ZENAIDA_EPP_POLL_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.max_interval = settings.ZENAIDA_EPP_POLL_INTERVAL_SECONDS if max_interval is None else max_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.rate_window_seconds = rate_window_seconds
+        self.started = time.time()
+        self.current_interval = 0.0
+        self.errors = 0
+        self.received_moments = collections.deque()
+
+    def message_received(self):
+        self.current_interval = 0.0
+        moment_now = time.time()
+        self.received_moments.append(moment_now)
+        self._cleanup(moment_now)
+
+    def queue_empty(self):
+        self._backoff()
+
+    def error(self):
+        self.errors += 1
+        self._backoff()
+
+    def next_delay(self):
+        """
+        Returns number of seconds to wait before next poll_req command, including the jitter.
+        """
+        if not self.current_interval:
+            return 0.0
+        return self.current_interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def wait(self):
+        delay = self.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def messages_per_second(self):
+        moment_now = time.time()
+        self._cleanup(moment_now)
+        window = min(self.rate_window_seconds, max(moment_now - self.started, 1.0))
+        return len(self.received_moments) / window
+
+    def to_dict(self):
+        return {
+            'current_interval': self.current_interval,
+            'messages_per_second': self.messages_per_second(),
+            'errors': self.errors,
+        }
+
+    def _backoff(self):
+        if not self.current_interval:
+            self.current_interval = float(self.min_interval)
+        else:
+            self.current_interval = self.current_interval * self.backoff_factor
+        self.current_interval = min(self.current_interval, float(self.max_interval))
+
+    def _cleanup(self, moment_now):
+        while self.received_moments and self.received_moments[0] < moment_now - self.rate_window_seconds:
+            self.received_moments.popleft()
+
+
+def main(workers=1, max_inflight=None, stats_interval=60, scheduler=None):
+    """
+    Polling loop reading EPP messages from the back-end.
+    When `workers` is greater than 1 messages are handled in parallel by `EventsWorkerPool`,
+    otherwise every message is handled right away in the same thread.
+    While back-end keeps responding with 1301 code messages are drained continuously,
+    when queue is empty or an error happened `PollScheduler` makes the loop to back-off.
+    """
+    logger.info('polling loop started at %r with workers=%r max_inflight=%r', time.asctime(), workers, max_inflight)
+    stats = poll_stats()
+    scheduler = scheduler or PollScheduler()
+    pool = None
+    if workers and workers > 1:
+        pool = EventsWorkerPool(workers=workers, max_inflight=max_inflight, stats=stats)
+        pool.start()
+    latest_stats_report = time.time()
+    try:
         while True:
+            if stats_interval and time.time() - latest_stats_report > stats_interval:
+                latest_stats_report = time.time()
+                logger.info('poll stats: %r, scheduler: %r', stats.to_dict(), scheduler.to_dict())
+
             try:
                 req = rpc_client.cmd_poll_req()
                 resp_code = str(req['epp']['response']['result']['@code'])
             except:
                 logger.exception('ERROR in cmd_poll_req()')
-                break
+                scheduler.error()
+                scheduler.wait()
+                continue
 
             if resp_code == '1300':
                 # No new messages
                 # logger.debug('.')
-                break
+                scheduler.queue_empty()
+                scheduler.wait()
+                continue
 
             if resp_code != '1301':
                 logger.error('wrong response from EPP: %s', req)
-                break
+                scheduler.error()
+                scheduler.wait()
+                continue
 
             try:
                 msg_id = req['epp']['response']['msgQ']['@id']
@@ -545,22 +862,29 @@ def main():
                 rpc_client.cmd_poll_ack(msg_id)
             except:
                 logger.exception('ERROR in cmd_poll_ack()')
-                break
+                scheduler.error()
+                scheduler.wait()
+                continue
+
+            scheduler.message_received()
+
+            if pool:
+                # keep reading messages while workers are busy, submit() blocks when pool is full
+                pool.submit(req)
+                continue
 
+            stats.message_queued()
+            result = False
             try:
                 result = handle_event(req)
             except:
                 logger.exception('ERROR in handle_event()')
-                break
-
-            if result:
-                logger.debug('OK!')
-                break
-
-            logger.debug('NEXT?')
-
-        if not result:
-            time.sleep(settings.ZENAIDA_EPP_POLL_INTERVAL_SECONDS)
+            stats.message_finished(result)
+            logger.debug('OK!' if result else 'NEXT?')
+    finally:
+        if pool:
+            pool.stop(wait=True)
+        logger.info('polling loop finished, poll stats: %r, scheduler: %r', stats.to_dict(), scheduler.to_dict())
 
 
 if __name__ == '__main__':
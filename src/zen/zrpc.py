@@ -0,0 +1,366 @@
+"""
+Pipelined client for the EPP gate.
+
+Every `rpc_client.cmd_*()` call is a blocking request/response over RabbitMQ, so one process can only have
+one EPP command in progress at a time. `PipelinedClient` keeps single AMQP channel open and allows many
+requests to be in-flight at once, responses are matched to the requests by the `correlation_id` property.
+Each submitted command returns `concurrent.futures.Future` object, it can be also awaited in asyncio code:
+
+    client = zrpc.PipelinedClient()
+    client.start()
+    futures = [client.submit_domain_info(domain_name) for domain_name in domain_names]
+    responses = [f.result() for f in futures]
+    client.stop()
+
+The gate (see bin/epp_gate.pl) is consuming JSON messages like `{"cmd": "domain_info", "args": {"name": "abc.ai"}}`
+from the `epp_messages` queue and publish XML response to the `reply_to` queue.
+For testing and local development `FakeGate` can be used as a transport instead of RabbitMQ.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import concurrent.futures
+
+import pika
+
+from django.conf import settings
+
+from lib import xml2json
+
+from epp import rpc_error
+
+logger = logging.getLogger(__name__)
+
+#------------------------------------------------------------------------------
+
+class XML2JsonOptions(object):
+    pretty = True
+
+#------------------------------------------------------------------------------
+
+def read_credentials(filename):
+    """
+    Reads RabbitMQ connection parameters from the file.
+    JSON file with "host", "port", "username" and "password" fields is supported,
+    and also a plain text file with "host port username password" or "username password" values.
+    """
+    with open(filename, 'rt') as f:
+        src = f.read().strip()
+    try:
+        conf = json.loads(src)
+    except ValueError:
+        parts = src.split()
+        if len(parts) == 2:
+            conf = {'username': parts[0], 'password': parts[1], }
+        elif len(parts) >= 4:
+            conf = {'host': parts[0], 'port': parts[1], 'username': parts[2], 'password': parts[3], }
+        else:
+            raise ValueError('RabbitMQ credentials file format is not recognized')
+    return {
+        'host': conf.get('host', 'localhost'),
+        'port': int(conf.get('port', 5672)),
+        'username': conf.get('username') or conf.get('user'),
+        'password': conf.get('password') or conf.get('pass'),
+    }
+
+
+def parse_response(body):
+    """
+    Converts XML response received from the gate into the same structure `rpc_client` returns.
+    """
+    if not body:
+        raise rpc_error.EPPResponseEmpty()
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    try:
+        return json.loads(xml2json.xml2json(body, XML2JsonOptions(), strip_ns=1, strip=1))
+    except Exception as exc:
+        raise rpc_error.EPPBadResponse('response parsing failed: %r' % exc)
+
+#------------------------------------------------------------------------------
+
+class AMQPTransport(object):
+    """
+    Single RabbitMQ connection and channel used by `PipelinedClient`.
+    Connection is owned by one I/O thread, requests from other threads are published via
+    `add_callback_threadsafe()` because pika connection object is not thread-safe.
+    """
+
+    def __init__(self, credentials_filename=None, queue_name='epp_messages'):
+        self.credentials_filename = credentials_filename or settings.ZENAIDA_RABBITMQ_CLIENT_CREDENTIALS_FILENAME
+        self.queue_name = queue_name
+        self.connection = None
+        self.channel = None
+        self.callback_queue = None
+        self.thread = None
+        self.running = False
+        self.on_response = None
+        self.on_tick = None
+
+    def start(self, on_response, on_tick=None):
+        creds = read_credentials(self.credentials_filename)
+        self.on_response = on_response
+        self.on_tick = on_tick
+        self.connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=creds['host'],
+            port=creds['port'],
+            virtual_host='/',
+            credentials=pika.PlainCredentials(creds['username'], creds['password']),
+        ))
+        self.channel = self.connection.channel()
+        result = self.channel.queue_declare(queue='', exclusive=True)
+        self.callback_queue = result.method.queue
+        self.channel.basic_consume(
+            queue=self.callback_queue,
+            on_message_callback=self._on_message,
+            auto_ack=True,
+        )
+        self.running = True
+        self.thread = threading.Thread(target=self._io_loop, name='zrpc_amqp', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+        self.connection = None
+        self.channel = None
+
+    def publish(self, correlation_id, body):
+        self.connection.add_callback_threadsafe(lambda: self._do_publish(correlation_id, body))
+
+    def _do_publish(self, correlation_id, body):
+        self.channel.basic_publish(
+            exchange='',
+            routing_key=self.queue_name,
+            properties=pika.BasicProperties(
+                reply_to=self.callback_queue,
+                correlation_id=correlation_id,
+            ),
+            body=body,
+        )
+
+    def _on_message(self, channel, method, props, body):
+        self.on_response(props.correlation_id, body)
+
+    def _io_loop(self):
+        while self.running:
+            try:
+                self.connection.process_data_events(time_limit=0.1)
+            except Exception as exc:
+                logger.exception('AMQP connection failed: %r' % exc)
+                self.running = False
+                if self.on_tick:
+                    self.on_tick(failed=exc)
+                return
+            if self.on_tick:
+                self.on_tick()
+
+
+class FakeGate(object):
+    """
+    In-process replacement of the EPP gate for tests and local development.
+    Requests are handled by a pool of threads, `handlers` dictionary maps command name to a callable
+    which receives command arguments and must return XML response string, see `make_response()`.
+    """
+
+    def __init__(self, handlers=None, latency=0.0, workers=4):
+        self.handlers = handlers or {}
+        self.latency = latency
+        self.workers = workers
+        self.executor = None
+        self.on_response = None
+        self.requests = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    @staticmethod
+    def make_response(code=1000, msg='Command completed successfully', res_data=''):
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<epp xmlns="urn:ietf:params:xml:ns:epp-1.0"><response>'
+            '<result code="%d"><msg>%s</msg></result>%s'
+            '</response></epp>'
+        ) % (code, msg, ('<resData>%s</resData>' % res_data) if res_data else '')
+
+    def start(self, on_response, on_tick=None):
+        self.on_response = on_response
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def publish(self, correlation_id, body):
+        self.executor.submit(self._handle, correlation_id, body)
+
+    def _handle(self, correlation_id, body):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            request = json.loads(body)
+            with self.lock:
+                self.requests.append(request)
+            if self.latency:
+                time.sleep(self.latency)
+            handler = self.handlers.get(request['cmd'])
+            if handler is None:
+                response = self.make_response(code=2101, msg='Unimplemented command')
+            else:
+                response = handler(request.get('args') or {})
+        except Exception:
+            logger.exception('fake gate failed to process request %r' % correlation_id)
+            response = ''
+        finally:
+            with self.lock:
+                self.active -= 1
+        self.on_response(correlation_id, response)
+
+#------------------------------------------------------------------------------
+
+class PipelinedClient(object):
+    """
+    Sends many EPP commands over one transport and returns `Future` object for every command.
+    Number of requests in progress is limited by `max_inflight`, `submit()` blocks when limit is reached.
+    Requests without response after `timeout` seconds are failed with `EPPConnectionFailed` error.
+    """
+
+    def __init__(self, transport=None, max_inflight=None, timeout=None):
+        self.transport = transport or AMQPTransport()
+        self.max_inflight = max_inflight or settings.ZENAIDA_RPC_PIPELINE_MAX_INFLIGHT
+        self.timeout = timeout or settings.ZENAIDA_RPC_PIPELINE_TIMEOUT_SECONDS
+        self.inflight = threading.BoundedSemaphore(self.max_inflight)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.latest_expire_check = 0
+        self.sent = 0
+        self.received = 0
+        self.failed = 0
+
+    def start(self):
+        self.transport.start(on_response=self._on_response, on_tick=self._on_tick)
+        return self
+
+    def stop(self):
+        self.transport.stop()
+        with self.lock:
+            pending = list(self.pending.items())
+            self.pending.clear()
+        for _, (future, _, _) in pending:
+            self._fail(future, rpc_error.EPPConnectionFailed('client stopped'))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def submit(self, cmd, args=None, raise_for_result=True):
+        """
+        Sends command to the gate without waiting for the response.
+        """
+        self.inflight.acquire()
+        future = concurrent.futures.Future()
+        correlation_id = str(uuid.uuid4())
+        with self.lock:
+            self.pending[correlation_id] = (future, time.time() + self.timeout, raise_for_result, )
+            self.sent += 1
+        try:
+            self.transport.publish(correlation_id, json.dumps({'cmd': cmd, 'args': args or {}, }))
+        except Exception as exc:
+            with self.lock:
+                self.pending.pop(correlation_id, None)
+            self._fail(future, rpc_error.EPPConnectionFailed('request publishing failed: %r' % exc))
+        return future
+
+    def submit_domain_check(self, domains, raise_for_result=True):
+        return self.submit('domain_check', {'domains': list(domains), }, raise_for_result=raise_for_result)
+
+    def submit_domain_info(self, name, auth_info=None, raise_for_result=True):
+        args = {'name': name, }
+        if auth_info:
+            args['auth_info'] = auth_info
+        return self.submit('domain_info', args, raise_for_result=raise_for_result)
+
+    def submit_contact_info(self, contact_id, raise_for_result=True):
+        return self.submit('contact_info', {'contact': contact_id, }, raise_for_result=raise_for_result)
+
+    async def call(self, cmd, args=None, raise_for_result=True):
+        """
+        Same as `submit()`, but can be awaited from asyncio code.
+        """
+        return await asyncio.wrap_future(self.submit(cmd, args=args, raise_for_result=raise_for_result))
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'sent': self.sent,
+                'received': self.received,
+                'failed': self.failed,
+                'inflight': len(self.pending),
+            }
+
+    def _on_response(self, correlation_id, body):
+        with self.lock:
+            record = self.pending.pop(correlation_id, None)
+            if record is not None:
+                self.received += 1
+        if record is None:
+            logger.warning('received response for unknown request %r', correlation_id)
+            return
+        future, _, raise_for_result = record
+        try:
+            response = parse_response(body)
+            if raise_for_result:
+                code = int(response['epp']['response']['result']['@code'])
+                if code >= 2000:
+                    raise rpc_error.exception_from_response(response=response)
+        except Exception as exc:
+            self._fail(future, exc)
+            return
+        self._complete(future, result=response)
+
+    def _on_tick(self, failed=None):
+        moment_now = time.time()
+        if not failed and moment_now - self.latest_expire_check < 1.0:
+            return
+        self.latest_expire_check = moment_now
+        expired = []
+        with self.lock:
+            for correlation_id, (future, deadline, _) in list(self.pending.items()):
+                if failed or deadline < moment_now:
+                    expired.append(future)
+                    self.pending.pop(correlation_id)
+        for future in expired:
+            self._fail(future, rpc_error.EPPConnectionFailed('request timeout' if not failed else 'connection failed'))
+
+    def _fail(self, future, exc):
+        with self.lock:
+            self.failed += 1
+        self._complete(future, exc=exc)
+
+    def _complete(self, future, result=None, exc=None):
+        """
+        Every submitted request is completed exactly once, so the in-flight slot is always released here.
+        Future could be already cancelled by the caller, then the result is dropped.
+        """
+        try:
+            if not future.done():
+                if exc is not None:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+        except concurrent.futures.InvalidStateError:
+            pass
+        finally:
+            self.inflight.release()